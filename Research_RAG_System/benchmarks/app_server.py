@@ -0,0 +1,100 @@
+"""Run the API in-process against fake models for end-to-end benchmarks"""
+import os
+import socket
+import tempfile
+import threading
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+# Keep benchmark state out of ./data
+_data_dir = tempfile.mkdtemp(prefix="rag-bench-")
+os.environ.setdefault("JOBS_DB_PATH", os.path.join(_data_dir, "jobs.db"))
+os.environ.setdefault("FINGERPRINT_DB_PATH", os.path.join(_data_dir, "fingerprints.db"))
+os.environ.setdefault("EMBEDDING_CACHE_PATH", os.path.join(_data_dir, "embedding_cache.db"))
+os.environ.setdefault("VECTOR_DB_PATH", os.path.join(_data_dir, "chroma_db"))
+
+import chromadb
+import uvicorn
+from chromadb.config import Settings as ChromaSettings
+from src.api import dependencies
+from src.generation.rag_chain import RAGChain
+from src.vectorstore.chroma_store import ChromaVectorStore
+
+# Factories the routes depend on, captured before they are replaced
+_ORIGINAL_FACTORIES = {
+    "get_vector_store": dependencies.get_vector_store,
+    "get_rag_chain": dependencies.get_rag_chain,
+}
+
+
+def seed_products(vector_store: ChromaVectorStore, count: int = 50):
+    """Store a small synthetic product catalogue"""
+    chunks = []
+    for i in range(count):
+        price = 10 + (i * 37) % 990
+        chunks.append({
+            'text': f"Product {i} is a laptop with {8 + i % 4 * 8} GB RAM, priced at ${price}.99. "
+                    "It is well suited for programming and travel.",
+            'metadata': {'url': f"https://shop.example.com/product/{i}", 'title': f"Product {i}", 'price': f"${price}.99"}
+        })
+    vector_store.add_documents(chunks)
+
+
+def _provider(instance):
+    """Dependency provider that always returns the same instance"""
+    def provide():
+        return instance
+    return provide
+
+
+def install_fakes(app, embeddings, llm, in_memory: bool = True) -> ChromaVectorStore:
+    """
+    Point the app's dependencies at fake models and an in-memory Chroma
+
+    Args:
+        app: The FastAPI app
+        embeddings: Embeddings used for ingestion and queries
+        llm: Chat model used by RAGChain
+        in_memory: False to use the configured store (VECTOR_DB_HOST) instead
+
+    Returns:
+        The vector store the app will use
+    """
+    client = None
+    if in_memory:
+        client = chromadb.EphemeralClient(settings=ChromaSettings(anonymized_telemetry=False, allow_reset=True))
+        client.reset()
+    vector_store = ChromaVectorStore(embeddings=embeddings, client=client)
+
+    rag_chain = RAGChain()
+    rag_chain.llm = llm
+
+    for factory in vars(dependencies).values():
+        if hasattr(factory, "cache_clear"):
+            factory.cache_clear()
+    # Route dependencies are resolved through overrides; factories that
+    # call each other look the replacements up on the module. Providers
+    # take no parameters, since FastAPI would treat them as request inputs
+    for name, instance in (("get_vector_store", vector_store), ("get_rag_chain", rag_chain)):
+        app.dependency_overrides[_ORIGINAL_FACTORIES[name]] = _provider(instance)
+        setattr(dependencies, name, _provider(instance))
+    return vector_store
+
+
+def start_app(app) -> str:
+    """
+    Serve the app with uvicorn in a background thread
+
+    Returns:
+        Base URL of the running server
+    """
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return f"http://127.0.0.1:{port}"
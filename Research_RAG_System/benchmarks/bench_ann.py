@@ -0,0 +1,117 @@
+"""
+Benchmark ANN recall@k against latency for HNSW settings and quantized scoring
+
+Builds a synthetic clustered embedding set in an in-memory Chroma client and
+compares each search against exact brute-force neighbours. Reports recall@k
+and per-query latency for HNSW at several per-query ef values, and for the
+int8 and float16 quantized indexes re-ranked with full-precision vectors at
+several rerank factors, with the memory each quantized index holds.
+
+Usage:
+    python -m benchmarks.bench_ann --vectors 20000 --dimensions 384 --queries 200 --k 10
+"""
+import argparse
+import os
+import statistics
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+import chromadb
+import numpy as np
+from chromadb.config import Settings as ChromaSettings
+from src.config.settings import settings
+from src.vectorstore.chroma_store import ChromaVectorStore
+from src.vectorstore.quantized_index import distances
+
+
+class FixedEmbeddings:
+    """Embeddings stand-in; the benchmark only searches by vector"""
+
+    def embed_documents(self, texts):
+        raise NotImplementedError
+
+    def embed_query(self, text):
+        raise NotImplementedError
+
+
+def build_embeddings(count: int, dimensions: int, clusters: int = 64, seed: int = 0) -> np.ndarray:
+    """Unit vectors scattered around cluster centres, like topical document embeddings"""
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((clusters, dimensions)).astype(np.float32)
+    vectors = centres[rng.integers(0, clusters, count)] + 0.6 * rng.standard_normal((count, dimensions)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def timed(search, queries, k):
+    """Median milliseconds per query and the returned IDs"""
+    latencies = []
+    found = []
+    for query in queries:
+        start = time.perf_counter()
+        results = search(query.tolist(), k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        found.append([result['id'] for result in results])
+    return statistics.median(latencies), found
+
+
+def recall(found, truth, k):
+    return statistics.mean(len(set(ids[:k]) & set(exact)) / k for ids, exact in zip(found, truth))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--vectors", type=int, default=20000)
+    parser.add_argument("--dimensions", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--ef", default="10,25,50,100,200")
+    parser.add_argument("--rerank-factors", default="1,2,4,8")
+    parser.add_argument("--space", default="l2")
+    args = parser.parse_args()
+
+    vectors = build_embeddings(args.vectors + args.queries, args.dimensions)
+    vectors, queries = vectors[:args.vectors], vectors[args.vectors:]
+    ids = [f"chunk-{i}" for i in range(args.vectors)]
+    truth = [
+        [ids[i] for i in np.argsort(distances(args.space, query, vectors))[:args.k]]
+        for query in queries
+    ]
+
+    settings.bm25_enabled = False
+    settings.hnsw_space = args.space
+    settings.hnsw_ef_search = 10
+    settings.collection_name = "bench_ann"
+    settings.quantized_index = None
+    client = chromadb.EphemeralClient(ChromaSettings(anonymized_telemetry=False))
+    store = ChromaVectorStore(embeddings=FixedEmbeddings(), client=client)
+
+    start = time.perf_counter()
+    batch_size = store.max_write_batch_size()
+    for offset in range(0, args.vectors, batch_size):
+        end = offset + batch_size
+        store.upsert_embeddings(
+            ids[offset:end], ["" for _ in ids[offset:end]], vectors[offset:end].tolist(), [{'n': i} for i in range(offset, min(end, args.vectors))]
+        )
+    print(
+        f"{args.vectors} x {args.dimensions}-d vectors, {args.queries} queries, recall@{args.k}, {args.space}; "
+        f"HNSW build {time.perf_counter() - start:.1f}s, float32 vectors {vectors.nbytes / 2**20:.1f} MiB"
+    )
+
+    print(f"{'search':<24}{'recall':>8}{'ms/query':>10}{'index MiB':>11}")
+    for ef in (int(e) for e in args.ef.split(",")):
+        latency, found = timed(lambda query, k: store.search_by_vector(query, k, ef=ef), queries, args.k)
+        print(f"{f'hnsw ef={ef}':<24}{recall(found, truth, args.k):>8.3f}{latency:>10.2f}{'':>11}")
+
+    for dtype in ("int8", "float16"):
+        settings.quantized_index = dtype
+        quantized = ChromaVectorStore(embeddings=FixedEmbeddings(), client=client)
+        megabytes = quantized.quantized_index.nbytes() / 2**20
+        for factor in (int(f) for f in args.rerank_factors.split(",")):
+            settings.quantized_rerank_factor = factor
+            latency, found = timed(quantized.search_by_vector, queries, args.k)
+            print(f"{f'{dtype} rerank x{factor}':<24}{recall(found, truth, args.k):>8.3f}{latency:>10.2f}{megabytes:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
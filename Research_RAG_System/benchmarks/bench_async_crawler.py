@@ -0,0 +1,74 @@
+"""
+Benchmark crawl throughput against a local stub HTTP server
+
+Compares the sequential BeautifulSoupCrawler loop with AsyncCrawler at
+several concurrency levels. Requests are spread over a few loopback
+addresses so the per-host limit applies the way it would across sites.
+
+Usage:
+    python -m benchmarks.bench_async_crawler --urls 200 --latency 0.05
+"""
+import argparse
+import asyncio
+import os
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+from benchmarks.stub_server import start_product_server
+from src.crawler.async_crawler import AsyncCrawler
+from src.crawler.beautifulsoup_crawler import BeautifulSoupCrawler
+
+
+def build_urls(port: int, count: int, hosts: int):
+    return [f"http://127.0.0.{i % hosts + 1}:{port}/product/{i}" for i in range(count)]
+
+
+def bench_sequential(urls):
+    crawler = BeautifulSoupCrawler()
+    start = time.perf_counter()
+    for url in urls:
+        crawler.crawl(url)
+    return time.perf_counter() - start
+
+
+async def bench_async(urls, concurrency, per_host):
+    crawler = AsyncCrawler(max_concurrency=concurrency, per_host_concurrency=per_host)
+    try:
+        start = time.perf_counter()
+        results = await crawler.crawl_many(urls)
+        elapsed = time.perf_counter() - start
+    finally:
+        await crawler.aclose()
+    failed = sum(1 for r in results if not r['text'])
+    return elapsed, failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--urls", type=int, default=200)
+    parser.add_argument("--hosts", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.05, help="simulated server latency in seconds")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 32, 64])
+    args = parser.parse_args()
+
+    server, port = start_product_server(latency=args.latency)
+    urls = build_urls(port, args.urls, args.hosts)
+
+    print(f"{args.urls} URLs over {args.hosts} hosts, {args.latency * 1000:.0f} ms latency")
+    print(f"{'mode':<28}{'seconds':>10}{'URLs/sec':>12}{'failed':>8}")
+
+    elapsed = bench_sequential(urls)
+    print(f"{'sequential':<28}{elapsed:>10.2f}{len(urls) / elapsed:>12.1f}{0:>8}")
+
+    for concurrency in args.concurrency:
+        per_host = max(1, concurrency // args.hosts)
+        elapsed, failed = asyncio.run(bench_async(urls, concurrency, per_host))
+        label = f"async c={concurrency} host={per_host}"
+        print(f"{label:<28}{elapsed:>10.2f}{len(urls) / elapsed:>12.1f}{failed:>8}")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Benchmark POST /api/query/batch against sequential /api/query calls
+
+Answers the same N distinct product questions (some with price filters)
+once as N sequential /api/query requests and once as one batch request,
+against fake models with fixed embedding and LLM latency (query cache
+off). Reports wall time and how many embedding calls each made.
+
+Usage:
+    python -m benchmarks.bench_batch_query --queries 30 --embed-latency 0.05 --llm-delay 0.2
+"""
+import argparse
+import os
+import time
+
+os.environ.setdefault("QUERY_CACHE_ENABLED", "false")
+
+import httpx
+from benchmarks.app_server import install_fakes, seed_products, start_app
+from benchmarks.fakes import CountingEmbeddings, SlowChatModel
+from benchmarks.bench_rerank import PRODUCTS
+from src.config.settings import settings
+from main import app
+
+
+def build_queries(count: int):
+    queries = []
+    for i in range(count):
+        query = {"query": f"Is the {PRODUCTS[i % len(PRODUCTS)]} good for travel? ({i})"}
+        if i % 3 == 0:
+            query["filters"] = {"price_max": 500}
+        queries.append(query)
+    return queries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--queries", type=int, default=30)
+    parser.add_argument("--embed-latency", type=float, default=0.05)
+    parser.add_argument("--llm-delay", type=float, default=0.2)
+    parser.add_argument("--generation-concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    settings.batch_generation_concurrency = args.generation_concurrency
+    llm = SlowChatModel(first_token_delay=args.llm_delay, token_delay=0.0)
+    embeddings = CountingEmbeddings(call_latency=args.embed_latency)
+    vector_store = install_fakes(app, embeddings, llm)
+    seed_products(vector_store)
+    base_url = start_app(app)
+    queries = build_queries(args.queries)
+
+    print(f"{args.queries} queries, embedding {args.embed_latency * 1000:.0f} ms per call, "
+          f"LLM {args.llm_delay * 1000:.0f} ms, generation concurrency {args.generation_concurrency}")
+    print(f"{'mode':<24}{'wall ms':>10}{'embed calls':>13}{'LLM calls':>11}{'errors':>8}")
+    with httpx.Client(base_url=base_url, timeout=300) as client:
+        # Warm up
+        client.post("/api/query", json={"query": "warm up"}).raise_for_status()
+
+        embeddings.calls = llm.calls = 0
+        start = time.perf_counter()
+        errors = sum(client.post("/api/query", json=query).status_code != 200 for query in queries)
+        print(f"{'sequential /api/query':<24}{(time.perf_counter() - start) * 1000:>10.0f}"
+              f"{embeddings.calls:>13}{llm.calls:>11}{errors:>8}")
+
+        embeddings.calls = llm.calls = 0
+        start = time.perf_counter()
+        response = client.post("/api/query/batch", json={"queries": queries})
+        response.raise_for_status()
+        results = response.json()["results"]
+        errors = sum(item["error"] is not None for item in results)
+        print(f"{'/api/query/batch':<24}{(time.perf_counter() - start) * 1000:>10.0f}"
+              f"{embeddings.calls:>13}{llm.calls:>11}{errors:>8}")
+
+    in_order = all(item["result"]["query"] == query["query"] for item, query in zip(results, queries))
+    print(f"\nbatch results in request order: {in_order}")
+
+
+if __name__ == "__main__":
+    main()
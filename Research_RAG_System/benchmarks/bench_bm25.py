@@ -0,0 +1,102 @@
+"""
+Benchmark BM25 index build time, memory and query latency against corpus size
+
+Builds a synthetic product corpus (shared vocabulary plus unique model
+numbers) directly into a BM25Index and times keyword and model-number
+queries against it.
+
+Usage:
+    python -m benchmarks.bench_bm25 --sizes 10000 100000
+    python -m benchmarks.bench_bm25 --sizes 1000000 --queries 200
+"""
+import argparse
+import random
+import statistics
+import time
+
+from src.retrieval.bm25_index import BM25Index
+
+
+VOCABULARY = [
+    "laptop", "gaming", "ultrabook", "battery", "display", "keyboard", "backlit", "oled",
+    "processor", "memory", "storage", "ssd", "graphics", "wireless", "bluetooth", "usb",
+    "thunderbolt", "webcam", "speaker", "lightweight", "aluminum", "chassis", "warranty",
+    "coding", "students", "business", "creator", "refresh", "rate", "touchscreen", "hinge",
+    "charger", "fast", "quiet", "cooling", "fan", "price", "deal", "review", "rating"
+] + [f"term{i}" for i in range(5000)]
+
+BRANDS = ["dell", "lenovo", "asus", "acer", "hp", "apple", "msi", "razer"]
+
+
+def rss_bytes() -> int:
+    """Resident set size of this process"""
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * 4096
+
+
+def build_chunk(rng: random.Random, i: int) -> str:
+    words = rng.choices(VOCABULARY, k=150)
+    brand = BRANDS[i % len(BRANDS)]
+    return f"{brand} model {brand[:2]}-{i} " + " ".join(words)
+
+
+def bench_size(size: int, queries: int, seed: int):
+    rng = random.Random(seed)
+    index = BM25Index()
+
+    before = rss_bytes()
+    start = time.perf_counter()
+    for i in range(size):
+        index.add(f"chunk-{i}", build_chunk(rng, i))
+    build_seconds = time.perf_counter() - start
+    memory = rss_bytes() - before
+    postings = sum(len(docs) for docs in index.postings_docs)
+
+    keyword_queries = [
+        " ".join(rng.choices(VOCABULARY[:40], k=rng.randint(2, 5)))
+        for _ in range(queries)
+    ]
+    model_queries = [
+        f"{BRANDS[n % len(BRANDS)]} {BRANDS[n % len(BRANDS)][:2]}-{n}"
+        for n in (rng.randrange(size) for _ in range(queries))
+    ]
+
+    results = {}
+    for name, batch in (("keyword", keyword_queries), ("model", model_queries)):
+        latencies = []
+        for query in batch:
+            start = time.perf_counter()
+            index.search(query, 20)
+            latencies.append((time.perf_counter() - start) * 1000)
+        latencies.sort()
+        results[name] = (statistics.median(latencies), latencies[int(len(latencies) * 0.95) - 1])
+
+    # The exact model number should be the top hit
+    hits = sum(
+        1 for n in range(0, size, max(size // 50, 1))
+        if index.search(f"{BRANDS[n % len(BRANDS)][:2]}-{n}", 1)[0][0] == f"chunk-{n}"
+    )
+    checked = len(range(0, size, max(size // 50, 1)))
+
+    print(
+        f"{size:>9} chunks | build {build_seconds:7.1f}s ({size / build_seconds:8.0f}/s) | "
+        f"rss +{memory / 2**20:7.1f} MiB, {postings / size:.0f} postings/chunk | "
+        f"keyword p50 {results['keyword'][0]:7.2f}ms p95 {results['keyword'][1]:7.2f}ms | "
+        f"model p50 {results['model'][0]:6.2f}ms p95 {results['model'][1]:6.2f}ms | "
+        f"model-number top-1 {hits}/{checked}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        bench_size(size, args.queries, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Benchmark chunks/sec of per-URL add_documents against BulkVectorWriter
+
+Uses a fake embedding function that counts calls and simulates a fixed
+round-trip cost per request, writing to an in-memory Chroma client.
+
+Usage:
+    python -m benchmarks.bench_bulk_ingest --documents 200 --latency 0.05
+"""
+import argparse
+import os
+import random
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+import chromadb
+from chromadb.config import Settings as ChromaSettings
+from benchmarks.fakes import CountingEmbeddings
+from src.vectorstore.bulk_writer import BulkVectorWriter
+from src.vectorstore.chroma_store import ChromaVectorStore
+
+
+def build_documents(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    documents = []
+    for d in range(count):
+        chunks = rng.choice([3, 5, 10, 30])
+        documents.append([
+            {
+                'text': f"Product {d} chunk {c}: " + "lorem ipsum dolor sit amet " * 30,
+                'metadata': {'url': f"https://example.com/{d}", 'chunk_index': c, 'total_chunks': chunks}
+            }
+            for c in range(chunks)
+        ])
+    return documents
+
+
+def new_store(embeddings):
+    client = chromadb.EphemeralClient(settings=ChromaSettings(anonymized_telemetry=False, allow_reset=True))
+    client.reset()
+    return ChromaVectorStore(embeddings=embeddings, client=client)
+
+
+def bench_per_url(documents, latency):
+    embeddings = CountingEmbeddings(call_latency=latency)
+    store = new_store(embeddings)
+    start = time.perf_counter()
+    for chunks in documents:
+        store.add_documents(chunks)
+    return time.perf_counter() - start, embeddings.calls, store.get_collection_count()
+
+
+def bench_bulk(documents, latency, buffer_chunks):
+    embeddings = CountingEmbeddings(call_latency=latency)
+    store = new_store(embeddings)
+    writer = BulkVectorWriter(store, buffer_chunks=buffer_chunks, flush_interval=0)
+    start = time.perf_counter()
+    futures = [writer.add(chunks) for chunks in documents]
+    writer.close()
+    for future in futures:
+        future.result()
+    return time.perf_counter() - start, embeddings.calls, store.get_collection_count()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--documents", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.05, help="simulated seconds per embedding request")
+    parser.add_argument("--buffer", type=int, nargs="+", default=[128, 512, 2048])
+    args = parser.parse_args()
+
+    documents = build_documents(args.documents)
+    total = sum(len(chunks) for chunks in documents)
+    print(f"{args.documents} documents, {total} chunks, {args.latency * 1000:.0f} ms per embedding call")
+    print(f"{'mode':<20}{'seconds':>10}{'chunks/sec':>12}{'embed calls':>13}{'stored':>8}")
+
+    elapsed, calls, stored = bench_per_url(documents, args.latency)
+    print(f"{'per-URL':<20}{elapsed:>10.2f}{total / elapsed:>12.0f}{calls:>13}{stored:>8}")
+
+    for buffer_chunks in args.buffer:
+        elapsed, calls, stored = bench_bulk(documents, args.latency, buffer_chunks)
+        label = f"bulk buffer={buffer_chunks}"
+        print(f"{label:<20}{elapsed:>10.2f}{total / elapsed:>12.0f}{calls:>13}{stored:>8}")
+
+
+if __name__ == "__main__":
+    main()
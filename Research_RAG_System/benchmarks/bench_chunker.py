@@ -0,0 +1,120 @@
+"""
+Benchmark the token-budgeted chunker against the previous character chunker
+
+Chunks large cleaned documents with the previous TextChunker (a
+RecursiveCharacterTextSplitter measuring len() characters, with a metadata
+copy per chunk) and with TextChunker.chunk_document (token-budgeted spans
+into the text, page metadata held once). Reports throughput, the peak and
+retained Python heap, the pickled size a worker process sends back, and how
+evenly the chunks fill the token budget.
+
+Without tiktoken's vocabulary files (e.g. offline) token counts fall back to
+estimates, which the script reports.
+
+Usage:
+    python -m benchmarks.bench_chunker --sizes-mb 1,5,10
+"""
+import argparse
+import os
+import pickle
+import statistics
+import time
+import tracemalloc
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from benchmarks.bench_parallel_processing import build_corpus
+from src.processing.chunker import TextChunker
+from src.processing.text_cleaner import TextCleaner
+from src.processing.tokens import count_tokens_batch, get_encoding
+from src.vectorstore.fingerprint_index import chunk_id
+
+
+METADATA = {
+    'url': "https://example.com/product/1",
+    'title': "Example Laptop 14 - 16GB RAM, 512GB SSD",
+    'description': "A dependable 14 inch laptop with all-day battery life, a sharp display and a "
+                   "comfortable keyboard for long sessions. Ships in 2-3 days with a 2 year warranty.",
+    'price': "$1,299.99",
+    'price_value': 1299.99,
+    'price_currency': "USD",
+    'tags': "laptop, ultrabook, 16GB, SSD"
+}
+
+
+class PreviousChunker:
+    """TextChunker before token budgeting: 1000 characters with 200 overlap"""
+
+    def __init__(self):
+        self.splitter = RecursiveCharacterTextSplitter(
+            chunk_size=1000,
+            chunk_overlap=200,
+            length_function=len,
+            separators=["\n\n", "\n", ".", "!", "?", ",", " ", ""]
+        )
+
+    def chunk_text(self, text, metadata):
+        chunks = self.splitter.split_text(text)
+        result = []
+        for i, chunk in enumerate(chunks):
+            chunk_metadata = metadata.copy()
+            chunk_metadata['chunk_index'] = i
+            chunk_metadata['total_chunks'] = len(chunks)
+            result.append({
+                'id': chunk_id(metadata.get('url', ''), i, chunk),
+                'text': chunk,
+                'metadata': chunk_metadata
+            })
+        return result
+
+
+def measure(chunk, text):
+    """Seconds, peak and retained heap while chunking, and the result"""
+    start = time.perf_counter()
+    chunk(text, dict(METADATA))
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    result = chunk(text, dict(METADATA))
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak - baseline, retained - baseline, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes-mb", default="1,5,10")
+    args = parser.parse_args()
+
+    tokenizer = "tiktoken" if get_encoding() is not None else "estimated (no tokenizer files)"
+    print(f"token counts: {tokenizer}")
+
+    previous = PreviousChunker()
+    chunker = TextChunker()
+    print(
+        f"{'size':>6}  {'chunker':<10}{'chunks':>7}{'MB/s':>7}{'peak MiB':>10}{'kept MiB':>10}"
+        f"{'pickle MiB':>12}{'tokens mean':>13}{'stdev':>7}{'max':>6}"
+    )
+    for size_mb in (float(s) for s in args.sizes_mb.split(",")):
+        raw, _ = build_corpus(1, int(size_mb * 1024))[0]
+        text = TextCleaner.clean(raw)
+        mb = len(text) / 2**20
+
+        runs = (
+            ("previous", previous.chunk_text, lambda chunks: [chunk['text'] for chunk in chunks]),
+            ("tokens", chunker.chunk_document, lambda document: [document.text_of(i) for i in range(len(document))]),
+        )
+        for name, chunk, texts_of in runs:
+            elapsed, peak, retained, result = measure(chunk, text)
+            tokens = count_tokens_batch(texts_of(result))
+            print(
+                f"{size_mb:>5.0f}M  {name:<10}{len(tokens):>7}{mb / elapsed:>7.1f}"
+                f"{peak / 2**20:>10.1f}{retained / 2**20:>10.1f}{len(pickle.dumps(result)) / 2**20:>12.1f}"
+                f"{statistics.mean(tokens):>13.0f}{statistics.pstdev(tokens):>7.0f}{max(tokens):>6}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Benchmark prompt size of the packed context against the previous formatting
+
+Replays recorded retrievals (query plus retrieved chunks) through the
+previous RAGChain context formatting (every chunk with its own header, cut
+at 500 characters) and through ContextBuilder at several token budgets.
+Reports prompt tokens, build time, how much of the distinct retrieved text
+(as 8-word runs) reaches the model, and the input cost per 1,000 queries.
+
+Recordings are JSON lines of {"query": ..., "docs": [{"id", "content",
+"metadata"}, ...]}. Without --recorded, retrievals are synthesized the way
+hybrid search returns them for product pages: several chunks of the best
+pages, often adjacent and overlapping, plus re-crawled duplicates.
+
+Usage:
+    python -m benchmarks.bench_context --recorded queries.jsonl --budgets 500,750,1000,1500
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+from benchmarks.bench_parallel_processing import build_corpus
+from benchmarks.bench_rerank import PRODUCTS
+from src.generation.context import ContextBuilder
+from src.generation.rag_chain import RAGChain
+from src.processing.chunker import TextChunker
+from src.processing.text_cleaner import TextCleaner
+from src.processing.tokens import count_chat_tokens, get_encoding
+
+
+def previous_context(docs):
+    """RAGChain._format_context before context packing"""
+    if not docs:
+        return "No relevant information found."
+
+    context_parts = []
+    for i, doc in enumerate(docs, 1):
+        metadata = doc.get('metadata', {})
+        content = doc.get('content', '')
+
+        entry = f"[Product {i}]\n"
+        if metadata.get('title'):
+            entry += f"Title: {metadata['title']}\n"
+        if metadata.get('price'):
+            entry += f"Price: {metadata['price']}\n"
+        if metadata.get('url'):
+            entry += f"URL: {metadata['url']}\n"
+        entry += f"Description: {content[:500]}...\n"
+
+        context_parts.append(entry)
+
+    return "\n\n".join(context_parts)
+
+
+def synthesize_recordings(count: int, top_k: int, seed: int = 0):
+    """Retrievals of top_k chunks clustered on a few product pages"""
+    rng = random.Random(seed)
+    chunker = TextChunker()
+    pages = []
+    for p, (raw, metadata) in enumerate(build_corpus(len(PRODUCTS), 16, seed)):
+        metadata = {**metadata, 'title': PRODUCTS[p], 'price': f"${rng.randint(20, 2000)}.99"}
+        pages.append(chunker.chunk_text(TextCleaner.clean(raw), metadata))
+
+    recordings = []
+    for q in range(count):
+        docs = []
+        while len(docs) < top_k:
+            chunks = rng.choice(pages)
+            start = rng.randrange(len(chunks) - 2)
+            # A run of adjacent chunks, sometimes returned twice
+            for chunk in chunks[start:start + rng.randint(1, 3)]:
+                doc = {'id': chunk['id'], 'content': chunk['text'], 'metadata': chunk['metadata']}
+                docs.extend([doc] * (2 if rng.random() < 0.2 else 1))
+        recordings.append({'query': f"Which {rng.choice(PRODUCTS)} is worth buying?", 'docs': docs[:top_k]})
+    return recordings
+
+
+def shingles(text: str, size: int = 8):
+    words = text.split()
+    return {tuple(words[i:i + size]) for i in range(max(len(words) - size + 1, 1))}
+
+
+def coverage(context: str, docs) -> float:
+    """Fraction of the distinct retrieved 8-word runs that appear in the context"""
+    retrieved = set()
+    for doc in docs:
+        retrieved |= shingles(doc['content'])
+    return len(retrieved & shingles(context)) / max(len(retrieved), 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--recorded", default=None)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--budgets", default="500,750,1000,1500")
+    parser.add_argument("--price-per-1m-input", type=float, default=0.5)
+    args = parser.parse_args()
+
+    if args.recorded:
+        with open(args.recorded) as f:
+            recordings = [json.loads(line) for line in f if line.strip()]
+    else:
+        recordings = synthesize_recordings(args.queries, args.top_k)
+
+    chain = RAGChain()
+    tokenizer = "tiktoken" if get_encoding(chain.context_builder.model) is not None else "estimated (no tokenizer files)"
+    print(f"{len(recordings)} recorded retrievals, token counts: {tokenizer}")
+
+    def prompt_tokens(query, context):
+        messages = chain.prompt_template.format_messages(context=context, question=query)
+        return count_chat_tokens([message.content for message in messages], chain.context_builder.model)
+
+    builders = [("previous", previous_context)]
+    for budget in (int(b) for b in args.budgets.split(",")):
+        builder = ContextBuilder(token_budget=budget)
+        builders.append((f"packed, budget {budget}", lambda docs, builder=builder: builder.build(docs).text))
+
+    print(f"{'context':<22}{'prompt tokens':>14}{'p95':>7}{'build ms':>10}{'coverage':>10}{'$ per 1k queries':>18}")
+    for name, build in builders:
+        tokens = []
+        elapsed = 0.0
+        covered = []
+        for recording in recordings:
+            start = time.perf_counter()
+            context = build(recording['docs'])
+            elapsed += time.perf_counter() - start
+            tokens.append(prompt_tokens(recording['query'], context))
+            covered.append(coverage(context, recording['docs']))
+        tokens.sort()
+        print(
+            f"{name:<22}{statistics.mean(tokens):>14.0f}{tokens[int(0.95 * (len(tokens) - 1))]:>7}"
+            f"{elapsed / len(recordings) * 1000:>10.2f}{statistics.mean(covered):>10.2f}"
+            f"{statistics.mean(tokens) * args.price_per_1m_input / 1000:>18.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Benchmark embedding throughput and query-embedding latency per backend
+
+For each embedding backend, embeds a corpus of chunk-sized texts with
+embed_documents (embeddings/sec), then embeds queries from concurrent
+client threads and reports p50/p99 latency. The local ONNX backend is run
+with dynamic batching off (one query per inference) and on.
+
+The OpenAI backend needs OPENAI_API_KEY and network access; the local
+backend needs a model directory (model.onnx and tokenizer.json, e.g. an
+exported all-MiniLM-L6-v2). Backends that cannot be loaded are reported
+and skipped.
+
+Usage:
+    python -m benchmarks.bench_embeddings --backends local:all-MiniLM-L6-v2,openai:text-embedding-3-small
+"""
+import argparse
+import os
+import statistics
+import threading
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+from benchmarks.bench_parallel_processing import build_corpus
+from src.config.settings import settings
+from src.processing.chunker import TextChunker
+from src.vectorstore.embeddings import create_embeddings, parse_embedding_model
+
+
+def build_texts(count: int):
+    """Chunk texts and short product queries"""
+    raw, metadata = build_corpus(1, count)[0]
+    chunks = TextChunker().chunk_text(raw, metadata)
+    texts = [chunk['text'] for chunk in chunks][:count]
+    queries = [" ".join(text.split()[:8]) for text in texts]
+    return texts, queries
+
+
+def query_latencies(embeddings, queries, concurrency: int):
+    """Per-query seconds with `concurrency` threads embedding queries at once"""
+    latencies = []
+    lock = threading.Lock()
+
+    def client(offset: int):
+        for query in queries[offset::concurrency]:
+            start = time.perf_counter()
+            embeddings.embed_query(query)
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start, latencies
+
+
+def percentile(values, fraction: float) -> float:
+    values = sorted(values)
+    return values[min(int(fraction * len(values)), len(values) - 1)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--backends", default="local:all-MiniLM-L6-v2,openai:text-embedding-3-small")
+    parser.add_argument("--documents", type=int, default=512)
+    parser.add_argument("--queries", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    settings.embedding_cache_enabled = False
+    texts, queries = build_texts(max(args.documents, args.queries))
+    texts, queries = texts[:args.documents], queries[:args.queries]
+    print(f"{len(texts)} chunks, {len(queries)} queries from {args.concurrency} threads, {os.cpu_count()} CPUs")
+
+    print(f"{'backend':<44}{'docs/s':>9}{'queries/s':>11}{'p50 ms':>9}{'p99 ms':>9}{'mean batch':>12}")
+    for name in args.backends.split(","):
+        try:
+            embeddings = create_embeddings(name)
+            embeddings.embed_query("warm up")
+        except Exception as e:
+            print(f"{name:<44}unavailable: {str(e).splitlines()[0][:80]}")
+            continue
+
+        start = time.perf_counter()
+        embeddings.embed_documents(texts)
+        docs_per_second = len(texts) / (time.perf_counter() - start)
+
+        modes = [(name, None)]
+        if parse_embedding_model(name)[0] == "local":
+            modes = [(f"{name} (no batching)", 1), (f"{name} (batching)", embeddings.batch_size)]
+        for label, max_batch_size in modes:
+            batcher = getattr(embeddings, 'batcher', None)
+            if batcher is not None:
+                batcher.max_batch_size = max_batch_size
+                batcher.batches = batcher.items = 0
+            elapsed, latencies = query_latencies(embeddings, queries, args.concurrency)
+            mean_batch = f"{batcher.items / batcher.batches:.1f}" if batcher is not None and batcher.batches else "-"
+            print(
+                f"{label:<44}{docs_per_second:>9.0f}{len(latencies) / elapsed:>11.0f}"
+                f"{statistics.median(latencies) * 1000:>9.1f}{percentile(latencies, 0.99) * 1000:>9.1f}{mean_batch:>12}"
+            )
+
+
+if __name__ == "__main__":
+    main()
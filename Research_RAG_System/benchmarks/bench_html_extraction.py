@@ -0,0 +1,125 @@
+"""
+Benchmark single-pass streaming extraction against the BeautifulSoup tree path
+
+Parses a corpus of product pages with both BeautifulSoupCrawler.parse_tree
+(full BeautifulSoup tree plus MetadataExtractor lookups) and the streaming
+HTMLExtractor, checks that they produce the same text and metadata, and
+reports pages/sec and peak memory. Memory is the tracemalloc peak while
+parsing the corpus one page at a time; the BeautifulSoup tree is made of
+Python objects, so this is where the two paths differ.
+
+Usage:
+    python -m benchmarks.bench_html_extraction --pages 300
+    python -m benchmarks.bench_html_extraction --corpus-dir ./saved_pages
+"""
+import argparse
+import os
+import random
+import time
+import tracemalloc
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+from src.crawler.beautifulsoup_crawler import BeautifulSoupCrawler
+
+
+def synthetic_page(rng: random.Random, i: int) -> bytes:
+    """A product page with the boilerplate real shops carry"""
+    nav = "".join(f'<li><a href="/c/{c}">Category {c}</a></li>' for c in range(rng.randint(20, 80)))
+    specs = "".join(
+        f"<tr><td>Spec {s}</td><td>{rng.randint(1, 999)} units</td></tr>"
+        for s in range(rng.randint(10, 40))
+    )
+    reviews = "".join(
+        f'<div class="review"><h3>Review {r}</h3><p>Solid product,   works as described.\n'
+        f'Would buy again &amp; recommend. Rating {rng.randint(1, 5)}/5</p></div>'
+        for r in range(rng.randint(5, 400))
+    )
+    scripts = "".join(
+        f'<script>window.data{s} = {{"sku": "SKU-{i}-{s}", "price": "$ {rng.randint(1, 99)}.00"}};</script>'
+        for s in range(rng.randint(2, 10))
+    )
+    price = f"{rng.randint(10, 2999)}.{rng.randint(0, 99):02d}"
+    return f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+  <meta charset="utf-8">
+  <title>Product {i} | Example Shop</title>
+  <meta property="og:title" content="Product {i}">
+  <meta name="description" content="Everything about product {i}.">
+  <meta name="keywords" content="product {i}, laptop, example">
+  <style>.review {{ margin: 1em; }} body {{ font-family: sans-serif; }}</style>
+  {scripts}
+</head>
+<body>
+  <header><div class="banner">Free shipping over $50</div><nav><ul>{nav}</ul></nav></header>
+  <main>
+    <h1>Product {i}</h1>
+    <span class="price">${price}</span>
+    <p>Product {i} is a   dependable laptop.<br>It ships in 2-3 days.</p>
+    <table>{specs}</table>
+    <!-- recommendations rendered client-side -->
+    <section>{reviews}</section>
+  </main>
+  <footer><p>&copy; Example Shop. Prices from USD 5.</p></footer>
+</body>
+</html>""".encode("utf-8")
+
+
+def load_corpus(args) -> list:
+    if args.corpus_dir:
+        pages = []
+        for name in sorted(os.listdir(args.corpus_dir)):
+            with open(os.path.join(args.corpus_dir, name), "rb") as f:
+                pages.append(f.read())
+        return pages
+    rng = random.Random(args.seed)
+    return [synthetic_page(rng, i) for i in range(args.pages)]
+
+
+def measure(parse, pages, repeat: int):
+    """Pages/sec over the corpus and the peak Python heap while parsing"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for page in pages:
+            parse(page)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    for page in pages:
+        parse(page)
+    _, heap_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return len(pages) * repeat / elapsed, heap_peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pages", type=int, default=300)
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--corpus-dir", default=None)
+    args = parser.parse_args()
+
+    pages = load_corpus(args)
+    crawler = BeautifulSoupCrawler()
+    mismatches = 0
+    for page in pages:
+        expected = crawler.parse_tree(page, page.decode("utf-8", "replace"), "https://example.com")
+        if crawler.html_extractor.extract(page, "https://example.com") != expected:
+            mismatches += 1
+    size = sum(len(page) for page in pages) / len(pages)
+    print(f"{len(pages)} pages, {size / 1024:.0f} KiB average, {mismatches} outputs differ")
+
+    tree = lambda page: crawler.parse_tree(page, page.decode("utf-8", "replace"), "https://example.com")
+    stream = lambda page: crawler.html_extractor.extract(page, "https://example.com")
+
+    print(f"{'path':<22}{'pages/s':>10}{'peak heap KiB':>15}")
+    for name, parse in (("BeautifulSoup tree", tree), ("streaming extractor", stream)):
+        pages_per_second, heap_peak = measure(parse, pages, args.repeat)
+        print(f"{name:<22}{pages_per_second:>10.1f}{heap_peak // 1024:>15}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""
+Load test /api/query across uvicorn worker processes sharing a Chroma server
+
+Starts a local Chroma server (`chroma run`) and, for each worker count,
+serves benchmarks.multiworker_app with `uvicorn --workers N` against a
+fresh collection. Product pages from a local stub server are ingested
+through /api/crawl, then concurrent queries (query cache off, stub LLM with
+a fixed latency) measure read throughput. Health checks report which
+process holds the writer lock: exactly one should ingest, the others stand
+by. A last run kills the writer and times the takeover.
+
+Usage:
+    python -m benchmarks.bench_multiworker --workers 1 2 4 --requests 400 --concurrency 32
+"""
+import argparse
+import asyncio
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+from benchmarks.stub_server import start_llm_server, start_product_server
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_up(url: str, process: subprocess.Popen, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{process.args[0]} exited with status {process.returncode}")
+        try:
+            if httpx.get(url, timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {timeout:.0f}s")
+
+
+def start_chroma(data_dir: str) -> tuple:
+    port = free_port()
+    process = subprocess.Popen(
+        ["chroma", "run", "--path", os.path.join(data_dir, "chroma_server"), "--host", "127.0.0.1", "--port", str(port)],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    wait_until_up(f"http://127.0.0.1:{port}/api/v2/heartbeat", process)
+    return process, port
+
+
+def start_workers(workers: int, data_dir: str, chroma_port: int, llm_port: int, args) -> tuple:
+    """Serve the benchmark app with uvicorn --workers against a fresh collection and data directory"""
+    run_dir = tempfile.mkdtemp(prefix=f"workers-{workers}-", dir=data_dir)
+    port = free_port()
+    env = dict(
+        os.environ,
+        OPENAI_API_KEY="sk-benchmark",
+        QUERY_CACHE_ENABLED="false",
+        VECTOR_DB_HOST="127.0.0.1",
+        VECTOR_DB_PORT=str(chroma_port),
+        VECTOR_DB_PATH=os.path.join(run_dir, "side_indexes"),
+        COLLECTION_NAME=f"bench_workers_{workers}_{int(time.time())}",
+        JOBS_DB_PATH=os.path.join(run_dir, "jobs.db"),
+        FINGERPRINT_DB_PATH=os.path.join(run_dir, "fingerprints.db"),
+        EMBEDDING_CACHE_PATH=os.path.join(run_dir, "embedding_cache.db"),
+        BM25_SAVE_INTERVAL="1",
+        WRITER_FAILOVER_INTERVAL="0.5",
+        BENCH_LLM_URL=f"http://127.0.0.1:{llm_port}/v1",
+        BENCH_EMBED_LATENCY=str(args.embed_latency)
+    )
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "benchmarks.multiworker_app:app", "--host", "127.0.0.1",
+         "--port", str(port), "--workers", str(workers), "--log-level", "warning"],
+        env=env,
+        stdout=subprocess.DEVNULL
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    wait_until_up(f"{base_url}/api/health", process)
+    return process, base_url
+
+
+def roles(base_url: str, workers: int, timeout: float = 30.0) -> dict:
+    """
+    Map each worker's pid to its ingestion role, as reported by /api/health
+
+    New connections are spread over the worker processes by the kernel, so
+    keep asking until every process has answered.
+    """
+    seen = {}
+    deadline = time.monotonic() + timeout
+    while len(seen) < workers and time.monotonic() < deadline:
+        with httpx.Client(base_url=base_url, timeout=10) as client:
+            ingestion = client.get("/api/health").json().get("ingestion") or {}
+        if ingestion:
+            seen[ingestion['pid']] = ingestion['role']
+    return seen
+
+
+def ingest(base_url: str, product_port: int, pages: int) -> tuple:
+    """Crawl product pages through /api/crawl and wait for the job to finish"""
+    urls = [f"http://127.0.0.1:{product_port}/product/{i}" for i in range(pages)]
+    start = time.perf_counter()
+    with httpx.Client(base_url=base_url, timeout=30) as client:
+        job_id = client.post("/api/crawl", json={"urls": urls}).json()['job_id']
+        while True:
+            job = client.get(f"/api/jobs/{job_id}").json()
+            if job['finished_at'] is not None:
+                return job, time.perf_counter() - start
+            time.sleep(0.1)
+
+
+async def run_load(base_url: str, requests: int, concurrency: int) -> dict:
+    latencies = []
+    empty = 0
+    errors = 0
+    limit = asyncio.Semaphore(concurrency)
+    # One client per slot, so requests reach every worker process
+    clients = [httpx.AsyncClient(base_url=base_url, timeout=300) for _ in range(concurrency)]
+
+    async def one(i: int):
+        nonlocal empty, errors
+        async with limit:
+            client = clients[i % concurrency]
+            start = time.perf_counter()
+            response = await client.post("/api/query", json={"query": f"durable lightweight product feature {i % 50}"})
+            latencies.append(time.perf_counter() - start)
+            if response.status_code != 200:
+                errors += 1
+            elif not response.json()['sources']:
+                empty += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - start
+    for client in clients:
+        await client.aclose()
+
+    latencies.sort()
+    return {
+        'throughput': requests / elapsed,
+        'p50': statistics.median(latencies),
+        'p95': latencies[int(len(latencies) * 0.95) - 1],
+        'empty': empty,
+        'errors': errors
+    }
+
+
+def stop(process: subprocess.Popen):
+    process.send_signal(signal.SIGINT)
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+def failover(base_url: str, workers: int, product_port: int) -> tuple:
+    """Kill the writer process and time until a standby has taken over and ingests"""
+    writer = next(pid for pid, role in roles(base_url, workers).items() if role == "writer")
+    os.kill(writer, signal.SIGKILL)
+    start = time.perf_counter()
+    while True:
+        current = roles(base_url, workers)
+        if "writer" in {role for pid, role in current.items() if pid != writer}:
+            break
+        time.sleep(0.1)
+    takeover = time.perf_counter() - start
+    job, _ = ingest(base_url, product_port, 5)
+    return takeover, job
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--pages", type=int, default=40)
+    parser.add_argument("--llm-latency", type=float, default=0.05)
+    parser.add_argument("--embed-latency", type=float, default=0.02)
+    args = parser.parse_args()
+
+    data_dir = tempfile.mkdtemp(prefix="rag-multiworker-")
+    chroma, chroma_port = start_chroma(data_dir)
+    _, llm_port = start_llm_server(latency=args.llm_latency)
+    _, product_port = start_product_server()
+
+    print(f"{os.cpu_count()} CPU(s), {args.requests} queries at concurrency {args.concurrency}, "
+          f"LLM {args.llm_latency * 1000:.0f} ms, embedding {args.embed_latency * 1000:.0f} ms, "
+          f"{args.pages} pages ingested per run")
+    print(f"{'workers':<9}{'writers':>8}{'standby':>8}{'chunks':>8}{'ingest s':>10}"
+          f"{'req/s':>8}{'p50 ms':>9}{'p95 ms':>9}{'empty':>7}{'errors':>8}")
+    try:
+        for workers in args.workers:
+            server, base_url = start_workers(workers, data_dir, chroma_port, llm_port, args)
+            try:
+                job, ingest_time = ingest(base_url, product_port, args.pages)
+                # Let standby processes pick up the side indexes the writer saved
+                time.sleep(2)
+                seen = list(roles(base_url, workers).values())
+                asyncio.run(run_load(base_url, min(args.requests, 50), args.concurrency))
+                result = asyncio.run(run_load(base_url, args.requests, args.concurrency))
+                print(
+                    f"{workers:<9}{seen.count('writer'):>8}{seen.count('standby'):>8}{job['chunks_created']:>8}"
+                    f"{ingest_time:>10.1f}{result['throughput']:>8.1f}{result['p50'] * 1000:>9.0f}"
+                    f"{result['p95'] * 1000:>9.0f}{result['empty']:>7}{result['errors']:>8}"
+                )
+                if workers == max(args.workers) and workers > 1:
+                    takeover, job = failover(base_url, workers, product_port)
+            finally:
+                stop(server)
+        if max(args.workers) > 1:
+            print(f"\nwriter killed: a standby took over in {takeover:.1f}s and ingested "
+                  f"{job['done'] + job['unchanged']}/{job['total_urls']} URLs of a new job")
+    finally:
+        stop(chroma)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Benchmark price extraction on large product pages
+
+Compares the previous extract_price (four separate regex searches over the
+raw HTML, first pattern wins) with one PRICE_SCANNER pass over the same
+HTML, and with the price engine as it runs inside the streaming extractor:
+JSON-LD, microdata and og:price first, then price-labelled and visible text
+only. Each row shows whether the price found is the product's real price
+rather than a shipping banner.
+
+The engine column is a full page parse (text and all metadata), which the
+crawler does anyway. On the JSON-LD page the price is settled in <head> and
+no text is scanned, so that row is the parse alone; the other rows add the
+text scan on top of it.
+
+Usage:
+    python -m benchmarks.bench_price_extraction --size-mb 1.5 --repeat 5
+"""
+import argparse
+import os
+import re
+import statistics
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+from src.crawler.html_extractor import HTMLExtractor
+from src.crawler.price_extractor import PRICE_SCANNER, parse_price_string
+
+
+# extract_price as it was: each pattern searched over the whole document
+LEGACY_PATTERNS = [
+    r'\$\s*\d+(?:,\d{3})*(?:\.\d{2})?',
+    r'USD\s*\d+(?:,\d{3})*(?:\.\d{2})?',
+    r'₹\s*\d+(?:,\d{3})*(?:\.\d{2})?',
+    r'€\s*\d+(?:,\d{3})*(?:\.\d{2})?',
+]
+
+
+def legacy_extract_price(html_text: str):
+    for pattern in LEGACY_PATTERNS:
+        match = re.search(pattern, html_text)
+        if match:
+            return match.group(0).strip()
+    return None
+
+
+def filler(size: int) -> str:
+    """Review markup and inline data without any currency amounts"""
+    block = (
+        '<div class="review"><h3>Great value</h3><p>Battery lasts all day, the screen is sharp '
+        'and the keyboard is comfortable for long sessions. 4.5 out of 5 stars.</p></div>\n'
+        '<script>window.analytics.push({"event": "impression", "position": 12});</script>\n'
+    )
+    return block * (size // len(block) + 1)
+
+
+def build_pages(size: int):
+    """Large pages of different shapes, with the product's real price"""
+    body = filler(size)
+    return {
+        "JSON-LD, $ banner": (
+            '<html><head><title>Laptop</title>'
+            '<script type="application/ld+json">{"@type": "Product", "name": "Laptop", '
+            '"offers": {"@type": "Offer", "price": "1299.99", "priceCurrency": "USD"}}</script></head>'
+            f'<body><header>Free shipping over $50</header><h1>Laptop</h1>{body}</body></html>',
+            1299.99
+        ),
+        "microdata, euro": (
+            '<html><body><header>Versand ab 4,99 €</header>'
+            f'<div itemscope itemtype="https://schema.org/Product"><h1>Laptop</h1>{body}'
+            '<span itemprop="price" content="899.00">899,00 €</span>'
+            '<meta itemprop="priceCurrency" content="EUR"></div></body></html>',
+            899.0
+        ),
+        "labelled text, rupee": (
+            f'<html><body><h1>Laptop</h1>{body}'
+            '<div class="price">₹ 54,999</div></body></html>',
+            54999.0
+        ),
+        "no price": (
+            f'<html><body><h1>Laptop</h1>{body}</body></html>',
+            None
+        ),
+    }
+
+
+def timed(func, arg, repeat: int):
+    times = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(arg)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--size-mb", type=float, default=1.5)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    extractor = HTMLExtractor()
+    pages = build_pages(int(args.size_mb * 1024 * 1024))
+
+    def scanner(html_text):
+        match = PRICE_SCANNER.search(html_text)
+        return match.group(0) if match else None
+
+    def engine(content):
+        metadata = extractor.extract(content, "https://example.com")['metadata']
+        return metadata.get('price'), metadata.get('price_value')
+
+    def verdict(value, expected):
+        return "ok" if value == expected else "wrong"
+
+    print(f"{'page':<22}{'size':>7}  {'legacy: 4 regexes on HTML':<34}{'PRICE_SCANNER on HTML':<30}{'price engine (full parse)':<34}")
+    for name, (html_text, expected) in pages.items():
+        content = html_text.encode("utf-8")
+        legacy_ms, legacy = timed(legacy_extract_price, html_text, args.repeat)
+        scanner_ms, scanned = timed(scanner, html_text, args.repeat)
+        engine_ms, (price, value) = timed(engine, content, args.repeat)
+
+        legacy_value = parse_price_string(legacy)[0] if legacy else None
+        print(
+            f"{name:<22}{len(content) / 2**20:>5.1f}MB  "
+            f"{legacy_ms:>7.1f} ms {str(legacy):<12}{verdict(legacy_value, expected):<6}"
+            f"{scanner_ms:>7.1f} ms {str(scanned):<12}{'':<8}"
+            f"{engine_ms:>7.1f} ms {str(price):<12}{verdict(value, expected):<6}"
+        )
+
+if __name__ == "__main__":
+    main()
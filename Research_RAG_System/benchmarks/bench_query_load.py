@@ -0,0 +1,97 @@
+"""
+Load test concurrent /api/query throughput against a blocking baseline
+
+The LLM is a local OpenAI-compatible stub server with a fixed response
+latency, reached through the real ChatOpenAI client. The baseline route
+reproduces the previous handler, which called the blocking retrieve() and
+generate() directly from an async endpoint.
+
+Usage:
+    python -m benchmarks.bench_query_load --requests 100 --concurrency 20 --llm-latency 0.5
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+os.environ.setdefault("QUERY_CACHE_ENABLED", "false")
+
+import httpx
+from langchain_openai import ChatOpenAI
+from benchmarks.app_server import install_fakes, seed_products, start_app
+from benchmarks.fakes import CountingEmbeddings
+from benchmarks.stub_server import start_llm_server
+from src.api import dependencies
+from src.models.schemas import QueryRequest
+from main import app
+
+
+@app.post("/bench/query-blocking")
+async def query_blocking(request: QueryRequest):
+    """The previous /api/query: blocking calls made on the event loop"""
+    retriever = dependencies.get_retriever()
+    rag_chain = dependencies.get_rag_chain()
+    docs = retriever.retrieve(request.query, top_k=5, filters=request.filters)
+    return {"answer": rag_chain.generate(request.query, docs)}
+
+
+async def run_load(base_url: str, path: str, requests: int, concurrency: int):
+    latencies = []
+    errors = 0
+    limit = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=300, limits=limits) as client:
+        async def one(i: int):
+            nonlocal errors
+            async with limit:
+                start = time.perf_counter()
+                response = await client.post(path, json={"query": f"Which laptop is best for programming? #{i}"})
+                latencies.append(time.perf_counter() - start)
+                if response.status_code != 200:
+                    errors += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(requests)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "throughput": requests / elapsed,
+        "p50": statistics.median(latencies),
+        "p95": latencies[int(len(latencies) * 0.95) - 1],
+        "errors": errors
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--llm-latency", type=float, default=0.5)
+    parser.add_argument("--embed-latency", type=float, default=0.02)
+    args = parser.parse_args()
+
+    _, llm_port = start_llm_server(latency=args.llm_latency)
+    llm = ChatOpenAI(
+        model="stub",
+        api_key="sk-benchmark",
+        base_url=f"http://127.0.0.1:{llm_port}/v1",
+        max_retries=0
+    )
+    vector_store = install_fakes(app, CountingEmbeddings(call_latency=args.embed_latency), llm)
+    seed_products(vector_store)
+    base_url = start_app(app)
+
+    print(f"{args.requests} requests, concurrency {args.concurrency}, "
+          f"LLM {args.llm_latency * 1000:.0f} ms, embedding {args.embed_latency * 1000:.0f} ms")
+    print(f"{'handler':<24}{'req/s':>8}{'p50 ms':>10}{'p95 ms':>10}{'errors':>8}")
+    for name, path in (("blocking (before)", "/bench/query-blocking"), ("async (after)", "/api/query")):
+        result = asyncio.run(run_load(base_url, path, args.requests, args.concurrency))
+        print(f"{name:<24}{result['throughput']:>8.1f}{result['p50'] * 1000:>10.0f}"
+              f"{result['p95'] * 1000:>10.0f}{result['errors']:>8}")
+
+
+if __name__ == "__main__":
+    main()
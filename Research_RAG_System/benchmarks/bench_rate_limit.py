@@ -0,0 +1,136 @@
+"""
+Benchmark the shared OpenAI rate limiter against a stub server returning 429s
+
+Background ingestion threads embed batches as fast as they can while
+interactive queries (embed the question, then a chat completion) arrive at
+a fixed rate, all against a local OpenAI-compatible stub that enforces
+per-model requests and tokens per minute. Queries share the embedding
+model's budget with ingestion, as in the app.
+
+Runs the workload three ways: without the limiter (the OpenAI client's own
+retries only), with the limiter but no priorities, and with ingestion at
+background priority. Reports 429s, ingestion throughput and failures, and
+interactive latency and failures.
+
+Usage:
+    python -m benchmarks.bench_rate_limit --duration 15 --ingest-threads 8 --rpm 600 --tpm 600000
+"""
+import argparse
+import asyncio
+import contextlib
+import threading
+import time
+
+import httpx
+from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+from benchmarks.bench_embeddings import build_texts, percentile
+from benchmarks.stub_server import start_rate_limited_openai_server
+from src.utils.rate_limiter import AsyncRateLimitedTransport, RateLimitedTransport, RateLimiter, background_priority
+
+
+def make_clients(port: int, limiter):
+    """Embeddings and chat clients for the stub, through the limiter if given"""
+    options = dict(api_key="sk-benchmark", base_url=f"http://127.0.0.1:{port}/v1")
+    if limiter is not None:
+        options['http_client'] = httpx.Client(transport=RateLimitedTransport(limiter))
+        options['http_async_client'] = httpx.AsyncClient(transport=AsyncRateLimitedTransport(limiter))
+    embeddings = OpenAIEmbeddings(model="stub-embed", check_embedding_ctx_length=False, **options)
+    chat = ChatOpenAI(model="stub-chat", **options)
+    return embeddings, chat
+
+
+def run(args, limiter, prioritize: bool):
+    server, port = start_rate_limited_openai_server(args.rpm, args.tpm, latency=args.latency)
+    embeddings, chat = make_clients(port, limiter)
+    texts, _ = build_texts(args.batch_size * 4)
+    deadline = time.monotonic() + args.duration
+    ingested = [0, 0]  # texts embedded, failed batches
+    lock = threading.Lock()
+
+    def ingest(offset: int):
+        priority = background_priority() if prioritize else contextlib.nullcontext()
+        with priority:
+            i = offset
+            while time.monotonic() < deadline:
+                batch = texts[i % len(texts):i % len(texts) + args.batch_size] or texts[:args.batch_size]
+                i += args.batch_size
+                try:
+                    embeddings.embed_documents(batch)
+                    with lock:
+                        ingested[0] += len(batch)
+                except Exception:
+                    with lock:
+                        ingested[1] += 1
+
+    async def queries():
+        latencies = []
+        failures = 0
+
+        async def one(i: int):
+            nonlocal failures
+            start = time.perf_counter()
+            try:
+                await embeddings.aembed_query(f"Which laptop is best for programming? #{i}")
+                await chat.ainvoke(f"Which laptop is best for programming? #{i}")
+                latencies.append(time.perf_counter() - start)
+            except Exception:
+                failures += 1
+
+        tasks = []
+        i = 0
+        while time.monotonic() < deadline:
+            tasks.append(asyncio.create_task(one(i)))
+            i += 1
+            await asyncio.sleep(args.query_interval)
+        await asyncio.gather(*tasks)
+        return latencies, failures
+
+    threads = [threading.Thread(target=ingest, args=(t * args.batch_size,)) for t in range(args.ingest_threads)]
+    for thread in threads:
+        thread.start()
+    latencies, failures = asyncio.run(queries())
+    for thread in threads:
+        thread.join()
+    server.shutdown()
+
+    return {
+        'throttled': server.throttled_total,
+        'ingest_rate': ingested[0] / args.duration,
+        'ingest_failures': ingested[1],
+        'p50': percentile(latencies, 0.5) if latencies else float('nan'),
+        'p95': percentile(latencies, 0.95) if latencies else float('nan'),
+        'query_failures': failures,
+        'queries': len(latencies) + failures
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--duration", type=float, default=15.0)
+    parser.add_argument("--ingest-threads", type=int, default=8)
+    parser.add_argument("--batch-size", type=int, default=20)
+    parser.add_argument("--query-interval", type=float, default=0.5)
+    parser.add_argument("--rpm", type=int, default=600)
+    parser.add_argument("--tpm", type=int, default=600000)
+    parser.add_argument("--latency", type=float, default=0.05)
+    args = parser.parse_args()
+
+    print(f"{args.duration:.0f}s, {args.ingest_threads} ingestion threads x {args.batch_size} texts, "
+          f"a query every {args.query_interval * 1000:.0f} ms, limits {args.rpm} RPM / {args.tpm} TPM per model")
+    print(f"{'mode':<28}{'429s':>7}{'texts/s':>9}{'ingest fails':>14}{'query p50 ms':>14}{'p95 ms':>9}{'query fails':>13}")
+    modes = [
+        ("no limiter", None, False),
+        ("limiter, no priorities", RateLimiter(), False),
+        ("limiter, ingest background", RateLimiter(), True),
+    ]
+    for name, limiter, prioritize in modes:
+        result = run(args, limiter, prioritize)
+        print(
+            f"{name:<28}{result['throttled']:>7}{result['ingest_rate']:>9.0f}{result['ingest_failures']:>14}"
+            f"{result['p50'] * 1000:>14.0f}{result['p95'] * 1000:>9.0f}"
+            f"{result['query_failures']:>8}/{result['queries']:<4}"
+        )
+
+
+if __name__ == "__main__":
+    main()
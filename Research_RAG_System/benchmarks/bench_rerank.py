@@ -0,0 +1,113 @@
+"""
+Benchmark re-ranking latency against the generation context it saves
+
+Builds retrieval candidate lists for synthetic product queries: 30 chunks
+per query in a noisy retrieval order, of which a few belong to the queried
+product. Without a re-ranker the top 5 go to the LLM; with one, all 30 are
+re-scored and the best that pass the score threshold and fit the token
+budget are kept. Reports re-rank latency (p50/p99), how many of the kept
+chunks are relevant, and the context tokens RAGChain would send.
+
+Pass --cross-encoder with a local ONNX cross-encoder directory (model.onnx
+and tokenizer.json, e.g. an exported ms-marco-MiniLM-L-6-v2) to include it.
+
+Usage:
+    python -m benchmarks.bench_rerank --queries 50 --cross-encoder ./models/ms-marco-MiniLM-L-6-v2
+"""
+import argparse
+import os
+import random
+import statistics
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+from benchmarks.bench_embeddings import build_texts, percentile
+from src.generation.rag_chain import RAGChain
+from src.processing.tokens import count_tokens
+from src.retrieval.reranker import CrossEncoderReranker, TermOverlapReranker
+
+
+PRODUCTS = [
+    "Acme Ultrabook 14 laptop", "Zen noise cancelling headphones", "Volt electric toothbrush",
+    "Orbit robot vacuum", "Nimbus trail running shoes", "Atlas standing desk",
+    "Pixel mirrorless camera", "Brew espresso machine", "Glide office chair", "Pulse fitness tracker"
+]
+
+
+def build_queries(count: int, candidates: int, relevant: int, seed: int = 0):
+    """(query, candidates, relevant IDs) with relevant chunks scattered through the ranking"""
+    rng = random.Random(seed)
+    texts, _ = build_texts(candidates * 4)
+    queries = []
+    for q in range(count):
+        product = PRODUCTS[q % len(PRODUCTS)]
+        others = [p for p in PRODUCTS if p != product]
+        titles = [product] * relevant + [rng.choice(others) for _ in range(candidates - relevant)]
+        rng.shuffle(titles)
+        docs = [
+            {
+                'id': f"{q}-{i}",
+                'content': rng.choice(texts),
+                'metadata': {'title': title, 'url': f"https://example.com/{q}/{i}"},
+                'score': 1.0 / (61 + i)
+            }
+            for i, title in enumerate(titles)
+        ]
+        relevant_ids = {doc['id'] for doc in docs if doc['metadata']['title'] == product}
+        queries.append((f"{product.split()[-1]} {product.split()[0]} with good battery and warranty", docs, relevant_ids))
+    return queries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--candidates", type=int, default=30)
+    parser.add_argument("--relevant", type=int, default=4)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--token-budget", type=int, default=1500)
+    parser.add_argument("--timeout", type=float, default=0.3)
+    parser.add_argument("--cross-encoder", default=None)
+    args = parser.parse_args()
+
+    queries = build_queries(args.queries, args.candidates, args.relevant)
+    chain = RAGChain()
+
+    runs = [
+        ("no re-ranking", None, {}),
+        ("lexical", TermOverlapReranker(timeout=args.timeout), {}),
+        ("lexical, min score 0.5", TermOverlapReranker(timeout=args.timeout), {'min_score': 0.5}),
+    ]
+    if args.cross_encoder:
+        runs.append(("cross-encoder", CrossEncoderReranker(args.cross_encoder, timeout=args.timeout), {}))
+        runs.append(("cross-encoder, no timeout", CrossEncoderReranker(args.cross_encoder, timeout=60.0), {}))
+
+    print(
+        f"{args.queries} queries, {args.candidates} candidates, {args.relevant} relevant, "
+        f"top {args.top_k}, token budget {args.token_budget}, timeout {args.timeout}s"
+    )
+    print(f"{'re-ranker':<28}{'p50 ms':>8}{'p99 ms':>8}{'docs':>6}{'relevant':>10}{'context tokens':>16}{'timeouts':>10}")
+    for name, reranker, options in runs:
+        latencies = []
+        kept_counts = []
+        precision = []
+        tokens = []
+        for query, docs, relevant_ids in queries:
+            start = time.perf_counter()
+            if reranker is None:
+                kept = docs[:args.top_k]
+            else:
+                kept = reranker.rerank(query, docs, args.top_k, token_budget=args.token_budget, **options)
+            latencies.append(time.perf_counter() - start)
+            kept_counts.append(len(kept))
+            precision.append(sum(doc['id'] in relevant_ids for doc in kept) / len(kept))
+            tokens.append(count_tokens(chain._format_context(kept)))
+        print(
+            f"{name:<28}{statistics.median(latencies) * 1000:>8.1f}{percentile(latencies, 0.99) * 1000:>8.1f}"
+            f"{statistics.mean(kept_counts):>6.1f}{statistics.mean(precision):>10.2f}{statistics.mean(tokens):>16.0f}"
+            f"{(reranker.timeouts if reranker else 0):>10}"
+        )
+
+
+if __name__ == "__main__":
+    main()
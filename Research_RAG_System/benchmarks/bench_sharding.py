@@ -0,0 +1,108 @@
+"""
+Benchmark dense search latency and recall as the corpus is split into more shards
+
+Stores the same synthetic clustered embeddings in an in-memory Chroma client
+sharded by domain into 1, 2, 4, ... collections (chunks spread evenly over
+the domains), then times searches that scatter to every shard and merge
+their top-k, and searches routed to the one shard a query names. Recall is
+measured against exact brute-force neighbours over the whole corpus for
+scattered searches and over the shard for routed ones. Build time is the
+time to upsert and index every chunk.
+
+Usage:
+    python -m benchmarks.bench_sharding --vectors 20000 --dimensions 384 --queries 200 --shards 1,2,4,8,16
+"""
+import argparse
+import os
+import statistics
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+import chromadb
+import numpy as np
+from chromadb.config import Settings as ChromaSettings
+from benchmarks.bench_ann import FixedEmbeddings, build_embeddings, recall
+from benchmarks.bench_embeddings import percentile
+from src.config.settings import settings
+from src.vectorstore.chroma_store import ChromaVectorStore
+from src.vectorstore.quantized_index import distances
+
+
+def domain(shard: int) -> str:
+    return f"shop{shard}.example.com"
+
+
+def timed(search, queries, k):
+    """Per-query latencies in milliseconds and the returned IDs"""
+    latencies = []
+    found = []
+    for i, query in enumerate(queries):
+        start = time.perf_counter()
+        results = search(i, query.tolist(), k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        found.append([result['id'] for result in results])
+    return latencies, found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--vectors", type=int, default=20000)
+    parser.add_argument("--dimensions", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--shards", default="1,2,4,8,16")
+    args = parser.parse_args()
+
+    vectors = build_embeddings(args.vectors + args.queries, args.dimensions)
+    vectors, queries = vectors[:args.vectors], vectors[args.vectors:]
+    ids = [f"chunk-{i}" for i in range(args.vectors)]
+    exact = [np.argsort(distances(settings.hnsw_space, query, vectors)) for query in queries]
+    truth = [[ids[i] for i in order[:args.k]] for order in exact]
+
+    settings.bm25_enabled = False
+    settings.quantized_index = None
+    settings.shard_by = "domain"
+    client = chromadb.EphemeralClient(ChromaSettings(anonymized_telemetry=False))
+
+    print(f"{args.vectors} x {args.dimensions}-d vectors, {args.queries} queries, recall@{args.k}, "
+          f"ef_search {settings.hnsw_ef_search}, {os.cpu_count()} CPU(s), {settings.shard_search_workers} scatter threads")
+    print(f"{'shards':<8}{'build s':>9}{'all p50 ms':>12}{'p95 ms':>9}{'recall':>8}"
+          f"{'routed p50 ms':>15}{'p95 ms':>9}{'recall':>8}")
+    for count in (int(s) for s in args.shards.split(",")):
+        settings.collection_name = f"bench_shards_{count}"
+        store = ChromaVectorStore(embeddings=FixedEmbeddings(), client=client)
+        shard_of = [i % count for i in range(args.vectors)]
+
+        start = time.perf_counter()
+        batch_size = store.max_write_batch_size()
+        for offset in range(0, args.vectors, batch_size):
+            end = min(offset + batch_size, args.vectors)
+            store.upsert_embeddings(
+                ids[offset:end],
+                ["" for _ in range(offset, end)],
+                vectors[offset:end].tolist(),
+                [{'url': f"https://{domain(shard_of[i])}/product/{i}"} for i in range(offset, end)]
+            )
+        build = time.perf_counter() - start
+
+        # Every shard, merged
+        latencies, found = timed(lambda i, query, k: store.search_by_vector(query, k), queries, args.k)
+        everywhere = (statistics.median(latencies), percentile(latencies, 0.95), recall(found, truth, args.k))
+
+        # Query i names shard i % count
+        routed_truth = [
+            [ids[j] for j in order if shard_of[j] == i % count][:args.k]
+            for i, order in enumerate(exact)
+        ]
+        latencies, found = timed(
+            lambda i, query, k: store.search_by_vector(query, k, shards=[domain(i % count)]), queries, args.k
+        )
+        routed = (statistics.median(latencies), percentile(latencies, 0.95), recall(found, routed_truth, args.k))
+
+        print(f"{count:<8}{build:>9.1f}{everywhere[0]:>12.2f}{everywhere[1]:>9.2f}{everywhere[2]:>8.3f}"
+              f"{routed[0]:>15.2f}{routed[1]:>9.2f}{routed[2]:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
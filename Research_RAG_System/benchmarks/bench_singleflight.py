@@ -0,0 +1,88 @@
+"""
+Benchmark request coalescing for identical concurrent /api/query requests
+
+Sends bursts of identical queries (query cache off) against fake models
+with a slow LLM, with single-flight enabled and disabled, and reports how
+many embedding and LLM calls the burst caused and its latency. A failing
+burst checks that one LLM error reaches every coalesced request.
+
+Usage:
+    python -m benchmarks.bench_singleflight --concurrency 50 --llm-delay 0.5
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+os.environ.setdefault("QUERY_CACHE_ENABLED", "false")
+
+import httpx
+from benchmarks.app_server import install_fakes, seed_products, start_app
+from benchmarks.fakes import CountingEmbeddings, SlowChatModel
+from src.config.settings import settings
+from main import app
+
+
+class FailingChatModel(SlowChatModel):
+    """Slow fake chat model whose calls fail"""
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        super()._generate(messages, stop, run_manager, **kwargs)
+        raise RuntimeError("upstream unavailable")
+
+
+async def burst(base_url: str, concurrency: int, query: str):
+    """Send concurrency identical queries at once"""
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=60, limits=limits) as client:
+        async def one():
+            start = time.perf_counter()
+            response = await client.post("/api/query", json={"query": query})
+            return response.status_code, time.perf_counter() - start
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*(one() for _ in range(concurrency)))
+        return results, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--llm-delay", type=float, default=0.5)
+    parser.add_argument("--embed-latency", type=float, default=0.05)
+    args = parser.parse_args()
+
+    llm = SlowChatModel(first_token_delay=args.llm_delay, token_delay=0.0)
+    embeddings = CountingEmbeddings(call_latency=args.embed_latency)
+    vector_store = install_fakes(app, embeddings, llm)
+    seed_products(vector_store)
+    base_url = start_app(app)
+
+    print(f"{args.concurrency} identical concurrent requests, LLM {args.llm_delay * 1000:.0f} ms, "
+          f"embedding {args.embed_latency * 1000:.0f} ms")
+    print(f"{'single-flight':<16}{'LLM calls':>10}{'embed calls':>12}{'ok':>6}{'p50 ms':>10}{'burst ms':>10}")
+    for round_number, enabled in enumerate((False, True)):
+        settings.single_flight_enabled = enabled
+        llm.calls = 0
+        embeddings.calls = 0
+        query = f"Which laptop is best for programming? round {round_number}"
+        results, elapsed = asyncio.run(burst(base_url, args.concurrency, query))
+        ok = sum(status == 200 for status, _ in results)
+        print(
+            f"{'on' if enabled else 'off':<16}{llm.calls:>10}{embeddings.calls:>12}{ok:>6}"
+            f"{statistics.median(latency for _, latency in results) * 1000:>10.0f}{elapsed * 1000:>10.0f}"
+        )
+
+    # One upstream failure is reported to every request that shared it
+    settings.single_flight_enabled = True
+    failing = FailingChatModel(first_token_delay=args.llm_delay, token_delay=0.0)
+    from src.api import dependencies
+    dependencies.get_rag_chain().llm = failing
+    results, _ = asyncio.run(burst(base_url, args.concurrency, "Which laptop is best for travel?"))
+    statuses = sorted({status for status, _ in results})
+    print(f"\nfailing LLM: {failing.calls} call(s), response statuses {statuses}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmark time-to-first-token of /api/query/stream against /api/query
+
+A local fake chat model yields answer tokens with delays, so the numbers
+isolate how soon each endpoint lets the client see output.
+
+Usage:
+    python -m benchmarks.bench_streaming --requests 10
+"""
+import argparse
+import os
+import statistics
+import time
+
+os.environ.setdefault("QUERY_CACHE_ENABLED", "false")
+
+import httpx
+from benchmarks.app_server import install_fakes, seed_products, start_app
+from benchmarks.fakes import CountingEmbeddings, SlowChatModel
+from main import app
+
+
+def time_blocking(client: httpx.Client, query: str):
+    start = time.perf_counter()
+    with client.stream("POST", "/api/query", json={"query": query}) as response:
+        first = None
+        for _ in response.iter_bytes():
+            first = first or time.perf_counter() - start
+    return first, time.perf_counter() - start
+
+
+def time_streaming(client: httpx.Client, query: str):
+    start = time.perf_counter()
+    sources_at = token_at = None
+    with client.stream("POST", "/api/query/stream", json={"query": query}) as response:
+        for line in response.iter_lines():
+            if sources_at is None and '"sources"' in line:
+                sources_at = time.perf_counter() - start
+            if token_at is None and '"token"' in line:
+                token_at = time.perf_counter() - start
+    return sources_at, token_at, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=10)
+    parser.add_argument("--first-token-delay", type=float, default=0.3)
+    parser.add_argument("--token-delay", type=float, default=0.03)
+    parser.add_argument("--tokens", type=int, default=60)
+    args = parser.parse_args()
+
+    llm = SlowChatModel(
+        tokens=[f"token{i} " for i in range(args.tokens)],
+        first_token_delay=args.first_token_delay,
+        token_delay=args.token_delay
+    )
+    vector_store = install_fakes(app, CountingEmbeddings(), llm)
+    seed_products(vector_store)
+    base_url = start_app(app)
+
+    query = "Which laptop is best for programming?"
+    with httpx.Client(base_url=base_url, timeout=60) as client:
+        blocking = [time_blocking(client, query) for _ in range(args.requests)]
+        streaming = [time_streaming(client, query) for _ in range(args.requests)]
+
+    def ms(values):
+        return f"{statistics.median(values) * 1000:>10.0f}"
+
+    print(f"{args.tokens} tokens, {args.first_token_delay * 1000:.0f} ms to first token, "
+          f"{args.token_delay * 1000:.0f} ms per token (median of {args.requests})")
+    print(f"{'endpoint':<20}{'sources ms':>12}{'1st token ms':>14}{'total ms':>10}")
+    print(f"{'/api/query':<20}{ms([b[0] for b in blocking]):>12}{ms([b[0] for b in blocking]):>14}{ms([b[1] for b in blocking])}")
+    print(f"{'/api/query/stream':<20}{ms([s[0] for s in streaming]):>12}{ms([s[1] for s in streaming]):>14}{ms([s[2] for s in streaming])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Microbenchmark TextCleaner.clean against the previous three-pass cleaner
+
+Runs both cleaners over texts from 1 KB to 10 MB in two shapes: extracted
+page text as the crawler produces it (single-spaced, mostly ASCII), and
+messy text full of whitespace runs, symbols, ellipses and non-ASCII
+characters. Every output is checked to be identical to the previous
+cleaner's; timings are the best of --repeat runs.
+
+Usage:
+    python -m benchmarks.bench_text_cleaner --repeat 5
+"""
+import argparse
+import os
+import random
+import re
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+from src.processing.text_cleaner import TextCleaner
+
+
+SIZES = [1024, 10 * 1024, 100 * 1024, 1024 ** 2, 10 * 1024 ** 2]
+
+PAGE_WORDS = (
+    "Product 42 | Example Shop Product 42 is a dependable laptop. It ships in 2-3 days. "
+    "Spec 7 512 units Review 3 Solid product, works as described. Would buy again & recommend. "
+    "Rating 4/5 $1,299.99 Free shipping over $50"
+).split(" ")
+
+MESSY_WORDS = (
+    "Don't miss: 50% off!!  Price — €1.299,00 (was ₹ 1,49,999)... ★★★★☆ \"great\" & fast\n\n"
+    "Specs:\t16GB/512GB   naïve café Größe 東京 ™ ® © 🚀 ...wait.... <b>bold</b> #1 @shop\r\n"
+).split(" ")
+
+
+def previous_clean(text: str) -> str:
+    """TextCleaner.clean before the single-pass rewrite"""
+    if not text:
+        return ""
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'[^\w\s.,!?;:()\-$€₹£¥]', '', text)
+    text = re.sub(r'\.{2,}', '.', text)
+    text = text.strip()
+    return text
+
+
+def make_text(words, size: int, rng: random.Random) -> str:
+    parts = []
+    length = 0
+    while length < size:
+        word = rng.choice(words)
+        parts.append(word)
+        length += len(word) + 1
+    return " ".join(parts)[:size]
+
+
+def best_time(func, text: str, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def format_size(size: int) -> str:
+    return f"{size // 1024 ** 2} MB" if size >= 1024 ** 2 else f"{size // 1024} KB"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"{'text':<8}{'size':>7}{'previous ms':>14}{'fused ms':>11}{'speedup':>9}{'fused MB/s':>12}  identical")
+    for shape, words in (("page", PAGE_WORDS), ("messy", MESSY_WORDS)):
+        for size in SIZES:
+            text = make_text(words, size, rng)
+            identical = TextCleaner.clean(text) == previous_clean(text)
+            previous = best_time(previous_clean, text, args.repeat)
+            fused = best_time(TextCleaner.clean, text, args.repeat)
+            print(
+                f"{shape:<8}{format_size(size):>7}{previous * 1000:>14.3f}{fused * 1000:>11.3f}"
+                f"{previous / fused:>9.2f}{size / 2**20 / fused:>12.1f}  {identical}"
+            )
+
+
+if __name__ == "__main__":
+    main()
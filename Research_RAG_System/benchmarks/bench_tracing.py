@@ -0,0 +1,90 @@
+"""
+Benchmark the cost of request tracing and show the stage breakdown it reports
+
+Measures the per-span overhead with tracing enabled and disabled, then
+sends sequential /api/query requests against fake models (query cache off)
+with tracing toggled between runs, and prints the Server-Timing header of
+the last traced request and the per-stage means from /metrics.
+
+Usage:
+    python -m benchmarks.bench_tracing --requests 200 --llm-delay 0.0
+"""
+import argparse
+import os
+import re
+import statistics
+import time
+
+os.environ.setdefault("QUERY_CACHE_ENABLED", "false")
+
+import httpx
+from benchmarks.app_server import install_fakes, seed_products, start_app
+from benchmarks.bench_embeddings import percentile
+from benchmarks.fakes import CountingEmbeddings, SlowChatModel
+from src.config.settings import settings
+from src.observability.tracing import metrics, span
+from main import app
+
+
+def span_overhead(iterations: int) -> float:
+    """Mean cost in microseconds of one span with an attribute"""
+    start = time.perf_counter()
+    for i in range(iterations):
+        with span("bench.span", results=i) as s:
+            s.set(tokens=i)
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def run_queries(client: httpx.Client, requests: int):
+    latencies = []
+    response = None
+    for i in range(requests):
+        start = time.perf_counter()
+        response = client.post("/api/query", json={"query": f"Which laptop is best for programming? #{i}"})
+        latencies.append(time.perf_counter() - start)
+        response.raise_for_status()
+    return latencies, response
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--iterations", type=int, default=200000)
+    parser.add_argument("--llm-delay", type=float, default=0.0)
+    args = parser.parse_args()
+
+    print(f"{'span overhead':<24}{'us/span':>10}")
+    for enabled in (False, True):
+        settings.tracing_enabled = enabled
+        print(f"{'enabled' if enabled else 'disabled':<24}{span_overhead(args.iterations):>10.2f}")
+    metrics.reset()
+
+    llm = SlowChatModel(first_token_delay=args.llm_delay, token_delay=0.0)
+    vector_store = install_fakes(app, CountingEmbeddings(), llm)
+    seed_products(vector_store)
+    base_url = start_app(app)
+
+    print(f"\n{args.requests} sequential /api/query requests, LLM delay {args.llm_delay * 1000:.0f} ms")
+    print(f"{'tracing':<24}{'p50 ms':>10}{'p99 ms':>10}")
+    with httpx.Client(base_url=base_url, timeout=60) as client:
+        # Warm up connections, caches and lazy imports
+        run_queries(client, 10)
+        metrics.reset()
+        for enabled in (False, True, False, True):
+            settings.tracing_enabled = enabled
+            latencies, response = run_queries(client, args.requests)
+            print(
+                f"{'enabled' if enabled else 'disabled':<24}{statistics.median(latencies) * 1000:>10.2f}"
+                f"{percentile(latencies, 0.99) * 1000:>10.2f}"
+            )
+        rendered = client.get("/metrics").text
+
+    print(f"\nServer-Timing: {response.headers.get('server-timing')}")
+    print(f"\n{'stage':<32}{'count':>8}{'mean ms':>10}")
+    totals = dict(re.findall(r'_duration_seconds_sum\{stage="([^"]+)"\} (\S+)', rendered))
+    for stage, count in re.findall(r'_duration_seconds_count\{stage="([^"]+)"\} (\S+)', rendered):
+        print(f"{stage:<32}{int(count):>8}{float(totals[stage]) / int(count) * 1000:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
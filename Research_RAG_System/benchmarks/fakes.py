@@ -0,0 +1,63 @@
+"""Fake model clients used by the benchmarks"""
+import hashlib
+import threading
+import time
+from typing import Iterator, List
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+
+class CountingEmbeddings(Embeddings):
+    """Deterministic fake embeddings that count calls and simulate latency"""
+
+    def __init__(self, dimensions: int = 64, call_latency: float = 0.0, per_text_latency: float = 0.0):
+        self.dimensions = dimensions
+        self.call_latency = call_latency
+        self.per_text_latency = per_text_latency
+        self.calls = 0
+        self.texts = 0
+        self._lock = threading.Lock()
+
+    def _vector(self, text: str) -> List[float]:
+        digest = hashlib.sha256(text.encode("utf-8")).digest()
+        raw = (digest * (self.dimensions // len(digest) + 1))[:self.dimensions]
+        return [b / 255.0 for b in raw]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        with self._lock:
+            self.calls += 1
+            self.texts += len(texts)
+        time.sleep(self.call_latency + self.per_text_latency * len(texts))
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+class SlowChatModel(BaseChatModel):
+    """Fake chat model that produces a fixed answer one token at a time"""
+
+    tokens: List[str] = ["This ", "laptop ", "is ", "a ", "good ", "choice ", "for ", "programming."]
+    first_token_delay: float = 0.2
+    token_delay: float = 0.05
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "slow-fake"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        self.calls += 1
+        time.sleep(self.first_token_delay + self.token_delay * len(self.tokens))
+        message = AIMessage(content="".join(self.tokens))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs) -> Iterator[ChatGenerationChunk]:
+        self.calls += 1
+        time.sleep(self.first_token_delay)
+        for i, token in enumerate(self.tokens):
+            if i:
+                time.sleep(self.token_delay)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
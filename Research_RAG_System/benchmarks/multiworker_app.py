@@ -0,0 +1,22 @@
+"""
+App served by each `uvicorn --workers` process in bench_multiworker
+
+Fake embeddings and a stub OpenAI-compatible LLM, with chunks stored on the
+Chroma server named by VECTOR_DB_HOST/VECTOR_DB_PORT. The benchmark sets
+the paths, ports and latencies through the environment.
+"""
+import os
+
+from langchain_openai import ChatOpenAI
+from benchmarks.app_server import install_fakes
+from benchmarks.fakes import CountingEmbeddings
+from main import app
+
+llm = ChatOpenAI(
+    model="stub",
+    api_key="sk-benchmark",
+    base_url=os.environ["BENCH_LLM_URL"],
+    max_retries=0
+)
+embeddings = CountingEmbeddings(call_latency=float(os.environ.get("BENCH_EMBED_LATENCY", "0.02")))
+install_fakes(app, embeddings, llm, in_memory=False)
@@ -0,0 +1,267 @@
+"""Local HTTP servers used by the benchmarks"""
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Tuple
+
+
+def product_page(path: str, paragraphs: int = 20) -> str:
+    """Build a synthetic product page"""
+    body = "\n".join(
+        f"<p>Feature {i} of product {path}: durable, lightweight and well reviewed.</p>"
+        for i in range(paragraphs)
+    )
+    return f"""<!DOCTYPE html>
+<html>
+<head>
+  <title>Product {path}</title>
+  <meta property="og:title" content="Product {path}">
+  <meta name="description" content="Synthetic product page {path}">
+  <meta name="keywords" content="benchmark, synthetic, product">
+  <style>body {{ font-family: sans-serif; }}</style>
+</head>
+<body>
+  <header><nav>Home | Shop | Cart</nav></header>
+  <h1>Product {path}</h1>
+  <span class="price">$49.99</span>
+  {body}
+  <script>var tracking = "{path}";</script>
+  <footer>Shipping from $4.99</footer>
+</body>
+</html>"""
+
+
+def start_product_server(latency: float = 0.0, paragraphs: int = 20) -> Tuple[ThreadingHTTPServer, int]:
+    """
+    Serve synthetic product pages on all local interfaces
+
+    Args:
+        latency: Seconds to wait before answering each request
+        paragraphs: Number of paragraphs per page
+
+    Returns:
+        The running server and the port it listens on
+    """
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            if latency:
+                time.sleep(latency)
+            payload = product_page(self.path, paragraphs).encode("utf-8")
+            etag = '"' + hashlib.md5(payload).hexdigest() + '"'
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, server.server_address[1]
+
+
+class _LoadTestHTTPServer(ThreadingHTTPServer):
+    """Threading server with a listen backlog deep enough for load tests"""
+
+    daemon_threads = True
+    request_queue_size = 128
+
+
+def start_llm_server(latency: float = 0.5, answer: str = "This laptop is a good choice for programming.") -> Tuple[ThreadingHTTPServer, int]:
+    """
+    Serve a minimal OpenAI-compatible chat completions API
+
+    Point ChatOpenAI at it with base_url=f"http://127.0.0.1:{port}/v1".
+
+    Args:
+        latency: Seconds to wait before answering each request
+        answer: Answer text returned for every request
+
+    Returns:
+        The running server and the port it listens on
+    """
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            if latency:
+                time.sleep(latency)
+
+            if body.get("stream"):
+                self._stream(body)
+                return
+
+            payload = json.dumps({
+                "id": "chatcmpl-stub",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body.get("model", "stub"),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": answer},
+                    "finish_reason": "stop"
+                }],
+                "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+            }).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _stream(self, body):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            for word in answer.split(" "):
+                chunk = {
+                    "id": "chatcmpl-stub",
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": body.get("model", "stub"),
+                    "choices": [{"index": 0, "delta": {"content": word + " "}, "finish_reason": None}]
+                }
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.close_connection = True
+
+        def log_message(self, format, *args):
+            pass
+
+    server = _LoadTestHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, server.server_address[1]
+
+
+class _RateLimitedOpenAIServer(_LoadTestHTTPServer):
+    """OpenAI-compatible stub that enforces per-model rate limits"""
+
+    requests_total = 0
+    throttled_total = 0
+
+
+def start_rate_limited_openai_server(
+    requests_per_minute: int = 600,
+    tokens_per_minute: int = 200000,
+    latency: float = 0.05,
+    dimensions: int = 64,
+    answer: str = "This laptop is a good choice for programming."
+) -> Tuple[_RateLimitedOpenAIServer, int]:
+    """
+    Serve chat completions and embeddings with OpenAI-style rate limits
+
+    Each model has its own requests and tokens per minute budget, refilled
+    continuously. Requests over budget get a 429 with retry-after-ms; every
+    response carries the x-ratelimit-* headers. Tokens are estimated at four
+    characters per token.
+
+    Returns:
+        The running server (with requests_total and throttled_total counters)
+        and the port it listens on
+    """
+    lock = threading.Lock()
+    budgets = {}
+
+    def admit(model: str, tokens: int):
+        """(admitted, headers) for a request, taking its budget if admitted"""
+        now = time.monotonic()
+        with lock:
+            state = budgets.setdefault(model, {'requests': requests_per_minute, 'tokens': tokens_per_minute, 'at': now})
+            elapsed = now - state['at']
+            state['requests'] = min(requests_per_minute, state['requests'] + elapsed * requests_per_minute / 60)
+            state['tokens'] = min(tokens_per_minute, state['tokens'] + elapsed * tokens_per_minute / 60)
+            state['at'] = now
+            admitted = state['requests'] >= 1 and state['tokens'] >= min(tokens, tokens_per_minute)
+            if admitted:
+                state['requests'] -= 1
+                state['tokens'] -= tokens
+            wait = max(
+                (1 - state['requests']) * 60 / requests_per_minute,
+                (min(tokens, tokens_per_minute) - state['tokens']) * 60 / tokens_per_minute,
+                0
+            )
+            headers = {
+                'x-ratelimit-limit-requests': str(requests_per_minute),
+                'x-ratelimit-remaining-requests': str(max(int(state['requests']), 0)),
+                'x-ratelimit-reset-requests': f"{max(requests_per_minute - state['requests'], 0) * 60 / requests_per_minute:.3f}s",
+                'x-ratelimit-limit-tokens': str(tokens_per_minute),
+                'x-ratelimit-remaining-tokens': str(max(int(state['tokens']), 0)),
+                'x-ratelimit-reset-tokens': f"{max(tokens_per_minute - state['tokens'], 0) * 60 / tokens_per_minute:.3f}s",
+            }
+            if not admitted:
+                headers['retry-after-ms'] = str(int(wait * 1000) + 1)
+            server.requests_total += 1
+            server.throttled_total += 0 if admitted else 1
+        return admitted, headers
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            model = body.get("model", "stub")
+            if self.path.endswith("/embeddings"):
+                inputs = body.get("input") or []
+                inputs = [inputs] if isinstance(inputs, str) else inputs
+                tokens = sum(len(item) // 4 if isinstance(item, str) else len(item) for item in inputs)
+            else:
+                tokens = sum(len(str(message.get("content", ""))) // 4 for message in body.get("messages", []))
+                tokens += body.get("max_completion_tokens") or body.get("max_tokens") or 0
+
+            admitted, headers = admit(model, tokens)
+            if not admitted:
+                self._send(429, {"error": {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}}, headers)
+                return
+
+            if latency:
+                time.sleep(latency)
+            if self.path.endswith("/embeddings"):
+                data = [
+                    {"object": "embedding", "index": i, "embedding": [((i + j) % 7) / 7.0 for j in range(dimensions)]}
+                    for i in range(len(inputs))
+                ]
+                payload = {"object": "list", "data": data, "model": model, "usage": {"prompt_tokens": tokens, "total_tokens": tokens}}
+            else:
+                payload = {
+                    "id": "chatcmpl-stub",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": answer}, "finish_reason": "stop"}],
+                    "usage": {"prompt_tokens": tokens, "completion_tokens": 10, "total_tokens": tokens + 10}
+                }
+            self._send(200, payload, headers)
+
+        def _send(self, status: int, payload, headers):
+            data = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = _RateLimitedOpenAIServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, server.server_address[1]
@@ -1,13 +1,43 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from src.api.routes import router
+from src.api.dependencies import (
+    get_async_crawler,
+    get_fingerprint_index,
+    get_job_manager,
+    get_job_store,
+    get_processing_pool,
+    get_vector_store
+)
 from src.config.settings import settings
+from src.observability.tracing import TracingMiddleware, metrics
+from src.utils.executor import shutdown_executor
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Run ingestion workers for the lifetime of the app"""
+    job_manager = get_job_manager()
+    await job_manager.start()
+    yield
+    await job_manager.stop()
+    await get_async_crawler().aclose()
+    get_processing_pool().shutdown()
+    get_job_store().close()
+    get_fingerprint_index().close()
+    get_vector_store().persist()
+    get_vector_store().release_writer()
+    shutdown_executor()
+
 
 # Create FastAPI app
 app = FastAPI(
     title="Product Research RAG System",
     description="AI-powered product research using RAG",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -19,6 +49,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Time requests and pipeline stages
+app.add_middleware(TracingMiddleware)
+
 # Include API routes
 app.include_router(router, prefix="/api", tags=["rag"])
 
@@ -33,6 +66,12 @@ async def root():
     }
 
 
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Stage timings and counters in the Prometheus text format"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
 # if __name__ == "__main__":
 #     import uvicorn
 #     uvicorn.run(
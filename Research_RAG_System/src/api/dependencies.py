@@ -1,10 +1,19 @@
 from functools import lru_cache
+from typing import Optional
 from src.crawler.beautifulsoup_crawler import BeautifulSoupCrawler
+from src.crawler.async_crawler import AsyncCrawler
 from src.vectorstore.chroma_store import ChromaVectorStore
+from src.vectorstore.bulk_writer import BulkVectorWriter
+from src.vectorstore.fingerprint_index import FingerprintIndex
 from src.retrieval.hybrid_retriever import HybridRetriever
+from src.retrieval.query_cache import QueryCache
+from src.retrieval.reranker import Reranker, create_reranker
 from src.generation.rag_chain import RAGChain
 from src.processing.text_cleaner import TextCleaner
 from src.processing.chunker import TextChunker
+from src.processing.pool import ProcessingPool
+from src.jobs.store import JobStore
+from src.jobs.manager import IngestionJobManager
 
 
 @lru_cache()
@@ -13,17 +22,47 @@ def get_crawler() -> BeautifulSoupCrawler:
     return BeautifulSoupCrawler()
 
 
+@lru_cache()
+def get_async_crawler() -> AsyncCrawler:
+    """Get or create async crawler instance"""
+    return AsyncCrawler()
+
+
 @lru_cache()
 def get_vector_store() -> ChromaVectorStore:
     """Get or create vector store instance"""
     return ChromaVectorStore()
 
 
+@lru_cache()
+def get_bulk_writer() -> BulkVectorWriter:
+    """Get or create bulk vector writer instance"""
+    return BulkVectorWriter(get_vector_store())
+
+
+@lru_cache()
+def get_fingerprint_index() -> FingerprintIndex:
+    """Get or create page fingerprint index instance"""
+    return FingerprintIndex()
+
+
+@lru_cache()
+def get_reranker() -> Optional[Reranker]:
+    """Get or create the configured re-ranker, or None if re-ranking is disabled"""
+    return create_reranker()
+
+
 @lru_cache()
 def get_retriever() -> HybridRetriever:
     """Get or create retriever instance"""
     vector_store = get_vector_store()
-    return HybridRetriever(vector_store)
+    return HybridRetriever(vector_store, reranker=get_reranker())
+
+
+@lru_cache()
+def get_query_cache() -> QueryCache:
+    """Get or create query answer cache instance"""
+    return QueryCache(shard_names=get_vector_store().shard_names)
 
 
 @lru_cache()
@@ -41,4 +80,29 @@ def get_text_cleaner() -> TextCleaner:
 @lru_cache()
 def get_text_chunker() -> TextChunker:
     """Get or create text chunker instance"""
-    return TextChunker()
\ No newline at end of file
+    return TextChunker()
+
+
+@lru_cache()
+def get_processing_pool() -> ProcessingPool:
+    """Get or create clean-and-chunk process pool instance"""
+    return ProcessingPool(get_text_cleaner(), get_text_chunker())
+
+
+@lru_cache()
+def get_job_store() -> JobStore:
+    """Get or create job store instance"""
+    return JobStore()
+
+
+@lru_cache()
+def get_job_manager() -> IngestionJobManager:
+    """Get or create ingestion job manager instance"""
+    return IngestionJobManager(
+        store=get_job_store(),
+        crawler=get_async_crawler(),
+        processing_pool=get_processing_pool(),
+        writer=get_bulk_writer(),
+        fingerprints=get_fingerprint_index(),
+        query_cache=get_query_cache()
+    )
\ No newline at end of file
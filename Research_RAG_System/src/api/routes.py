@@ -1,142 +1,366 @@
+import asyncio
+import json
+import os
 from fastapi import APIRouter, Depends, HTTPException
-from typing import List
-from src.models.schemas import CrawlRequest, CrawlResponse, QueryRequest, QueryResponse, Source
-from src.crawler.beautifulsoup_crawler import BeautifulSoupCrawler
+from fastapi.responses import StreamingResponse
+from typing import List, Dict, Any, AsyncIterator, Optional
+from src.models.schemas import (
+    BatchQueryItem,
+    BatchQueryRequest,
+    BatchQueryResponse,
+    CrawlRequest,
+    CrawlJobResponse,
+    JobStatusResponse,
+    QueryRequest,
+    QueryResponse,
+    Source
+)
 from src.vectorstore.chroma_store import ChromaVectorStore
 from src.retrieval.hybrid_retriever import HybridRetriever
+from src.retrieval.query_cache import QueryCache
 from src.generation.rag_chain import RAGChain
-from src.processing.text_cleaner import TextCleaner
-from src.processing.chunker import TextChunker
+from src.jobs.manager import IngestionJobManager
+from src.config.settings import settings
+from src.observability.tracing import span
+from src.utils.executor import run_blocking
+from src.utils.rate_limiter import get_rate_limiter
 from src.api.dependencies import (
-    get_crawler,
     get_vector_store,
     get_retriever,
     get_rag_chain,
-    get_text_cleaner,
-    get_text_chunker
+    get_job_manager,
+    get_query_cache
 )
 
 router = APIRouter()
 
 
-@router.post("/crawl", response_model=CrawlResponse)
+@router.post("/crawl", response_model=CrawlJobResponse, status_code=202)
 async def crawl_urls(
     request: CrawlRequest,
-    crawler: BeautifulSoupCrawler = Depends(get_crawler),
-    vector_store: ChromaVectorStore = Depends(get_vector_store),
-    text_cleaner: TextCleaner = Depends(get_text_cleaner),
-    text_chunker: TextChunker = Depends(get_text_chunker)
+    job_manager: IngestionJobManager = Depends(get_job_manager)
 ):
     """
-    Crawl product URLs and store in vector database
+    Queue product URLs for crawling and storage in the vector database
     
-    This endpoint:
-    1. Crawls each URL
-    2. Extracts text and metadata
-    3. Cleans and chunks the text
-    4. Generates embeddings
-    5. Stores in vector database
+    Returns a job id immediately. Background workers then:
+    1. Crawl each URL
+    2. Extract text and metadata
+    3. Clean and chunk the text
+    4. Generate embeddings
+    5. Store in vector database
+    
+    Progress is available from GET /jobs/{job_id}.
     """
     try:
-        total_chunks = 0
-        documents_processed = 0
-        
-        for url in request.urls:
-            # Crawl the URL
-            crawl_result = crawler.crawl(str(url))
-            
-            if not crawl_result['text']:
-                print(f"No content extracted from {url}")
-                continue
-            
-            # Clean the text
-            clean_text = text_cleaner.clean(crawl_result['text'])
-            
-            # Chunk the text
-            chunks = text_chunker.chunk_text(clean_text, crawl_result['metadata'])
-            
-            if not chunks:
-                print(f"No chunks created from {url}")
-                continue
-            
-            # Add to vector store
-            vector_store.add_documents(chunks)
-            
-            total_chunks += len(chunks)
-            documents_processed += 1
-        
-        return CrawlResponse(
-            status="success",
-            documents_processed=documents_processed,
-            chunks_created=total_chunks,
-            message=f"Successfully processed {documents_processed} documents into {total_chunks} chunks"
+        urls = [str(url) for url in request.urls]
+        with span("crawl.submit", urls=len(urls)):
+            job_id = await job_manager.submit(urls)
+        
+        return CrawlJobResponse(
+            job_id=job_id,
+            status="queued",
+            urls_queued=len(urls),
+            message=f"Queued {len(urls)} URLs for ingestion"
         )
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error during crawl: {str(e)}")
 
 
+@router.get("/jobs/{job_id}", response_model=JobStatusResponse)
+async def get_job_status(
+    job_id: str,
+    job_manager: IngestionJobManager = Depends(get_job_manager)
+):
+    """Report per-URL status, throughput and errors for an ingestion job"""
+    job = await job_manager.get_status(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return JobStatusResponse(**job)
+
+
 @router.post("/query", response_model=QueryResponse)
 async def query_products(
     request: QueryRequest,
     retriever: HybridRetriever = Depends(get_retriever),
-    rag_chain: RAGChain = Depends(get_rag_chain)
+    rag_chain: RAGChain = Depends(get_rag_chain),
+    query_cache: QueryCache = Depends(get_query_cache)
 ):
     """
     Query the product database using natural language
     
     This endpoint:
-    1. Processes the query
-    2. Retrieves relevant documents
-    3. Applies any filters
+    1. Checks the answer cache
+    2. Processes the query
+    3. Retrieves relevant documents matching any filters
     4. Generates an answer using LLM
     """
     try:
-        # Retrieve relevant documents
-        retrieved_docs = retriever.retrieve(request.query, top_k=5)
+        # Serve repeated and near-identical questions from the cache
+        query_embedding = None
+        if settings.query_cache_enabled:
+            # A semantic lookup embeds the query, so keep it off the event loop
+            with span("cache.lookup") as s:
+                cached, query_embedding = await run_blocking(
+                    query_cache.get,
+                    request.query,
+                    request.filters,
+                    embed=retriever.vector_store.embeddings.embed_query
+                )
+                s.set(hits=int(cached is not None))
+            if cached is not None:
+                return QueryResponse(**{**cached, 'query': request.query, 'cached': True, 'prompt_tokens': 0})
         
-        # Apply additional filters if provided
-        if request.filters:
-            retrieved_docs = retriever.filter_by_price(retrieved_docs, request.filters)
+        # Retrieve relevant documents, with filters applied inside the search
+        with span("retrieve") as s:
+            retrieved_docs = await retriever.aretrieve(request.query, top_k=5, filters=request.filters)
+            s.set(results=len(retrieved_docs))
         
         if not retrieved_docs:
             return QueryResponse(
                 answer="I couldn't find any products matching your query.",
                 sources=[],
-                query=request.query
+                query=request.query,
+                prompt_tokens=0
             )
         
-        # Generate answer
-        answer = rag_chain.generate(request.query, retrieved_docs)
+        # Generate answer from the context packed to the token budget
+        prompt = rag_chain.build_prompt(request.query, retrieved_docs)
+        answer = await rag_chain.agenerate(request.query, retrieved_docs, prompt=prompt)
         
-        # Format sources
-        sources = [
-            Source(
-                content=doc['content'][:500] + "...",  # Truncate for response
-                metadata=doc['metadata'],
-                relevance_score=doc.get('score')
-            )
-            for doc in retrieved_docs
-        ]
-        
-        return QueryResponse(
+        response = QueryResponse(
             answer=answer,
-            sources=sources,
-            query=request.query
+            sources=format_sources(retrieved_docs),
+            query=request.query,
+            prompt_tokens=prompt.tokens
         )
+        
+        if settings.query_cache_enabled:
+            query_cache.put(request.query, request.filters, response.model_dump(), query_embedding)
+        
+        return response
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error during query: {str(e)}")
 
 
+@router.post("/query/batch", response_model=BatchQueryResponse)
+async def query_products_batch(
+    request: BatchQueryRequest,
+    retriever: HybridRetriever = Depends(get_retriever),
+    rag_chain: RAGChain = Depends(get_rag_chain),
+    query_cache: QueryCache = Depends(get_query_cache)
+):
+    """
+    Answer several queries in one call
+    
+    This endpoint:
+    1. Serves repeated and near-identical questions from the answer cache,
+       embedding the exact-tier misses in one call for the semantic tier
+    2. Embeds the remaining queries in one embedding call and searches
+       them with one multi-query Chroma request, with filters parsed
+       per query
+    3. Generates the answers concurrently, at most
+       BATCH_GENERATION_CONCURRENCY at a time
+    
+    Results are in request order; a failed query reports its error
+    without failing the others.
+    """
+    if len(request.queries) > settings.batch_max_queries:
+        raise HTTPException(
+            status_code=422,
+            detail=f"At most {settings.batch_max_queries} queries per batch"
+        )
+    
+    items: List[Optional[BatchQueryItem]] = [None] * len(request.queries)
+    lookups = [(None, None)] * len(request.queries)
+    if settings.query_cache_enabled:
+        # A semantic lookup embeds the queries, so keep it off the event loop
+        with span("cache.lookup", queries=len(request.queries)) as s:
+            lookups = await run_blocking(
+                query_cache.get_many,
+                [(item.query, item.filters) for item in request.queries],
+                embed_batch=retriever.vector_store.embeddings.embed_documents
+            )
+            s.set(hits=sum(cached is not None for cached, _ in lookups))
+    
+    pending = []
+    for i, (item, (cached, _)) in enumerate(zip(request.queries, lookups)):
+        if cached is not None:
+            items[i] = BatchQueryItem(result=QueryResponse(**{**cached, 'query': item.query, 'cached': True, 'prompt_tokens': 0}))
+        else:
+            pending.append(i)
+    
+    if pending:
+        try:
+            with span("retrieve", queries=len(pending)) as s:
+                retrieved = await retriever.aretrieve_batch(
+                    [(request.queries[i].query, request.queries[i].filters) for i in pending],
+                    top_k=5
+                )
+                s.set(results=sum(len(docs) for docs in retrieved if isinstance(docs, list)))
+        except Exception as e:
+            retrieved = [e] * len(pending)
+        
+        limit = asyncio.Semaphore(settings.batch_generation_concurrency)
+        
+        async def answer(item: QueryRequest, docs, query_embedding) -> BatchQueryItem:
+            if isinstance(docs, Exception):
+                return BatchQueryItem(error=f"Error during query: {str(docs)}")
+            if not docs:
+                return BatchQueryItem(result=QueryResponse(
+                    answer="I couldn't find any products matching your query.",
+                    sources=[],
+                    query=item.query,
+                    prompt_tokens=0
+                ))
+            try:
+                async with limit:
+                    prompt = rag_chain.build_prompt(item.query, docs)
+                    answer_text = await rag_chain.agenerate(item.query, docs, prompt=prompt)
+                response = QueryResponse(
+                    answer=answer_text,
+                    sources=format_sources(docs),
+                    query=item.query,
+                    prompt_tokens=prompt.tokens
+                )
+            except Exception as e:
+                return BatchQueryItem(error=f"Error during query: {str(e)}")
+            if settings.query_cache_enabled:
+                query_cache.put(item.query, item.filters, response.model_dump(), query_embedding)
+            return BatchQueryItem(result=response)
+        
+        answered = await asyncio.gather(*(
+            answer(request.queries[i], docs, lookups[i][1]) for i, docs in zip(pending, retrieved)
+        ))
+        for i, item in zip(pending, answered):
+            items[i] = item
+    
+    return BatchQueryResponse(results=items)
+
+
+@router.post("/query/stream")
+async def query_products_stream(
+    request: QueryRequest,
+    retriever: HybridRetriever = Depends(get_retriever),
+    rag_chain: RAGChain = Depends(get_rag_chain),
+    query_cache: QueryCache = Depends(get_query_cache)
+):
+    """
+    Query the product database and stream the answer as NDJSON
+    
+    Each line is a JSON event:
+    1. {"type": "sources", ...} with the retrieved sources, sent first
+    2. {"type": "token", "content": ...} for each answer fragment
+    3. {"type": "done"} once the answer is complete, or {"type": "error", ...}
+    """
+    try:
+        query_embedding = None
+        cached = None
+        if settings.query_cache_enabled:
+            # A semantic lookup embeds the query, so keep it off the event loop
+            with span("cache.lookup") as s:
+                cached, query_embedding = await run_blocking(
+                    query_cache.get,
+                    request.query,
+                    request.filters,
+                    embed=retriever.vector_store.embeddings.embed_query
+                )
+                s.set(hits=int(cached is not None))
+        
+        if cached is None:
+            with span("retrieve") as s:
+                retrieved_docs = await retriever.aretrieve(request.query, top_k=5, filters=request.filters)
+                s.set(results=len(retrieved_docs))
+    
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error during query: {str(e)}")
+    
+    async def events() -> AsyncIterator[str]:
+        if cached is not None:
+            yield ndjson({
+                'type': 'sources',
+                'query': request.query,
+                'cached': True,
+                'prompt_tokens': 0,
+                'sources': cached['sources']
+            })
+            yield ndjson({'type': 'token', 'content': cached['answer']})
+            yield ndjson({'type': 'done'})
+            return
+        
+        sources = format_sources(retrieved_docs)
+        prompt = rag_chain.build_prompt(request.query, retrieved_docs) if retrieved_docs else None
+        yield ndjson({
+            'type': 'sources',
+            'query': request.query,
+            'cached': False,
+            'prompt_tokens': prompt.tokens if prompt else 0,
+            'sources': [source.model_dump() for source in sources]
+        })
+        
+        if not retrieved_docs:
+            yield ndjson({'type': 'token', 'content': "I couldn't find any products matching your query."})
+            yield ndjson({'type': 'done'})
+            return
+        
+        try:
+            parts = []
+            async for token in rag_chain.astream(request.query, retrieved_docs, prompt=prompt):
+                parts.append(token)
+                yield ndjson({'type': 'token', 'content': token})
+        except Exception as e:
+            yield ndjson({'type': 'error', 'detail': f"Error during generation: {str(e)}"})
+            return
+        
+        yield ndjson({'type': 'done'})
+        
+        if settings.query_cache_enabled:
+            response = QueryResponse(
+                answer="".join(parts),
+                sources=sources,
+                query=request.query,
+                prompt_tokens=prompt.tokens
+            )
+            query_cache.put(request.query, request.filters, response.model_dump(), query_embedding)
+    
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+
+def format_sources(retrieved_docs: List[Dict[str, Any]]) -> List[Source]:
+    """Format retrieved documents as response sources"""
+    return [
+        Source(
+            content=doc['content'][:500] + "...",  # Truncate for response
+            metadata=doc['metadata'],
+            relevance_score=doc.get('score')
+        )
+        for doc in retrieved_docs
+    ]
+
+
+def ndjson(event: Dict[str, Any]) -> str:
+    """Serialize one streaming event as a line of JSON"""
+    return json.dumps(event) + "\n"
+
+
 @router.get("/health")
-async def health_check(vector_store: ChromaVectorStore = Depends(get_vector_store)):
+async def health_check(
+    vector_store: ChromaVectorStore = Depends(get_vector_store),
+    query_cache: QueryCache = Depends(get_query_cache)
+):
     """Health check endpoint"""
     try:
-        count = vector_store.get_collection_count()
+        count = await run_blocking(vector_store.get_collection_count)
         return {
             "status": "healthy",
-            "documents_in_db": count
+            "documents_in_db": count,
+            "shards": vector_store.shard_names() or None,
+            "embedding_cache": vector_store.get_embedding_cache_stats(),
+            "query_cache": query_cache.stats() if settings.query_cache_enabled else None,
+            "openai_rate_limiter": get_rate_limiter().stats() if settings.openai_rate_limit_enabled else None,
+            "ingestion": {"pid": os.getpid(), "role": "writer" if vector_store.is_writer else "standby"}
         }
     except Exception as e:
         return {
@@ -10,19 +10,117 @@ class Settings(BaseSettings):
     
     # OpenAI Configuration
     openai_api_key: str
-    embedding_model: str = "text-embedding-3-small"
+    embedding_model: str = "text-embedding-3-small"  # or "local:<model>"
     llm_model: str = "gpt-3.5-turbo"
     
     # Vector Database Configuration
     vector_db_path: str = "./data/chroma_db"
     collection_name: str = "products"
     
+    # Vector Database Server Configuration (required to run several API workers)
+    vector_db_host: Optional[str] = None  # Chroma server; when set, chunks are stored there instead of vector_db_path
+    vector_db_port: int = 8000
+    vector_db_ssl: bool = False
+    vector_db_pool_size: int = 32  # Pooled HTTP connections to the server per process
+    writer_failover_interval: float = 5.0  # Seconds between standby workers' attempts to take over ingestion
+    
+    # ANN Index Configuration
+    hnsw_space: str = "l2"
+    hnsw_m: int = 16
+    hnsw_ef_construction: int = 100
+    hnsw_ef_search: int = 100
+    quantized_index: Optional[str] = None  # "int8" or "float16" first-stage scoring
+    quantized_rerank_factor: int = 4
+    
+    # Sharding Configuration
+    shard_by: Optional[str] = None  # "domain" or "tag": one collection per source domain or first product tag
+    shard_routing_enabled: bool = True  # Search only the shards a query names, e.g. a store or category
+    shard_search_workers: int = 8  # Threads searching shards in parallel
+    
+    # Incremental Re-crawl Configuration
+    fingerprint_db_path: str = "./data/fingerprints.db"
+    
+    # Local Embedding Configuration (EMBEDDING_MODEL=local:<model>)
+    local_model_path: str = "./models"
+    embedding_threads: int = 0  # ONNX Runtime intra-op threads, 0 for one per physical core
+    embedding_max_batch_size: int = 64
+    embedding_max_length: int = 256
+    embedding_batch_wait_ms: float = 2.0
+    
+    # Embedding Cache Configuration
+    embedding_cache_enabled: bool = True
+    embedding_cache_path: str = "./data/embedding_cache.db"
+    embedding_cache_max_entries: int = 500000
+    
     # Text Processing Configuration
-    chunk_size: int = 1000
-    chunk_overlap: int = 200
+    chunk_tokens: int = 256
+    chunk_overlap_tokens: int = 50
+    
+    # Parallel Processing Configuration
+    processing_workers: int = 4  # 0 cleans and chunks in-process
+    
+    # Crawler Configuration
+    crawl_max_concurrency: int = 20
+    crawl_per_host_concurrency: int = 4
+    crawl_parse_workers: int = 4
+    crawl_timeout: float = 10.0
+    
+    # Ingestion Job Configuration
+    jobs_db_path: str = "./data/jobs.db"
+    ingestion_workers: int = 4
+    
+    # Bulk Ingestion Configuration
+    ingest_buffer_chunks: int = 512
+    ingest_flush_interval: float = 2.0
+    embedding_batch_tokens: int = 100000
+    ingest_max_retries: int = 3
     
     # Retrieval Configuration
     top_k_results: int = 5
+    bm25_enabled: bool = True
+    bm25_save_interval: float = 30.0
+    hybrid_candidates: int = 20
+    rrf_k: int = 60
+    
+    # Re-ranking Configuration
+    rerank_model: Optional[str] = None  # "local:<cross-encoder>" or "lexical"
+    rerank_candidates: int = 30
+    rerank_batch_size: int = 16
+    rerank_max_length: int = 256
+    rerank_timeout: float = 0.3  # seconds; unscored candidates keep retrieval order
+    rerank_token_budget: int = 1500
+    rerank_min_score: Optional[float] = None
+    
+    # Context Packing Configuration
+    context_token_budget: int = 750  # context tokens of llm_model per prompt
+    
+    # Query Cache Configuration
+    query_cache_enabled: bool = True
+    query_cache_max_entries: int = 1000
+    query_cache_ttl_seconds: float = 3600.0
+    query_cache_semantic_threshold: Optional[float] = None
+    query_cache_sync_interval: float = 1.0  # seconds between checks for pages other API workers re-ingested
+    
+    # Query Concurrency Configuration
+    blocking_executor_workers: int = 32
+    single_flight_enabled: bool = True  # identical in-flight queries share one retrieval and LLM call
+    
+    # OpenAI Rate Limit Configuration
+    openai_rate_limit_enabled: bool = True
+    openai_rpm_limit: Optional[int] = None  # per model; learned from x-ratelimit headers when unset
+    openai_tpm_limit: Optional[int] = None
+    openai_max_concurrency: int = 32
+    openai_initial_concurrency: int = 8
+    openai_background_share: float = 0.5  # share of slots ingestion may hold
+    openai_max_retries: int = 6  # 429 retries with backoff
+    openai_backoff_base: float = 0.5
+    
+    # Batch Query Configuration
+    batch_max_queries: int = 50
+    batch_generation_concurrency: int = 8
+    
+    # Observability Configuration
+    tracing_enabled: bool = True  # stage spans, /metrics and the Server-Timing header
     
     # API Configuration
     api_host: str = "0.0.0.0"
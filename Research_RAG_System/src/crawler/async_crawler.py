@@ -0,0 +1,134 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional
+from urllib.parse import urlsplit
+import httpx
+from src.config.settings import settings
+from src.models.schemas import ProductMetadata
+from src.observability.tracing import increment
+from src.crawler.beautifulsoup_crawler import (
+    BeautifulSoupCrawler,
+    USER_AGENT,
+    conditional_headers,
+    not_modified_result
+)
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncCrawler:
+    """Crawls many web pages concurrently without blocking the event loop"""
+
+    def __init__(
+        self,
+        max_concurrency: int = None,
+        per_host_concurrency: int = None,
+        parse_workers: int = None,
+        timeout: float = None
+    ):
+        self.max_concurrency = max_concurrency or settings.crawl_max_concurrency
+        self.per_host_concurrency = per_host_concurrency or settings.crawl_per_host_concurrency
+        self.timeout = timeout or settings.crawl_timeout
+
+        # HTML parsing is CPU-bound, so it runs in a worker pool
+        self.parser = BeautifulSoupCrawler()
+        self.executor = ThreadPoolExecutor(
+            max_workers=parse_workers or settings.crawl_parse_workers,
+            thread_name_prefix="html-parse"
+        )
+
+        # Created lazily so they bind to the running event loop
+        self._client: Optional[httpx.AsyncClient] = None
+        self._global_limit: Optional[asyncio.Semaphore] = None
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Get or create the pooled HTTP client"""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                headers={'User-Agent': USER_AGENT},
+                timeout=self.timeout,
+                follow_redirects=True,
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency
+                )
+            )
+            self._global_limit = asyncio.Semaphore(self.max_concurrency)
+        return self._client
+
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        """Get the semaphore bounding concurrent requests to one host"""
+        host = urlsplit(url).netloc.lower()
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(self.per_host_concurrency)
+        return self._host_limits[host]
+
+    async def crawl(self, url: str, etag: Optional[str] = None, last_modified: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Crawl a single URL and extract content and metadata
+
+        Args:
+            url: The URL to crawl
+            etag: ETag from the previous crawl, for a conditional GET
+            last_modified: Last-Modified from the previous crawl, for a conditional GET
+
+        Returns:
+            Dictionary containing 'text' and 'metadata', the response's
+            'etag' and 'last_modified', and 'not_modified' when the server
+            answered 304
+        """
+        client = self._get_client()
+
+        try:
+            # Fetch the page within the global and per-host limits
+            async with self._global_limit, self._host_limit(url):
+                response = await client.get(url, headers=conditional_headers(etag, last_modified))
+
+            if response.status_code == 304:
+                return not_modified_result(url, etag, last_modified)
+
+            response.raise_for_status()
+
+            # Parse HTML off the event loop
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(
+                self.executor,
+                self.parser.parse,
+                response.content,
+                response.text,
+                url
+            )
+            result['etag'] = response.headers.get('ETag')
+            result['last_modified'] = response.headers.get('Last-Modified')
+            return result
+
+        except Exception as e:
+            logger.warning("Error crawling %s: %s", url, e)
+            increment("crawl_errors", error=type(e).__name__)
+            return {
+                'text': '',
+                'metadata': ProductMetadata(url=url).to_dict(),
+                'error': str(e)
+            }
+
+    async def crawl_many(self, urls: List[str]) -> List[Dict[str, Any]]:
+        """
+        Crawl several URLs concurrently
+
+        Args:
+            urls: The URLs to crawl
+
+        Returns:
+            Crawl results in the same order as the URLs
+        """
+        return await asyncio.gather(*(self.crawl(url) for url in urls))
+
+    async def aclose(self):
+        """Close pooled connections and the parsing pool"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._host_limits.clear()
+        self.executor.shutdown(wait=False)
@@ -1,8 +1,36 @@
+import logging
 import requests
 from bs4 import BeautifulSoup
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Tuple
 from src.models.schemas import ProductMetadata
 from src.crawler.metadata_extractor import MetadataExtractor
+from src.crawler.html_extractor import HTMLExtractor
+
+logger = logging.getLogger(__name__)
+
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+
+
+def conditional_headers(etag: Optional[str], last_modified: Optional[str]) -> Dict[str, str]:
+    """Request headers that let the server answer 304 for an unchanged page"""
+    headers = {}
+    if etag:
+        headers['If-None-Match'] = etag
+    if last_modified:
+        headers['If-Modified-Since'] = last_modified
+    return headers
+
+
+def not_modified_result(url: str, etag: Optional[str], last_modified: Optional[str]) -> Dict[str, Any]:
+    """Crawl result for a page the server reported as unchanged"""
+    return {
+        'text': '',
+        'metadata': ProductMetadata(url=url).to_dict(),
+        'not_modified': True,
+        'etag': etag,
+        'last_modified': last_modified
+    }
 
 
 class BeautifulSoupCrawler:
@@ -10,47 +38,98 @@ class BeautifulSoupCrawler:
     
     def __init__(self):
         self.extractor = MetadataExtractor()
+        self.html_extractor = HTMLExtractor()
         self.session = requests.Session()
         self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+            'User-Agent': USER_AGENT
         })
     
-    def crawl(self, url: str) -> Dict[str, Any]:
+    def crawl(self, url: str, etag: Optional[str] = None, last_modified: Optional[str] = None) -> Dict[str, Any]:
         """
         Crawl a single URL and extract content and metadata
         
         Args:
             url: The URL to crawl
+            etag: ETag from the previous crawl, for a conditional GET
+            last_modified: Last-Modified from the previous crawl, for a conditional GET
             
         Returns:
-            Dictionary containing 'text' and 'metadata'
+            Dictionary containing 'text' and 'metadata', the response's
+            'etag' and 'last_modified', and 'not_modified' when the server
+            answered 304
         """
         try:
             # Fetch the page
-            response = self.session.get(url, timeout=10)
-            response.raise_for_status()
+            response = self.session.get(url, timeout=10, headers=conditional_headers(etag, last_modified))
             
-            # Parse HTML
-            soup = BeautifulSoup(response.content, 'lxml')
+            if response.status_code == 304:
+                return not_modified_result(url, etag, last_modified)
             
-            # Extract text content
-            text_content = self._extract_text(soup)
+            response.raise_for_status()
             
-            # Extract metadata
-            metadata = self._extract_metadata(soup, response.text, url)
-            
-            return {
-                'text': text_content,
-                'metadata': metadata
-            }
+            result = self.parse(response.content, response.text, url)
+            result['etag'] = response.headers.get('ETag')
+            result['last_modified'] = response.headers.get('Last-Modified')
+            return result
             
         except Exception as e:
-            print(f"Error crawling {url}: {str(e)}")
+            logger.warning("Error crawling %s: %s", url, e)
             return {
                 'text': '',
-                'metadata': ProductMetadata(url=url).to_dict()
+                'metadata': ProductMetadata(url=url).to_dict(),
+                'error': str(e)
             }
     
+    def parse(self, content: bytes, html_text: str, url: str) -> Dict[str, Any]:
+        """
+        Parse a fetched page into text and metadata
+        
+        Uses the single-pass streaming extractor, falling back to a full
+        BeautifulSoup tree if it fails.
+        
+        Args:
+            content: Raw response body
+            html_text: Decoded response body
+            url: The URL the page was fetched from
+            
+        Returns:
+            Dictionary containing 'text' and 'metadata'
+        """
+        try:
+            return self.html_extractor.extract(content, url)
+        except Exception as e:
+            logger.warning("Streaming extraction failed for %s, parsing full tree: %s", url, e)
+            return self.parse_tree(content, html_text, url)
+    
+    def parse_tree(self, content: bytes, html_text: str, url: str) -> Dict[str, Any]:
+        """
+        Parse a fetched page by building a BeautifulSoup tree
+        
+        Args:
+            content: Raw response body
+            html_text: Decoded response body
+            url: The URL the page was fetched from
+            
+        Returns:
+            Dictionary containing 'text' and 'metadata'
+        """
+        # Parse HTML
+        soup = BeautifulSoup(content, 'lxml')
+        
+        # Read the price first, since JSON-LD data lives in scripts
+        price = self.extractor.extract_price_details(soup)
+        
+        # Extract text content
+        text_content = self._extract_text(soup)
+        
+        # Extract metadata
+        metadata = self._extract_metadata(soup, price, url)
+        
+        return {
+            'text': text_content,
+            'metadata': metadata
+        }
+    
     def _extract_text(self, soup: BeautifulSoup) -> str:
         """Extract clean text from HTML"""
         # Remove script and style elements
@@ -67,12 +146,15 @@ class BeautifulSoupCrawler:
         
         return text
     
-    def _extract_metadata(self, soup: BeautifulSoup, html_text: str, url: str) -> Dict[str, Any]:
+    def _extract_metadata(self, soup: BeautifulSoup, price: Tuple[Optional[str], Optional[float], Optional[str]], url: str) -> Dict[str, Any]:
         """Extract metadata from the page"""
+        price, price_value, price_currency = price
         metadata = ProductMetadata(
             title=self.extractor.extract_title(soup),
             description=self.extractor.extract_description(soup),
-            price=self.extractor.extract_price(soup, html_text),
+            price=price,
+            price_value=price_value,
+            price_currency=price_currency,
             tags=self.extractor.extract_tags(soup),
             url=url
         )
@@ -0,0 +1,300 @@
+from typing import Dict, Any, List, Optional
+from bs4.dammit import EncodingDetector
+from lxml import etree
+from src.crawler.price_extractor import PriceCandidates, STRUCK_TAGS, is_price_label
+from src.models.schemas import ProductMetadata
+
+
+# Elements whose whole subtree is left out of the page text
+REMOVED_TAGS = frozenset(["script", "style", "nav", "footer", "header"])
+
+# Elements whose strings are not ordinary page text
+STRING_CONTAINER_TAGS = frozenset(["script", "style", "template", "rt", "rp"])
+
+# Elements whose whitespace-only strings are kept as-is
+PRESERVE_WHITESPACE_TAGS = frozenset(["pre", "textarea"])
+
+ASCII_SPACES = frozenset("\x20\x0a\x09\x0c\x0d")
+
+MICRODATA_PRICE_PROPS = frozenset(["price", "priceCurrency"])
+
+
+class _PageTarget:
+    """
+    lxml parser target that collects text and metadata as the page streams by
+
+    The parser calls start/end/data/comment as it reads the document, so no
+    tree is ever built. Strings are assembled the way BeautifulSoup assembles
+    them, which keeps the output identical to the tree-based extraction.
+    """
+
+    def __init__(self):
+        self.depth = 0
+        self.removed_depth = 0
+        self.container_depth = 0
+        self.preserve_depth = 0
+        self.buffer: List[str] = []
+
+        self.phrases: List[str] = []
+        self.meta: Dict[str, Optional[str]] = {}
+
+        # Price evidence from JSON-LD scripts, microdata and price-labelled elements
+        self.prices = PriceCandidates()
+        self.json_ld_depth: Optional[int] = None
+        self.json_ld_parts: List[str] = []
+        self.microdata: List[list] = []
+        self.label_depths: List[int] = []
+        self.struck_depth = 0
+
+        # First <title>, <h1> and <p> outside removed elements
+        self.title_children: Optional[List[Optional[str]]] = None
+        self.title_depth: Optional[int] = None
+        self.h1_parts: Optional[List[str]] = None
+        self.h1_depth: Optional[int] = None
+        self.p_parts: Optional[List[str]] = None
+        self.p_depth: Optional[int] = None
+
+    def start(self, tag: str, attrib: Dict[str, str]):
+        self._flush()
+        self.depth += 1
+
+        if attrib:
+            self._record_price_markup(tag, attrib)
+
+        if tag in REMOVED_TAGS:
+            self.removed_depth += 1
+        if tag in STRING_CONTAINER_TAGS:
+            self.container_depth += 1
+        if tag in PRESERVE_WHITESPACE_TAGS:
+            self.preserve_depth += 1
+        if tag in STRUCK_TAGS:
+            self.struck_depth += 1
+
+        if self.removed_depth:
+            return
+
+        if self.title_depth is not None:
+            self.title_children.append(None)
+
+        if tag == "meta":
+            self._record_meta(attrib)
+        elif tag == "title" and self.title_children is None:
+            self.title_children = []
+            self.title_depth = self.depth
+        elif tag == "h1" and self.h1_parts is None:
+            self.h1_parts = []
+            self.h1_depth = self.depth
+        elif tag == "p" and self.p_parts is None:
+            self.p_parts = []
+            self.p_depth = self.depth
+
+    def end(self, tag: str):
+        self._flush()
+
+        if self.depth == self.title_depth:
+            self.title_depth = None
+        if self.depth == self.h1_depth:
+            self.h1_depth = None
+        if self.depth == self.p_depth:
+            self.p_depth = None
+
+        if self.depth == self.json_ld_depth:
+            self.prices.add_json_ld("".join(self.json_ld_parts))
+            self.json_ld_depth = None
+            self.json_ld_parts = []
+        while self.microdata and self.microdata[-1][0] == self.depth:
+            _, itemprop, parts = self.microdata.pop()
+            self.prices.add_microdata(itemprop, "".join(parts))
+        if self.label_depths and self.label_depths[-1] == self.depth:
+            self.label_depths.pop()
+
+        if tag in REMOVED_TAGS:
+            self.removed_depth -= 1
+        if tag in STRING_CONTAINER_TAGS:
+            self.container_depth -= 1
+        if tag in PRESERVE_WHITESPACE_TAGS:
+            self.preserve_depth -= 1
+        if tag in STRUCK_TAGS:
+            self.struck_depth -= 1
+        self.depth -= 1
+
+    def data(self, data: str):
+        self.buffer.append(data)
+
+    def comment(self, text: str):
+        # Comments end the current string, but are not page text
+        self._flush()
+        if self.title_depth is not None and not self.removed_depth:
+            self.title_children.append(text)
+
+    def doctype(self, *args):
+        self._flush()
+
+    def pi(self, target: str, data: str):
+        self._flush()
+
+    def close(self) -> "_PageTarget":
+        self._flush()
+        return self
+
+    def _flush(self):
+        """Finish the string collected since the last event"""
+        if not self.buffer:
+            return
+        string = "".join(self.buffer)
+        self.buffer = []
+
+        if self.json_ld_depth is not None:
+            self.json_ld_parts.append(string)
+
+        if not self.preserve_depth and all(char in ASCII_SPACES for char in string):
+            string = "\n" if "\n" in string else " "
+
+        # Microdata values are element text, wherever the element is
+        for _, _, parts in self.microdata:
+            if not self.container_depth:
+                parts.append(string)
+
+        if self.removed_depth:
+            return
+
+        if self.title_depth is not None:
+            self.title_children.append(string)
+
+        # Script, style and template strings are not ordinary text
+        if self.container_depth:
+            return
+
+        if self.h1_depth is not None:
+            self.h1_parts.append(string)
+        if self.p_depth is not None:
+            self.p_parts.append(string)
+
+        if not self.struck_depth:
+            labelled = bool(self.label_depths)
+            if self.prices.wants_text(labelled):
+                self.prices.add_text(string, labelled)
+
+        stripped = string.strip()
+        if stripped:
+            for line in stripped.splitlines():
+                for phrase in line.strip().split("  "):
+                    phrase = phrase.strip()
+                    if phrase:
+                        self.phrases.append(phrase)
+
+    def _record_meta(self, attrib: Dict[str, str]):
+        """Keep the first meta tag of each kind we extract metadata from"""
+        prop = attrib.get("property")
+        if prop in ("og:title", "og:description") and prop not in self.meta:
+            self.meta[prop] = attrib.get("content")
+        name = attrib.get("name")
+        if name in ("description", "keywords") and name not in self.meta:
+            self.meta[name] = attrib.get("content")
+
+    def _record_price_markup(self, tag: str, attrib: Dict[str, str]):
+        """Note structured price data and price labels on an opening tag"""
+        if tag == "script" and attrib.get("type") == "application/ld+json":
+            self.json_ld_depth = self.depth
+        if tag == "meta" and "property" in attrib:
+            self.prices.add_meta(attrib["property"], attrib.get("content"))
+
+        itemprop = attrib.get("itemprop")
+        if itemprop in MICRODATA_PRICE_PROPS:
+            if "content" in attrib:
+                self.prices.add_microdata(itemprop, attrib["content"])
+            else:
+                self.microdata.append([self.depth, itemprop, []])
+
+        if is_price_label(attrib):
+            self.label_depths.append(self.depth)
+
+
+class HTMLExtractor:
+    """
+    Extracts page text and product metadata in a single streaming parse
+
+    Produces the same text and ProductMetadata as parsing the page into a
+    BeautifulSoup tree and querying it, without building the tree.
+    """
+
+    def extract(self, content: bytes, url: str) -> Dict[str, Any]:
+        """
+        Extract text and metadata from a fetched page
+
+        Args:
+            content: Raw response body
+            url: The URL the page was fetched from
+
+        Returns:
+            Dictionary containing 'text' and 'metadata'
+        """
+        target = self._parse(content)
+
+        price, price_value, price_currency = target.prices.best()
+        metadata = ProductMetadata(
+            title=self._title(target),
+            description=self._description(target),
+            price=price,
+            price_value=price_value,
+            price_currency=price_currency,
+            tags=self._tags(target),
+            url=url
+        )
+
+        return {
+            'text': " ".join(target.phrases),
+            'metadata': metadata.to_dict()
+        }
+
+    @staticmethod
+    def _parse(content: bytes) -> _PageTarget:
+        """Stream the page through lxml, trying encodings the way BeautifulSoup does"""
+        detector = EncodingDetector(content, is_html=True)
+        error = None
+        for encoding in detector.encodings:
+            target = _PageTarget()
+            parser = etree.HTMLParser(target=target, recover=True, encoding=encoding)
+            try:
+                parser.feed(detector.markup)
+                return parser.close()
+            except (UnicodeDecodeError, LookupError, etree.ParserError) as e:
+                error = e
+        raise ValueError(f"Could not decode page: {error}")
+
+    @staticmethod
+    def _title(target: _PageTarget) -> Optional[str]:
+        """Same precedence as MetadataExtractor.extract_title"""
+        og_title = target.meta.get("og:title")
+        if og_title:
+            return og_title.strip()
+
+        children = target.title_children
+        if children is not None and len(children) == 1 and children[0]:
+            return children[0].strip()
+
+        if target.h1_parts is not None:
+            return "".join(target.h1_parts).strip()
+
+        return None
+
+    @staticmethod
+    def _description(target: _PageTarget) -> Optional[str]:
+        """Same precedence as MetadataExtractor.extract_description"""
+        for key in ("description", "og:description"):
+            value = target.meta.get(key)
+            if value:
+                return value.strip()
+
+        if target.p_parts is not None:
+            return "".join(target.p_parts).strip()
+
+        return None
+
+    @staticmethod
+    def _tags(target: _PageTarget) -> Optional[List[str]]:
+        """Same parsing as MetadataExtractor.extract_tags"""
+        keywords = target.meta.get("keywords")
+        if keywords:
+            return [k.strip() for k in keywords.split(",") if k.strip()]
+        return None
@@ -1,6 +1,6 @@
 from bs4 import BeautifulSoup
-import re
-from typing import Optional, List
+from typing import Optional, List, Tuple
+from src.crawler.price_extractor import collect_from_soup, parse_price_string
 
 
 class MetadataExtractor:
@@ -47,21 +47,37 @@ class MetadataExtractor:
     
     @staticmethod
     def extract_price(soup: BeautifulSoup, html_text: str) -> Optional[str]:
-        """Extract price using regex patterns"""
-        # Common price patterns
-        price_patterns = [
-            r'\$\s*\d+(?:,\d{3})*(?:\.\d{2})?',  # $1,234.56
-            r'USD\s*\d+(?:,\d{3})*(?:\.\d{2})?',  # USD 1234.56
-            r'₹\s*\d+(?:,\d{3})*(?:\.\d{2})?',    # ₹1,234.56
-            r'€\s*\d+(?:,\d{3})*(?:\.\d{2})?',    # €1,234.56
-        ]
+        """Extract the display price of the product"""
+        return MetadataExtractor.extract_price_details(soup)[0]
+    
+    @staticmethod
+    def extract_price_details(soup: BeautifulSoup) -> Tuple[Optional[str], Optional[float], Optional[str]]:
+        """
+        Extract the product price from structured data, falling back to page text
         
-        for pattern in price_patterns:
-            match = re.search(pattern, html_text)
-            if match:
-                return match.group(0).strip()
+        JSON-LD offers, microdata and og:price meta tags are trusted first;
+        otherwise the first price inside a price-labelled element, then the
+        first price anywhere in the visible text. Must run before scripts
+        are removed from the soup.
         
-        return None
+        Returns:
+            Display string, numeric value and currency code
+        """
+        return collect_from_soup(soup).best()
+    
+    @staticmethod
+    def parse_price(price: Optional[str]) -> Tuple[Optional[float], Optional[str]]:
+        """
+        Normalize a price string to a numeric value and currency code
+        
+        Examples:
+            "$1,234.56" -> (1234.56, "USD")
+            "₹ 999" -> (999.0, "INR")
+        """
+        if not price:
+            return None, None
+        
+        return parse_price_string(price)
     
     @staticmethod
     def extract_tags(soup: BeautifulSoup) -> Optional[List[str]]:
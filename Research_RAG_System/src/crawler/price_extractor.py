@@ -0,0 +1,299 @@
+import json
+import re
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+
+# Currency symbols and codes we recognize, mapped to ISO 4217 codes
+CURRENCY_CODES = {
+    '$': 'USD',
+    'US$': 'USD',
+    'USD': 'USD',
+    '€': 'EUR',
+    'EUR': 'EUR',
+    '£': 'GBP',
+    'GBP': 'GBP',
+    '₹': 'INR',
+    'Rs': 'INR',
+    'Rs.': 'INR',
+    'INR': 'INR',
+}
+
+CURRENCY_SYMBOLS = {
+    'USD': '$',
+    'EUR': '€',
+    'GBP': '£',
+    'INR': '₹',
+}
+
+_CURRENCY = r"US\$|\$|€|£|₹|(?<![A-Za-z])(?:USD|EUR|GBP|INR|Rs\.?)"
+_AMOUNT = r"\d{1,3}(?:[,.\u00a0\u202f]\d{3})+(?:[.,]\d{1,2})?|\d+(?:[.,]\d{1,2})?"
+
+# One scanner for every supported format: "$1,234.56", "USD 99", "₹ 1,299", "49,99 €".
+# The leading lookahead lists every character a match can start with, so the
+# regex engine skips ahead to candidates instead of trying each branch at
+# every position.
+PRICE_SCANNER = re.compile(
+    rf"(?=[$€£₹\dUEGIR])(?:"
+    rf"(?P<prefix>{_CURRENCY})\s*(?P<amount>{_AMOUNT})"
+    rf"|(?<![\d.,])(?P<amount_first>{_AMOUNT})\s*(?P<suffix>€|(?:EUR|USD|GBP|INR)(?![A-Za-z]))"
+    rf")"
+)
+
+_AMOUNT_PATTERN = re.compile(_AMOUNT)
+_THOUSANDS_ONLY = re.compile(r"\d{1,3}(?:[,.]\d{3})+")
+
+
+def normalize_amount(amount: str) -> Optional[float]:
+    """
+    Convert a price amount in either decimal convention to a float
+
+    Examples:
+        "1,234.56" -> 1234.56
+        "1.234,56" -> 1234.56
+        "49,99" -> 49.99
+    """
+    amount = amount.replace("\u00a0", "").replace("\u202f", "")
+    if "," in amount and "." in amount:
+        # Whichever separator comes last is the decimal point
+        if amount.rfind(",") > amount.rfind("."):
+            amount = amount.replace(".", "").replace(",", ".")
+        else:
+            amount = amount.replace(",", "")
+    elif _THOUSANDS_ONLY.fullmatch(amount):
+        amount = amount.replace(",", "").replace(".", "")
+    else:
+        amount = amount.replace(",", ".")
+
+    try:
+        return float(amount)
+    except ValueError:
+        return None
+
+
+def format_price(value: float, currency: Optional[str]) -> str:
+    """Display form of a normalized price"""
+    symbol = CURRENCY_SYMBOLS.get(currency)
+    if symbol:
+        return f"{symbol}{value:,.2f}"
+    if currency:
+        return f"{value:,.2f} {currency}"
+    return f"{value:,.2f}"
+
+
+def scan_price(text: str) -> Optional[Tuple[str, float, Optional[str]]]:
+    """
+    Find the first price in a piece of text
+
+    Returns:
+        The matched text, its numeric value and currency code, or None
+    """
+    for match in PRICE_SCANNER.finditer(text):
+        amount = match.group("amount") or match.group("amount_first")
+        value = normalize_amount(amount)
+        if value is not None:
+            currency = CURRENCY_CODES.get(match.group("prefix") or match.group("suffix"))
+            return match.group(0).strip(), value, currency
+    return None
+
+
+def parse_price_string(text: str) -> Tuple[Optional[float], Optional[str]]:
+    """
+    Numeric value and currency code of a price string
+
+    Accepts bare amounts as well, which have no currency.
+    """
+    found = scan_price(text)
+    if found is not None:
+        return found[1], found[2]
+    match = _AMOUNT_PATTERN.search(text)
+    if match:
+        return normalize_amount(match.group(0)), None
+    return None, None
+
+
+def _json_ld_objects(data: Any) -> Iterator[Dict[str, Any]]:
+    """Every object in a JSON-LD document, including @graph members"""
+    if isinstance(data, list):
+        for item in data:
+            yield from _json_ld_objects(item)
+    elif isinstance(data, dict):
+        yield data
+        for key in ("@graph", "offers", "mainEntity", "itemOffered", "priceSpecification"):
+            if key in data:
+                yield from _json_ld_objects(data[key])
+
+
+def _has_type(obj: Dict[str, Any], *types: str) -> bool:
+    declared = obj.get("@type")
+    declared = declared if isinstance(declared, list) else [declared]
+    return any(t in declared for t in types)
+
+
+class PriceCandidates:
+    """
+    Collects price evidence from one page and picks the most reliable
+
+    Sources, from most to least trusted: JSON-LD Product/Offer data,
+    schema.org microdata, og:price / product:price meta tags, text inside
+    elements labelled as a price, and finally any price in the page text.
+    """
+
+    def __init__(self):
+        self.json_ld: Optional[Tuple[float, Optional[str]]] = None
+        self.microdata_amount: Optional[float] = None
+        self.microdata_currency: Optional[str] = None
+        self.meta_amount: Optional[float] = None
+        self.meta_currency: Optional[str] = None
+        self.labelled_text: Optional[Tuple[str, float, Optional[str]]] = None
+        self.text: Optional[Tuple[str, float, Optional[str]]] = None
+
+    @property
+    def has_structured(self) -> bool:
+        """Whether structured data already settled the price"""
+        return self.json_ld is not None or self.microdata_amount is not None or self.meta_amount is not None
+
+    def add_json_ld(self, text: str):
+        """Read offers from a JSON-LD script body"""
+        if self.json_ld is not None:
+            return
+        try:
+            data = json.loads(text)
+        except ValueError:
+            return
+
+        for obj in _json_ld_objects(data):
+            if not _has_type(obj, "Offer", "AggregateOffer", "PriceSpecification", "UnitPriceSpecification"):
+                continue
+            price = obj.get("price", obj.get("lowPrice"))
+            value = self._number(price)
+            if value is not None:
+                currency = obj.get("priceCurrency")
+                self.json_ld = (value, currency.upper() if isinstance(currency, str) else None)
+                return
+
+    def add_microdata(self, itemprop: str, value: Optional[str]):
+        """Record an itemprop="price" or itemprop="priceCurrency" value"""
+        if not value:
+            return
+        if itemprop == "price" and self.microdata_amount is None:
+            self.microdata_amount = self._number(value)
+        elif itemprop == "priceCurrency" and self.microdata_currency is None:
+            self.microdata_currency = value.strip().upper()
+
+    def add_meta(self, prop: str, content: Optional[str]):
+        """Record og:price:* and product:price:* meta tags"""
+        if not content:
+            return
+        if prop in ("og:price:amount", "product:price:amount") and self.meta_amount is None:
+            self.meta_amount = self._number(content)
+        elif prop in ("og:price:currency", "product:price:currency") and self.meta_currency is None:
+            self.meta_currency = content.strip().upper()
+
+    def wants_text(self, labelled: bool) -> bool:
+        """Whether scanning more text could still change the result"""
+        if self.has_structured or self.labelled_text is not None:
+            return False
+        return labelled or self.text is None
+
+    def add_text(self, text: str, labelled: bool = False):
+        """Scan page text; labelled text sits inside an element marked as a price"""
+        if not self.wants_text(labelled):
+            return
+        found = scan_price(text)
+        if found is None:
+            return
+        if labelled:
+            self.labelled_text = found
+        elif self.text is None:
+            self.text = found
+
+    def best(self) -> Tuple[Optional[str], Optional[float], Optional[str]]:
+        """
+        The most reliable price found
+
+        Returns:
+            Display string, numeric value and currency code; all None if
+            the page has no price
+        """
+        if self.json_ld is not None:
+            value, currency = self.json_ld
+            return format_price(value, currency), value, currency
+        if self.microdata_amount is not None:
+            return (
+                format_price(self.microdata_amount, self.microdata_currency),
+                self.microdata_amount,
+                self.microdata_currency
+            )
+        if self.meta_amount is not None:
+            return format_price(self.meta_amount, self.meta_currency), self.meta_amount, self.meta_currency
+        for found in (self.labelled_text, self.text):
+            if found is not None:
+                return found
+        return None, None, None
+
+    @staticmethod
+    def _number(value: Any) -> Optional[float]:
+        """A structured-data price as a float"""
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return float(value)
+        if isinstance(value, str):
+            found = scan_price(value)
+            if found is not None:
+                return found[1]
+            value = value.strip()
+            if _AMOUNT_PATTERN.fullmatch(value):
+                return normalize_amount(value)
+        return None
+
+
+def is_price_label(attrib: Dict[str, str]) -> bool:
+    """Whether an element's class or id marks it as holding the price"""
+    for key in ("class", "id"):
+        value = attrib.get(key)
+        if isinstance(value, list):
+            value = " ".join(value)
+        if value and "price" in value.lower():
+            return True
+    return False
+
+
+# Elements holding a crossed-out price that should be ignored
+STRUCK_TAGS = frozenset(["del", "s", "strike"])
+
+
+def collect_from_soup(soup) -> PriceCandidates:
+    """
+    Collect price evidence from a BeautifulSoup tree
+
+    Must run before script/header/nav/footer elements are removed, since
+    JSON-LD lives in scripts. Mirrors what HTMLExtractor collects while
+    streaming.
+    """
+    candidates = PriceCandidates()
+
+    for script in soup.find_all("script", attrs={"type": "application/ld+json"}):
+        candidates.add_json_ld(script.string or "")
+
+    for element in soup.find_all(attrs={"itemprop": ["price", "priceCurrency"]}):
+        value = element.get("content")
+        if value is None:
+            value = element.get_text()
+        candidates.add_microdata(element["itemprop"], value)
+
+    for meta in soup.find_all("meta", attrs={"property": True}):
+        candidates.add_meta(meta["property"], meta.get("content"))
+
+    if candidates.has_structured:
+        return candidates
+
+    skipped = ("script", "style", "nav", "footer", "header", "template") + tuple(STRUCK_TAGS)
+    for string in soup.find_all(string=True):
+        if type(string).__name__ != "NavigableString":
+            continue
+        if any(parent.name in skipped for parent in string.parents):
+            continue
+        labelled = any(is_price_label(parent.attrs) for parent in string.parents if parent.name)
+        candidates.add_text(string, labelled)
+        if not candidates.wants_text(True) and not candidates.wants_text(False):
+            break
+    return candidates
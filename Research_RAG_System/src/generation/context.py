@@ -0,0 +1,141 @@
+from typing import List, Dict, Any, Optional
+from src.config.settings import settings
+from src.processing.tokens import count_tokens, truncate_to_tokens
+
+
+# Passages shorter than this are not worth adding when the budget runs out
+MIN_PASSAGE_TOKENS = 32
+
+# Characters of a chunk's start searched for in the previous chunk's end
+OVERLAP_PROBE_CHARS = 16
+
+
+def merge_overlapping(previous: str, following: str) -> str:
+    """
+    Join two consecutive chunks of a page, dropping the text they share
+
+    Consecutive chunks overlap by up to chunk_overlap_tokens, so the start of
+    the following chunk usually repeats the end of the previous one.
+    """
+    # The leftmost match that runs to the end of previous is the full overlap
+    probe = following[:OVERLAP_PROBE_CHARS]
+    position = previous.find(probe, max(len(previous) - len(following), 0)) if probe else -1
+    while position != -1:
+        if following.startswith(previous[position:]):
+            return previous[:position] + following
+        position = previous.find(probe, position + 1)
+    return previous + " " + following
+
+
+class PackedContext:
+    """Context text built for a prompt, with its size"""
+
+    def __init__(self, text: str, tokens: int, sources: List[Dict[str, Any]]):
+        self.text = text
+        self.tokens = tokens
+        # One entry per product page included: its metadata and chunk IDs
+        self.sources = sources
+
+
+class ContextBuilder:
+    """
+    Builds the LLM context from retrieved chunks within a token budget
+
+    Chunks are grouped by page URL in retrieval order. Within a page,
+    repeated and contained chunks are dropped and runs of consecutive
+    chunk_index values are merged into one passage without their overlap.
+    Pages are then added best first, each with one header, until the
+    budget is spent; the last page that does not fit is cut to the
+    remaining tokens.
+    """
+
+    def __init__(self, token_budget: int = None, model: str = None):
+        self.token_budget = token_budget or settings.context_token_budget
+        self.model = model or settings.llm_model
+
+    def build(self, docs: List[Dict[str, Any]]) -> PackedContext:
+        """
+        Pack retrieved documents into a context string
+
+        Args:
+            docs: Retrieved documents with 'content' and 'metadata', best first
+
+        Returns:
+            PackedContext with the text, its token count and the pages used
+        """
+        entries = []
+        sources = []
+        used = 0
+        for page in self._group_by_page(docs):
+            if self.token_budget - used < MIN_PASSAGE_TOKENS:
+                break
+
+            header = self._header(len(entries) + 1, page['metadata'])
+            body = "\n...\n".join(page['passages'])
+            entry = f"{header}Description: {body}"
+            tokens = count_tokens(entry, self.model)
+            if used + tokens > self.token_budget:
+                remaining = self.token_budget - used - count_tokens(header + "Description: ", self.model)
+                if remaining < MIN_PASSAGE_TOKENS:
+                    break
+                entry = f"{header}Description: {truncate_to_tokens(body, remaining, self.model)}..."
+                tokens = count_tokens(entry, self.model)
+
+            entries.append(entry)
+            sources.append({'metadata': page['metadata'], 'ids': page['ids']})
+            # Entries are joined by a blank line
+            used += tokens + (1 if len(entries) > 1 else 0)
+
+        if not entries:
+            return PackedContext("No relevant information found.", 0, [])
+        return PackedContext("\n\n".join(entries), used, sources)
+
+    @staticmethod
+    def _header(number: int, metadata: Dict[str, Any]) -> str:
+        """Product header shown once per page"""
+        lines = [f"[Product {number}]"]
+        if metadata.get('title'):
+            lines.append(f"Title: {metadata['title']}")
+        if metadata.get('price'):
+            lines.append(f"Price: {metadata['price']}")
+        if metadata.get('url'):
+            lines.append(f"URL: {metadata['url']}")
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _group_by_page(docs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Deduplicated, merged passages per page, pages in retrieval order"""
+        pages: Dict[str, Dict[str, Any]] = {}
+        for doc in docs:
+            metadata = doc.get('metadata') or {}
+            key = metadata.get('url') or doc.get('id') or doc.get('content', '')
+            page = pages.get(key)
+            if page is None:
+                page = pages[key] = {'metadata': metadata, 'chunks': {}, 'ids': []}
+            content = doc.get('content', '')
+            normalized = " ".join(content.split())
+            if not normalized or normalized in page['chunks']:
+                continue
+            page['chunks'][normalized] = (metadata.get('chunk_index'), content)
+            if doc.get('id'):
+                page['ids'].append(doc['id'])
+
+        grouped = []
+        for page in pages.values():
+            chunks = list(page['chunks'].values())
+            # Indexed chunks in page order; unindexed ones keep retrieval order after them
+            indexed = sorted((chunk for chunk in chunks if chunk[0] is not None), key=lambda chunk: chunk[0])
+            ordered = indexed + [chunk for chunk in chunks if chunk[0] is None]
+
+            passages: List[str] = []
+            last_index: Optional[int] = None
+            for index, content in ordered:
+                if passages and any(content in passage for passage in passages):
+                    continue
+                if passages and index is not None and last_index is not None and index == last_index + 1:
+                    passages[-1] = merge_overlapping(passages[-1], content)
+                else:
+                    passages.append(content)
+                last_index = index
+            grouped.append({'metadata': page['metadata'], 'passages': passages, 'ids': page['ids']})
+        return grouped
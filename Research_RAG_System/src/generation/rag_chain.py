@@ -1,7 +1,23 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, AsyncIterator, Iterator, Optional, Tuple
 from langchain_openai import ChatOpenAI
+from langchain_core.messages import BaseMessage
 from langchain_core.prompts import ChatPromptTemplate
 from src.config.settings import settings
+from src.generation.context import ContextBuilder, PackedContext
+from src.observability.tracing import span
+from src.processing.tokens import count_chat_tokens
+from src.retrieval.query_cache import QueryCache
+from src.utils.rate_limiter import openai_http_clients
+from src.utils.singleflight import SingleFlight
+
+
+class Prompt:
+    """Messages for one generation, with their prompt token count"""
+    
+    def __init__(self, messages: List[BaseMessage], tokens: int, context: PackedContext):
+        self.messages = messages
+        self.tokens = tokens
+        self.context = context
 
 
 class RAGChain:
@@ -11,7 +27,8 @@ class RAGChain:
         self.llm = ChatOpenAI(
             model=settings.llm_model,
             api_key=settings.openai_api_key,
-            temperature=0.7
+            temperature=0.7,
+            **openai_http_clients()
         )
         
         self.prompt_template = ChatPromptTemplate.from_messages([
@@ -25,52 +42,127 @@ class RAGChain:
             """),
             ("human", "{question}")
         ])
+        
+        self.context_builder = ContextBuilder()
+        self.flights = SingleFlight("generate")
     
-    def generate(self, query: str, retrieved_docs: List[Dict[str, Any]]) -> str:
+    def generate(self, query: str, retrieved_docs: List[Dict[str, Any]], prompt: Optional[Prompt] = None) -> str:
         """
         Generate answer using retrieved documents
         
+        Concurrent calls for the same normalized query and documents share
+        one LLM call.
+        
         Args:
             query: User's question
             retrieved_docs: List of retrieved documents with metadata
+            prompt: Prompt already built by build_prompt, if any
             
         Returns:
             Generated answer
         """
-        # Format context from retrieved documents
-        context = self._format_context(retrieved_docs)
+        prompt = prompt or self.build_prompt(query, retrieved_docs)
         
-        # Create prompt
-        messages = self.prompt_template.format_messages(
-            context=context,
-            question=query
-        )
+        if not settings.single_flight_enabled:
+            return self._invoke(prompt)
+        return self.flights.do_sync(self._flight_key(query, retrieved_docs), lambda: self._invoke(prompt))
+    
+    async def agenerate(self, query: str, retrieved_docs: List[Dict[str, Any]], prompt: Optional[Prompt] = None) -> str:
+        """Async generate using the LLM's async client"""
+        prompt = prompt or self.build_prompt(query, retrieved_docs)
         
+        if not settings.single_flight_enabled:
+            return await self._ainvoke(prompt)
+        return await self.flights.do(self._flight_key(query, retrieved_docs), lambda: self._ainvoke(prompt))
+    
+    def _invoke(self, prompt: Prompt) -> str:
         # Generate response
-        response = self.llm.invoke(messages)
+        with span("llm.generate", prompt_tokens=prompt.tokens) as s:
+            response = self.llm.invoke(prompt.messages)
+            s.set(**self._usage(response))
         
         return response.content
     
-    def _format_context(self, docs: List[Dict[str, Any]]) -> str:
-        """Format retrieved documents into context string"""
-        if not docs:
-            return "No relevant information found."
+    async def _ainvoke(self, prompt: Prompt) -> str:
+        with span("llm.generate", prompt_tokens=prompt.tokens) as s:
+            response = await self.llm.ainvoke(prompt.messages)
+            s.set(**self._usage(response))
         
-        context_parts = []
-        for i, doc in enumerate(docs, 1):
-            metadata = doc.get('metadata', {})
-            content = doc.get('content', '')
-            
-            # Build context entry
-            entry = f"[Product {i}]\n"
-            if metadata.get('title'):
-                entry += f"Title: {metadata['title']}\n"
-            if metadata.get('price'):
-                entry += f"Price: {metadata['price']}\n"
-            if metadata.get('url'):
-                entry += f"URL: {metadata['url']}\n"
-            entry += f"Description: {content[:500]}...\n"  # Limit content length
+        return response.content
+    
+    @staticmethod
+    def _flight_key(query: str, retrieved_docs: List[Dict[str, Any]]) -> Tuple[str, Tuple[str, ...]]:
+        """Calls with equal keys build the same prompt"""
+        return QueryCache.normalize_query(query), tuple(doc.get('id') or doc.get('content', '') for doc in retrieved_docs)
+    
+    def stream(self, query: str, retrieved_docs: List[Dict[str, Any]], prompt: Optional[Prompt] = None) -> Iterator[str]:
+        """
+        Generate an answer, yielding tokens as the model produces them
+        
+        Args:
+            query: User's question
+            retrieved_docs: List of retrieved documents with metadata
+            prompt: Prompt already built by build_prompt, if any
             
-            context_parts.append(entry)
+        Yields:
+            Answer text fragments
+        """
+        prompt = prompt or self.build_prompt(query, retrieved_docs)
         
-        return "\n\n".join(context_parts)
\ No newline at end of file
+        with span("llm.stream", prompt_tokens=prompt.tokens) as s:
+            fragments = 0
+            for chunk in self.llm.stream(prompt.messages):
+                if chunk.content:
+                    fragments += 1
+                    s.set(fragments=fragments)
+                    yield chunk.content
+    
+    async def astream(self, query: str, retrieved_docs: List[Dict[str, Any]], prompt: Optional[Prompt] = None) -> AsyncIterator[str]:
+        """Async stream using the LLM's async client"""
+        prompt = prompt or self.build_prompt(query, retrieved_docs)
+        
+        with span("llm.stream", prompt_tokens=prompt.tokens) as s:
+            fragments = 0
+            async for chunk in self.llm.astream(prompt.messages):
+                if chunk.content:
+                    fragments += 1
+                    s.set(fragments=fragments)
+                    yield chunk.content
+    
+    def build_prompt(self, query: str, retrieved_docs: List[Dict[str, Any]]) -> Prompt:
+        """
+        Build the prompt messages for a query and its retrieved documents
+        
+        The context is packed to settings.context_token_budget tokens of
+        settings.llm_model.
+        
+        Args:
+            query: User's question
+            retrieved_docs: List of retrieved documents with metadata, best first
+            
+        Returns:
+            Prompt with the messages and their token count
+        """
+        with span("prompt.build", docs=len(retrieved_docs)) as s:
+            context = self.context_builder.build(retrieved_docs)
+            
+            # Create prompt
+            messages = self.prompt_template.format_messages(
+                context=context.text,
+                question=query
+            )
+            tokens = count_chat_tokens([message.content for message in messages], settings.llm_model)
+            s.set(context_tokens=context.tokens, prompt_tokens=tokens, pages=len(context.sources))
+        return Prompt(messages, tokens, context)
+    
+    @staticmethod
+    def _usage(response: BaseMessage) -> Dict[str, int]:
+        """Token usage reported by the model, if any"""
+        usage = getattr(response, 'usage_metadata', None)
+        if not usage:
+            return {}
+        return {'completion_tokens': usage.get('output_tokens', 0), 'billed_prompt_tokens': usage.get('input_tokens', 0)}
+    
+    def _format_context(self, docs: List[Dict[str, Any]]) -> str:
+        """Format retrieved documents into context string"""
+        return self.context_builder.build(docs).text
\ No newline at end of file
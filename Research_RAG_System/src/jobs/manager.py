@@ -0,0 +1,358 @@
+import asyncio
+import logging
+import time
+from concurrent.futures import Future
+from typing import Dict, Any, List, Optional, Set
+from fastapi.concurrency import run_in_threadpool
+from src.config.settings import settings
+from src.observability.tracing import increment, span
+from src.crawler.async_crawler import AsyncCrawler
+from src.processing.pool import ProcessingPool
+from src.vectorstore.bulk_writer import BulkVectorWriter
+from src.vectorstore.fingerprint_index import FingerprintIndex
+from src.retrieval.query_cache import QueryCache
+from src.jobs.store import JobStore, FINISHED_STATES
+
+logger = logging.getLogger(__name__)
+
+
+class IngestionJobManager:
+    """Runs queued crawl jobs through the ingestion pipeline with a pool of workers"""
+
+    def __init__(
+        self,
+        store: JobStore,
+        crawler: AsyncCrawler,
+        processing_pool: ProcessingPool,
+        writer: BulkVectorWriter,
+        fingerprints: FingerprintIndex,
+        query_cache: Optional[QueryCache] = None,
+        workers: int = None,
+        poll_interval: float = 1.0
+    ):
+        self.store = store
+        self.crawler = crawler
+        self.processing_pool = processing_pool
+        self.writer = writer
+        self.fingerprints = fingerprints
+        self.query_cache = query_cache
+        self.workers = workers or settings.ingestion_workers
+        self.poll_interval = poll_interval
+
+        self._tasks: List[asyncio.Task] = []
+        self._pending_writes: Set[asyncio.Task] = set()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._invalidation_id = 0
+
+    async def start(self):
+        """
+        Start the worker pool, resuming work interrupted by a restart
+
+        With several API worker processes only the one holding the vector
+        store's writer lock ingests; the others queue submitted jobs for it
+        and stand by to take over if it exits. Every process drops cached
+        answers for pages the writer re-ingests.
+        """
+        self._wakeup = asyncio.Event()
+        if self.query_cache is not None:
+            self._invalidation_id = await run_in_threadpool(self.store.last_invalidation_id)
+            self._tasks.append(asyncio.create_task(self._sync_cache()))
+        if self.writer.vector_store.is_writer:
+            await self._start_workers()
+        else:
+            logger.info("Another process is ingesting into the vector store; this one serves queries and stands by")
+            self._tasks.append(asyncio.create_task(self._standby()))
+
+    async def _start_workers(self):
+        """Requeue URLs left running by the previous writer and start the workers"""
+        requeued = await run_in_threadpool(self.store.requeue_interrupted)
+        if requeued:
+            logger.info("Requeued %d interrupted URLs", requeued)
+
+        self.writer.start()
+        self._tasks += [
+            asyncio.create_task(self._worker(f"worker-{i}"))
+            for i in range(self.workers)
+        ]
+
+    async def _standby(self):
+        """Take over ingestion once the writing process releases the writer lock"""
+        while True:
+            await asyncio.sleep(settings.writer_failover_interval)
+            if await run_in_threadpool(self.writer.vector_store.acquire_writer):
+                logger.info("Took over ingestion from the previous writer process")
+                await self._start_workers()
+                return
+
+    async def _sync_cache(self):
+        """Apply query cache invalidations published by the writing process"""
+        while True:
+            await asyncio.sleep(settings.query_cache_sync_interval)
+            try:
+                self._invalidation_id, urls = await run_in_threadpool(self.store.invalidations_since, self._invalidation_id)
+            except Exception as e:
+                logger.error("Error reading query cache invalidations: %s", e)
+                continue
+            if urls:
+                self.query_cache.invalidate_urls(urls)
+
+    async def stop(self):
+        """Stop the worker pool; unfinished URLs are resumed on the next start"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+        # Write whatever is still buffered so finished URLs are recorded
+        await run_in_threadpool(self.writer.close)
+        await asyncio.gather(*self._pending_writes, return_exceptions=True)
+
+    async def submit(self, urls: List[str]) -> str:
+        """
+        Queue URLs for ingestion
+
+        Args:
+            urls: URLs to crawl and store
+
+        Returns:
+            The job id
+        """
+        job_id = await run_in_threadpool(self.store.create_job, urls)
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return job_id
+
+    async def _worker(self, name: str):
+        """Claim and process pending URLs until cancelled"""
+        while True:
+            self._wakeup.clear()
+            entry = None
+            try:
+                entry = await run_in_threadpool(self.store.claim_next, name)
+                if entry is None:
+                    await self._wait_for_work()
+                    continue
+                await self._process(entry)
+            except Exception as e:
+                # Keep the worker alive; a claimed URL is recorded as failed
+                # rather than left running until the next restart
+                logger.exception("Ingestion worker %s failed on %s", name, entry['url'] if entry else "claim")
+                if entry is None:
+                    await self._wait_for_work()
+                    continue
+                increment("ingest_urls", status="failed")
+                try:
+                    await run_in_threadpool(self.store.finish_url, entry['id'], 'failed', 0, str(e))
+                except Exception:
+                    logger.exception("Could not record failure of %s", entry['url'])
+
+    async def _wait_for_work(self):
+        """Sleep until a job is submitted or the poll interval passes"""
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _process(self, entry: Dict[str, Any]):
+        """Crawl a claimed URL and hand its chunks to the bulk writer"""
+        try:
+            plan = await self.prepare_url(entry['url'])
+        except Exception as e:
+            plan = {'status': 'failed', 'error': str(e)}
+
+        if plan['status'] != 'write':
+            increment("ingest_urls", status=plan['status'])
+            await run_in_threadpool(
+                self.store.finish_url, entry['id'], plan['status'], 0, plan.get('error')
+            )
+            return
+
+        # Record the URL once its chunks are flushed, without
+        # holding the worker while the writer buffers
+        stored = await run_in_threadpool(self.writer.add, plan['new_chunks'])
+        task = asyncio.create_task(self._commit_when_stored(entry['id'], plan, stored))
+        self._pending_writes.add(task)
+        task.add_done_callback(self._pending_writes.discard)
+
+    async def prepare_url(self, url: str) -> Dict[str, Any]:
+        """
+        Crawl, clean and chunk a single URL and work out what changed
+
+        Unchanged pages are detected by a conditional GET (304) or by
+        comparing the cleaned page with its stored fingerprint. For changed
+        pages only chunks whose deterministic ID is new need embedding.
+
+        Args:
+            url: The URL to ingest
+
+        Returns:
+            Dictionary with a 'status'. 'write' plans also carry the
+            'new_chunks' to store, the 'kept_chunks' already stored, the
+            'stale_ids' to delete and the page 'fingerprint'.
+        """
+        previous = await run_in_threadpool(self.fingerprints.get, url)
+        with span("ingest.crawl") as s:
+            crawl_result = await self.crawler.crawl(
+                url,
+                etag=previous['etag'] if previous else None,
+                last_modified=previous['last_modified'] if previous else None
+            )
+            s.set(chars=len(crawl_result.get('text') or ''))
+
+        if crawl_result.get('not_modified'):
+            return {'status': 'unchanged', 'error': None}
+
+        if crawl_result.get('error'):
+            return {'status': 'failed', 'error': crawl_result['error']}
+
+        if not crawl_result['text']:
+            return {'status': 'skipped', 'error': "No content extracted"}
+
+        # Clean and chunk in a worker process; chunking is skipped when the
+        # fingerprint shows the page is unchanged
+        with span("ingest.process") as s:
+            processed = await self.processing_pool.process(
+                crawl_result['text'],
+                crawl_result['metadata'],
+                previous['content_hash'] if previous else None
+            )
+            s.set(chunks=len(processed['chunks'].ids) if processed['chunks'] else 0)
+        fingerprint = processed['fingerprint']
+
+        if previous and previous['content_hash'] == fingerprint:
+            await run_in_threadpool(
+                self.fingerprints.update_validators,
+                url,
+                crawl_result.get('etag'),
+                crawl_result.get('last_modified')
+            )
+            return {'status': 'unchanged', 'error': None}
+
+        document = processed['chunks']
+
+        if not document:
+            return {'status': 'skipped', 'error': "No chunks created"}
+
+        # Chunks stored by an earlier crawl (or before fingerprints existed)
+        if previous:
+            stored_ids = set(previous['chunk_ids'])
+        else:
+            stored_ids = set(await run_in_threadpool(self.writer.vector_store.get_ids_for_url, url))
+        current_ids = set(document.ids)
+
+        # Only new chunks need their text; kept chunks just get fresh metadata
+        return {
+            'status': 'write',
+            'url': url,
+            'new_chunks': [document.chunk(i) for i, chunk_id in enumerate(document.ids) if chunk_id not in stored_ids],
+            'kept_chunks': [
+                {'id': chunk_id, 'metadata': document.metadata_of(i)}
+                for i, chunk_id in enumerate(document.ids) if chunk_id in stored_ids
+            ],
+            'stale_ids': list(stored_ids - current_ids),
+            'fingerprint': fingerprint,
+            'etag': crawl_result.get('etag'),
+            'last_modified': crawl_result.get('last_modified')
+        }
+
+    async def _commit_when_stored(self, entry_id: int, plan: Dict[str, Any], stored: Future):
+        """Finish replacing a page once the bulk writer stores its new chunks"""
+        try:
+            await asyncio.wrap_future(stored)
+            await run_in_threadpool(self._commit, plan)
+            result = {'status': 'done', 'chunks': len(plan['new_chunks']), 'error': None}
+        except Exception as e:
+            result = {'status': 'failed', 'chunks': 0, 'error': str(e)}
+        increment("ingest_urls", status=result['status'])
+        increment("ingest_chunks", result['chunks'])
+        try:
+            await run_in_threadpool(self.store.finish_url, entry_id, **result)
+        except Exception:
+            logger.exception("Could not record the outcome of %s", plan['url'])
+
+    def _commit(self, plan: Dict[str, Any]):
+        """Refresh kept chunks, drop stale ones and record the new fingerprint"""
+        vector_store = self.writer.vector_store
+        kept = plan['kept_chunks']
+
+        # Kept chunks keep their embeddings; only page-level metadata such as
+        # total_chunks may have changed
+        vector_store.update_metadatas([chunk['id'] for chunk in kept], [chunk['metadata'] for chunk in kept])
+        vector_store.delete(plan['stale_ids'])
+
+        self.fingerprints.put(
+            plan['url'],
+            plan['fingerprint'],
+            [chunk['id'] for chunk in plan['new_chunks'] + kept],
+            etag=plan['etag'],
+            last_modified=plan['last_modified']
+        )
+
+        # Cached answers citing this page are now stale, here and in the
+        # other API workers
+        if self.query_cache is not None:
+            self.query_cache.invalidate_urls([plan['url']])
+            self.store.publish_invalidations([plan['url']])
+
+    async def get_status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Summarize a job's progress
+
+        Args:
+            job_id: The job id
+
+        Returns:
+            Job status dictionary, or None if the job is unknown
+        """
+        job = await run_in_threadpool(self.store.get_job, job_id)
+        if job is None:
+            return None
+
+        urls = job['urls']
+        counts = {state: 0 for state in ('pending', 'running') + FINISHED_STATES}
+        for entry in urls:
+            counts[entry['status']] += 1
+        finished = sum(counts[state] for state in FINISHED_STATES)
+
+        if job['finished_at']:
+            status = "completed_with_errors" if counts['failed'] else "completed"
+        elif job['started_at']:
+            status = "running"
+        else:
+            status = "queued"
+
+        # Throughput over the time the job has been running
+        urls_per_second = None
+        if job['started_at'] and finished:
+            elapsed = (job['finished_at'] or time.time()) - job['started_at']
+            urls_per_second = finished / elapsed if elapsed > 0 else None
+
+        return {
+            'job_id': job['id'],
+            'status': status,
+            'total_urls': job['total_urls'],
+            'pending': counts['pending'],
+            'running': counts['running'],
+            'done': counts['done'],
+            'skipped': counts['skipped'],
+            'unchanged': counts['unchanged'],
+            'failed': counts['failed'],
+            'chunks_created': sum(entry['chunks'] for entry in urls),
+            'urls_per_second': urls_per_second,
+            'created_at': job['created_at'],
+            'started_at': job['started_at'],
+            'finished_at': job['finished_at'],
+            'urls': [
+                {
+                    'url': entry['url'],
+                    'status': entry['status'],
+                    'chunks': entry['chunks'],
+                    'error': entry['error'],
+                    'duration': (
+                        entry['finished_at'] - entry['started_at']
+                        if entry['finished_at'] and entry['started_at'] else None
+                    )
+                }
+                for entry in urls
+            ]
+        }
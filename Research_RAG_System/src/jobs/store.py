@@ -0,0 +1,233 @@
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Dict, Any, List, Optional, Tuple
+from src.config.settings import settings
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    total_urls INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS job_urls (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id TEXT NOT NULL REFERENCES jobs(id),
+    position INTEGER NOT NULL,
+    url TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    chunks INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    worker TEXT,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_job_urls_status ON job_urls(status, id);
+CREATE INDEX IF NOT EXISTS idx_job_urls_job ON job_urls(job_id, position);
+CREATE TABLE IF NOT EXISTS cache_invalidations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    url TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+"""
+
+# URL states that are final
+FINISHED_STATES = ('done', 'unchanged', 'skipped', 'failed')
+
+
+class JobStore:
+    """Persists ingestion jobs and their per-URL progress in SQLite"""
+
+    def __init__(self, path: str = None):
+        self.path = path or settings.jobs_db_path
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    def create_job(self, urls: List[str]) -> str:
+        """
+        Create a job with one pending entry per URL
+
+        Args:
+            urls: URLs to ingest
+
+        Returns:
+            The new job id
+        """
+        job_id = uuid.uuid4().hex
+        # Leaving the connection context rolls back a failed transaction, so
+        # the shared connection can start the next one
+        with self._lock, self.conn:
+            self.conn.execute("BEGIN")
+            self.conn.execute(
+                "INSERT INTO jobs (id, created_at, total_urls) VALUES (?, ?, ?)",
+                (job_id, time.time(), len(urls))
+            )
+            self.conn.executemany(
+                "INSERT INTO job_urls (job_id, position, url) VALUES (?, ?, ?)",
+                [(job_id, i, url) for i, url in enumerate(urls)]
+            )
+        return job_id
+
+    def claim_next(self, worker: str) -> Optional[Dict[str, Any]]:
+        """
+        Atomically claim the oldest pending URL
+
+        Args:
+            worker: Name of the claiming worker
+
+        Returns:
+            The claimed URL entry, or None if nothing is pending
+        """
+        now = time.time()
+        with self._lock, self.conn:
+            self.conn.execute("BEGIN IMMEDIATE")
+            row = self.conn.execute(
+                "SELECT id, job_id, url FROM job_urls WHERE status = 'pending' ORDER BY id LIMIT 1"
+            ).fetchone()
+            if row is None:
+                return None
+
+            self.conn.execute(
+                "UPDATE job_urls SET status = 'running', worker = ?, started_at = ? WHERE id = ?",
+                (worker, now, row['id'])
+            )
+            self.conn.execute(
+                "UPDATE jobs SET started_at = ? WHERE id = ? AND started_at IS NULL",
+                (now, row['job_id'])
+            )
+        return dict(row)
+
+    def finish_url(self, entry_id: int, status: str, chunks: int = 0, error: Optional[str] = None):
+        """
+        Record the outcome of a claimed URL
+
+        Args:
+            entry_id: Id of the job URL entry
+            status: One of 'done', 'unchanged', 'skipped' or 'failed'
+            chunks: Number of chunks stored
+            error: Error message, if any
+        """
+        now = time.time()
+        with self._lock, self.conn:
+            self.conn.execute("BEGIN IMMEDIATE")
+            self.conn.execute(
+                "UPDATE job_urls SET status = ?, chunks = ?, error = ?, finished_at = ? WHERE id = ?",
+                (status, chunks, error, now, entry_id)
+            )
+            # Close the job once its last URL finishes
+            self.conn.execute(
+                """
+                UPDATE jobs SET finished_at = ?
+                WHERE id = (SELECT job_id FROM job_urls WHERE id = ?)
+                AND NOT EXISTS (
+                    SELECT 1 FROM job_urls
+                    WHERE job_id = jobs.id AND status IN ('pending', 'running')
+                )
+                """,
+                (now, entry_id)
+            )
+
+    def requeue_interrupted(self) -> int:
+        """
+        Return URLs left running by a previous process to the queue
+
+        Only the process holding the vector store's writer lock runs
+        workers, so every running URL belongs to a writer that has exited.
+
+        Returns:
+            Number of URLs requeued
+        """
+        with self._lock:
+            cursor = self.conn.execute(
+                "UPDATE job_urls SET status = 'pending', worker = NULL, started_at = NULL "
+                "WHERE status = 'running'"
+            )
+        return cursor.rowcount
+
+    def publish_invalidations(self, urls: List[str]):
+        """
+        Tell every API worker that cached answers citing these URLs are stale
+
+        Entries older than the query cache TTL are dropped, since no worker
+        can still hold an answer cached before them.
+
+        Args:
+            urls: URLs whose stored content changed
+        """
+        now = time.time()
+        with self._lock, self.conn:
+            self.conn.execute("BEGIN IMMEDIATE")
+            self.conn.executemany(
+                "INSERT INTO cache_invalidations (url, created_at) VALUES (?, ?)",
+                [(url, now) for url in urls]
+            )
+            self.conn.execute(
+                "DELETE FROM cache_invalidations WHERE created_at < ?",
+                (now - settings.query_cache_ttl_seconds,)
+            )
+
+    def invalidations_since(self, after_id: int) -> Tuple[int, List[str]]:
+        """
+        URLs published by publish_invalidations after a given entry
+
+        Args:
+            after_id: Last entry already seen, 0 for all
+
+        Returns:
+            (last entry id, URLs) tuple
+        """
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT id, url FROM cache_invalidations WHERE id > ? ORDER BY id",
+                (after_id,)
+            ).fetchall()
+        if not rows:
+            return after_id, []
+        return rows[-1]['id'], [row['url'] for row in rows]
+
+    def last_invalidation_id(self) -> int:
+        """Id of the newest invalidation entry, 0 if there is none"""
+        with self._lock:
+            row = self.conn.execute("SELECT MAX(id) FROM cache_invalidations").fetchone()
+        return row[0] or 0
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a job with its per-URL progress
+
+        Args:
+            job_id: The job id
+
+        Returns:
+            Job dictionary with a 'urls' list, or None if the job is unknown
+        """
+        with self._lock:
+            job = self.conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if job is None:
+                return None
+            urls = self.conn.execute(
+                "SELECT url, status, chunks, error, started_at, finished_at "
+                "FROM job_urls WHERE job_id = ? ORDER BY position",
+                (job_id,)
+            ).fetchall()
+
+        result = dict(job)
+        result['urls'] = [dict(row) for row in urls]
+        return result
+
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            self.conn.close()
@@ -17,14 +17,42 @@ class CrawlRequest(BaseModel):
         }
 
 
-class CrawlResponse(BaseModel):
-    """Response model after crawling"""
-    status: str = Field(..., description="Status of the crawl operation")
-    documents_processed: int = Field(..., description="Number of documents processed")
-    chunks_created: int = Field(..., description="Number of text chunks created")
+class CrawlJobResponse(BaseModel):
+    """Response model after queueing a crawl job"""
+    job_id: str = Field(..., description="Id of the ingestion job")
+    status: str = Field(..., description="Status of the job")
+    urls_queued: int = Field(..., description="Number of URLs queued")
     message: str = Field(..., description="Human-readable message")
 
 
+class JobURLStatus(BaseModel):
+    """Progress of a single URL within a job"""
+    url: str = Field(..., description="The crawled URL")
+    status: str = Field(..., description="pending, running, done, unchanged, skipped or failed")
+    chunks: int = Field(..., description="Number of new or changed text chunks stored")
+    error: Optional[str] = Field(None, description="Error message, if any")
+    duration: Optional[float] = Field(None, description="Processing time in seconds")
+
+
+class JobStatusResponse(BaseModel):
+    """Response model for ingestion job progress"""
+    job_id: str = Field(..., description="Id of the ingestion job")
+    status: str = Field(..., description="queued, running, completed or completed_with_errors")
+    total_urls: int = Field(..., description="Number of URLs in the job")
+    pending: int = Field(..., description="URLs waiting for a worker")
+    running: int = Field(..., description="URLs being processed")
+    done: int = Field(..., description="URLs stored successfully")
+    unchanged: int = Field(..., description="URLs unchanged since their last crawl")
+    skipped: int = Field(..., description="URLs that produced no content")
+    failed: int = Field(..., description="URLs that failed")
+    chunks_created: int = Field(..., description="Number of text chunks stored")
+    urls_per_second: Optional[float] = Field(None, description="Throughput since the job started")
+    created_at: float = Field(..., description="Unix time the job was created")
+    started_at: Optional[float] = Field(None, description="Unix time the first URL was claimed")
+    finished_at: Optional[float] = Field(None, description="Unix time the last URL finished")
+    urls: List[JobURLStatus] = Field(..., description="Per-URL progress")
+
+
 class QueryRequest(BaseModel):
     """Request model for querying the RAG system"""
     query: str = Field(..., description="Natural language query")
@@ -43,7 +71,7 @@ class Source(BaseModel):
     """Model for a single source document"""
     content: str = Field(..., description="Text content of the source")
     metadata: Dict[str, Any] = Field(..., description="Metadata about the source")
-    relevance_score: Optional[float] = Field(None, description="Similarity score")
+    relevance_score: Optional[float] = Field(None, description="Reciprocal-rank fusion score (higher is better)")
 
 
 class QueryResponse(BaseModel):
@@ -51,6 +79,34 @@ class QueryResponse(BaseModel):
     answer: str = Field(..., description="Generated answer from the RAG system")
     sources: List[Source] = Field(..., description="Source documents used to generate the answer")
     query: str = Field(..., description="Original query")
+    cached: bool = Field(False, description="Whether the answer was served from the query cache")
+    prompt_tokens: Optional[int] = Field(None, description="Tokens in the prompt sent to the LLM, 0 when served from the cache")
+
+
+class BatchQueryRequest(BaseModel):
+    """Request model for answering several queries in one call"""
+    queries: List[QueryRequest] = Field(..., min_length=1, description="Queries to answer")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "queries": [
+                    {"query": "Best laptop for programming"},
+                    {"query": "Noise cancelling headphones", "filters": {"price_max": 200}}
+                ]
+            }
+        }
+
+
+class BatchQueryItem(BaseModel):
+    """Answer or error for one query of a batch"""
+    result: Optional[QueryResponse] = Field(None, description="The answer, if the query succeeded")
+    error: Optional[str] = Field(None, description="Error message, if the query failed")
+
+
+class BatchQueryResponse(BaseModel):
+    """Response model for batch queries"""
+    results: List[BatchQueryItem] = Field(..., description="One item per query, in request order")
 
 
 class ProductMetadata(BaseModel):
@@ -58,6 +114,8 @@ class ProductMetadata(BaseModel):
     title: Optional[str] = None
     description: Optional[str] = None
     price: Optional[str] = None
+    price_value: Optional[float] = None
+    price_currency: Optional[str] = None
     tags: Optional[List[str]] = None
     url: str
     
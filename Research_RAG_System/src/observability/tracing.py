@@ -0,0 +1,298 @@
+import contextvars
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from src.config.settings import settings
+
+
+# Upper bounds of the stage duration histogram buckets, in seconds
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Span attributes that count work done and are summed into rag_stage_<attribute>_total.
+# Others, such as k or shards, describe the call and stay on the span only
+COUNTER_ATTRIBUTES = frozenset({
+    "billed_prompt_tokens",
+    "candidates",
+    "chars",
+    "chunks",
+    "completion_tokens",
+    "context_tokens",
+    "fragments",
+    "hits",
+    "prompt_tokens",
+    "queries",
+    "results",
+    "texts",
+    "tokens",
+    "urls",
+})
+
+
+class Span:
+    """
+    One timed stage of a request or ingestion
+
+    Attributes listed in COUNTER_ATTRIBUTES (token counts, result sizes)
+    are added to per-stage counters when the span ends; all attributes stay
+    on the span for the request trace.
+    """
+
+    __slots__ = ("name", "attributes", "start", "duration", "error")
+
+    def __init__(self, name: str, attributes: Dict[str, Any]):
+        self.name = name
+        self.attributes = attributes
+        self.start = 0.0
+        self.duration = 0.0
+        self.error = False
+
+    def set(self, **attributes):
+        """Record attributes such as token counts or result sizes"""
+        self.attributes.update(attributes)
+
+    def __enter__(self) -> "Span":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.duration = time.perf_counter() - self.start
+        self.error = exc_type is not None
+        metrics.observe(self)
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.spans.append(self)
+        return False
+
+
+class _NoopSpan:
+    """Span returned while tracing is disabled; does nothing"""
+
+    __slots__ = ()
+
+    def set(self, **attributes):
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+def span(name: str, **attributes) -> Span:
+    """
+    Time a pipeline stage
+
+    Usage:
+        with span("chroma.search", k=k) as s:
+            results = ...
+            s.set(results=len(results))
+
+    Args:
+        name: Stage name, e.g. "embed.query"
+        **attributes: Initial attributes
+
+    Returns:
+        Context manager for the stage; a shared no-op while tracing is disabled
+    """
+    if not settings.tracing_enabled:
+        return NOOP_SPAN
+    return Span(name, attributes)
+
+
+def increment(name: str, value: float = 1, **labels):
+    """Add to a labelled event counter, e.g. increment("ingest_urls", status="failed")"""
+    if settings.tracing_enabled:
+        metrics.increment(name, value, labels)
+
+
+class Trace:
+    """Spans recorded while handling one request"""
+
+    __slots__ = ("spans",)
+
+    def __init__(self):
+        self.spans: List[Span] = []
+
+    def server_timing(self) -> str:
+        """
+        Server-Timing header value with the total time per stage
+
+        Stages that ran several times (e.g. per-batch spans) are summed.
+        """
+        totals: Dict[str, float] = {}
+        for recorded in list(self.spans):
+            totals[recorded.name] = totals.get(recorded.name, 0.0) + recorded.duration
+        return ", ".join(f"{name};dur={duration * 1000:.1f}" for name, duration in totals.items())
+
+
+_current_trace: contextvars.ContextVar[Optional[Trace]] = contextvars.ContextVar("trace", default=None)
+
+
+def start_trace() -> Tuple[Trace, contextvars.Token]:
+    """Start collecting spans for the current request"""
+    trace = Trace()
+    return trace, _current_trace.set(trace)
+
+
+def end_trace(token: contextvars.Token):
+    """Stop collecting spans for the current request"""
+    _current_trace.reset(token)
+
+
+class _Histogram:
+    __slots__ = ("buckets", "count", "total")
+
+    def __init__(self):
+        self.buckets = [0] * len(DURATION_BUCKETS)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value: float):
+        for i, bound in enumerate(DURATION_BUCKETS):
+            if value <= bound:
+                self.buckets[i] += 1
+                break
+        self.count += 1
+        self.total += value
+
+
+def _labels(labels: Dict[str, Any]) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        f'{key}="' + str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+        for key, value in sorted(labels.items())
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+class Metrics:
+    """In-process metrics registry rendered in the Prometheus text format"""
+
+    def __init__(self, prefix: str = "rag"):
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._durations: Dict[str, _Histogram] = {}
+        self._errors: Dict[str, int] = {}
+        self._stage_totals: Dict[Tuple[str, str], float] = {}
+        self._counters: Dict[Tuple[str, str], float] = {}
+
+    def observe(self, recorded: Span):
+        """Record a finished span"""
+        with self._lock:
+            histogram = self._durations.get(recorded.name)
+            if histogram is None:
+                histogram = self._durations[recorded.name] = _Histogram()
+            histogram.observe(recorded.duration)
+            if recorded.error:
+                self._errors[recorded.name] = self._errors.get(recorded.name, 0) + 1
+            for key, value in recorded.attributes.items():
+                if key in COUNTER_ATTRIBUTES and isinstance(value, (int, float)) and not isinstance(value, bool):
+                    counter = (recorded.name, key)
+                    self._stage_totals[counter] = self._stage_totals.get(counter, 0) + value
+
+    def increment(self, name: str, value: float, labels: Dict[str, Any]):
+        """Add to a labelled counter"""
+        key = (name, _labels(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def reset(self):
+        """Drop every recorded value"""
+        with self._lock:
+            self._durations.clear()
+            self._errors.clear()
+            self._stage_totals.clear()
+            self._counters.clear()
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        prefix = self.prefix
+        lines = []
+        with self._lock:
+            lines.append(f"# HELP {prefix}_stage_duration_seconds Time spent in each pipeline stage")
+            lines.append(f"# TYPE {prefix}_stage_duration_seconds histogram")
+            for stage, histogram in sorted(self._durations.items()):
+                cumulative = 0
+                for bound, count in zip(DURATION_BUCKETS, histogram.buckets):
+                    cumulative += count
+                    lines.append(f'{prefix}_stage_duration_seconds_bucket{{le="{bound}",stage="{stage}"}} {cumulative}')
+                lines.append(f'{prefix}_stage_duration_seconds_bucket{{le="+Inf",stage="{stage}"}} {histogram.count}')
+                lines.append(f'{prefix}_stage_duration_seconds_sum{{stage="{stage}"}} {histogram.total}')
+                lines.append(f'{prefix}_stage_duration_seconds_count{{stage="{stage}"}} {histogram.count}')
+
+            lines.append(f"# HELP {prefix}_stage_errors_total Pipeline stages that raised")
+            lines.append(f"# TYPE {prefix}_stage_errors_total counter")
+            for stage, count in sorted(self._errors.items()):
+                lines.append(f'{prefix}_stage_errors_total{{stage="{stage}"}} {count}')
+
+            # Token counts, result sizes etc. recorded on spans, one counter per attribute
+            for attribute in sorted({key for _, key in self._stage_totals}):
+                metric = f"{prefix}_stage_{attribute}_total"
+                lines.append(f"# TYPE {metric} counter")
+                for (stage, key), total in sorted(self._stage_totals.items()):
+                    if key == attribute:
+                        lines.append(f'{metric}{{stage="{stage}"}} {total}')
+
+            for name in sorted({name for name, _ in self._counters}):
+                metric = f"{prefix}_{name}_total"
+                lines.append(f"# TYPE {metric} counter")
+                for (counter, labels), total in sorted(self._counters.items()):
+                    if counter == name:
+                        lines.append(f"{metric}{labels} {total}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+
+class TracingMiddleware:
+    """
+    ASGI middleware tracing each HTTP request
+
+    Collects the request's spans, records the request duration as an
+    "http <handler>" stage, counts requests by handler and status, and
+    adds a Server-Timing header listing the stages that finished before the
+    response headers were sent. Streaming responses send their headers
+    first, so stages run while streaming appear only in /metrics.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.tracing_enabled:
+            await self.app(scope, receive, send)
+            return
+
+        trace, token = start_trace()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                timing = trace.server_timing()
+                if timing:
+                    message = dict(message)
+                    message["headers"] = list(message.get("headers", [])) + [(b"server-timing", timing.encode("latin-1"))]
+            await send(message)
+
+        request = Span("http", {})
+        request.start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            end_trace(token)
+            # The router stores the matched route in the scope; its endpoint
+            # name keeps the label set small (no path parameters or prefixes)
+            handler = getattr(scope.get("route"), "name", None) or "unmatched"
+            request.name = f"http {handler}"
+            request.duration = time.perf_counter() - request.start
+            request.error = status >= 500
+            metrics.observe(request)
+            metrics.increment("http_requests", 1, {'handler': handler, 'method': scope["method"], 'status': status})
@@ -1,46 +1,190 @@
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from typing import List, Dict, Any
+from array import array
+from typing import List, Dict, Any, Iterator, Tuple
+import numpy as np
 from src.config.settings import settings
+from src.processing.tokens import CHARS_PER_TOKEN, get_encoding
+from src.vectorstore.fingerprint_index import chunk_id
+
+
+# Places to end a chunk, most preferred first; the separator stays with the chunk it ends
+SEPARATORS = ["\n\n", "\n", ". ", "! ", "? ", ", ", " "]
+
+
+def token_offsets(text: str, model: str = None) -> np.ndarray:
+    """
+    Character offset at which each token of a text starts
+    
+    The text is tokenized once with the embedding model's tokenizer; without
+    a tokenizer every CHARS_PER_TOKEN characters count as one token, as in
+    estimate_tokens.
+    
+    Returns:
+        Ascending offsets, one per token, followed by len(text)
+    """
+    encoding = get_encoding(model)
+    if encoding is None:
+        return np.append(np.arange(0, len(text), CHARS_PER_TOKEN, dtype=np.int64), len(text))
+    
+    tokens = encoding.encode_ordinary(text)
+    token_bytes = np.fromiter((len(b) for b in encoding.decode_tokens_bytes(tokens)), dtype=np.int64, count=len(tokens))
+    byte_starts = np.concatenate(([0], np.cumsum(token_bytes)[:-1])).astype(np.int64)
+    
+    if text.isascii():
+        offsets = byte_starts
+    else:
+        # Characters starting before each byte offset of the UTF-8 encoding
+        data = np.frombuffer(text.encode("utf-8"), dtype=np.uint8)
+        chars_before = np.concatenate(([0], np.cumsum((data & 0xC0) != 0x80)))
+        offsets = chars_before[byte_starts]
+    return np.append(offsets, len(text))
+
+
+class ChunkedDocument:
+    """
+    The chunks of one document, as offsets into its cleaned text
+    
+    The text and page metadata are held once. A chunk's string and its
+    metadata (page metadata plus chunk_index and total_chunks) are only
+    built when that chunk is read.
+    """
+    
+    def __init__(self, text: str, metadata: Dict[str, Any], spans: List[Tuple[int, int, int]]):
+        """
+        Args:
+            text: Cleaned document text
+            metadata: Page metadata shared by every chunk
+            spans: (start, end, tokens) of each chunk
+        """
+        self.text = text
+        self.metadata = metadata
+        self.starts = array('I', (start for start, _, _ in spans))
+        self.ends = array('I', (end for _, end, _ in spans))
+        self.tokens = array('I', (tokens for _, _, tokens in spans))
+        
+        url = metadata.get('url', '')
+        self.ids = [chunk_id(url, i, text[start:end]) for i, (start, end, _) in enumerate(spans)]
+    
+    def __len__(self) -> int:
+        return len(self.ids)
+    
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for i in range(len(self)):
+            yield self.chunk(i)
+    
+    def text_of(self, i: int) -> str:
+        """Text of chunk i"""
+        return self.text[self.starts[i]:self.ends[i]]
+    
+    def metadata_of(self, i: int) -> Dict[str, Any]:
+        """Metadata stored with chunk i"""
+        chunk_metadata = self.metadata.copy()
+        chunk_metadata['chunk_index'] = i
+        chunk_metadata['total_chunks'] = len(self)
+        return chunk_metadata
+    
+    def chunk(self, i: int) -> Dict[str, Any]:
+        """Chunk i as a dictionary with 'id', 'text', 'metadata' and 'tokens'"""
+        return {
+            'id': self.ids[i],
+            'text': self.text_of(i),
+            'metadata': self.metadata_of(i),
+            'tokens': self.tokens[i]
+        }
 
 
 class TextChunker:
-    """Splits text into manageable chunks for embedding"""
-    
-    def __init__(self):
-        self.splitter = RecursiveCharacterTextSplitter(
-            chunk_size=settings.chunk_size,
-            chunk_overlap=settings.chunk_overlap,
-            length_function=len,
-            separators=["\n\n", "\n", ".", "!", "?", ",", " ", ""]
+    """Splits text into token-budgeted chunks for embedding"""
+    
+    def __init__(self, chunk_tokens: int = None, chunk_overlap_tokens: int = None):
+        self.chunk_tokens = chunk_tokens or settings.chunk_tokens
+        self.chunk_overlap_tokens = (
+            settings.chunk_overlap_tokens if chunk_overlap_tokens is None else chunk_overlap_tokens
         )
     
-    def chunk_text(self, text: str, metadata: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def chunk_document(self, text: str, metadata: Dict[str, Any]) -> ChunkedDocument:
         """
-        Split text into chunks with metadata
+        Split text into chunks of at most chunk_tokens tokens
+        
+        Each chunk ends at the best separator in the second half of its
+        token budget (paragraph, line, sentence, clause, then word) and the
+        next one starts about chunk_overlap_tokens tokens earlier, at a word
+        boundary.
         
         Args:
             text: Text to split
             metadata: Metadata to attach to each chunk
-            
+        
         Returns:
-            List of dictionaries containing 'text' and 'metadata'
+            ChunkedDocument referencing the text and metadata
         """
         if not text or len(text.strip()) == 0:
-            return []
+            return ChunkedDocument(text, metadata, [])
+        
+        return ChunkedDocument(text, metadata, self._spans(text))
+    
+    def chunk_text(self, text: str, metadata: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Split text into chunks with metadata
+        
+        Args:
+            text: Text to split
+            metadata: Metadata to attach to each chunk
         
-        # Split text into chunks
-        chunks = self.splitter.split_text(text)
+        Returns:
+            List of dictionaries containing 'id', 'text', 'metadata' and 'tokens'
+        """
+        return list(self.chunk_document(text, metadata))
+    
+    def _spans(self, text: str) -> List[Tuple[int, int, int]]:
+        """(start, end, tokens) of each chunk, with surrounding whitespace excluded"""
+        offsets = token_offsets(text)
+        total_tokens = len(offsets) - 1
+        length = len(text)
         
-        # Attach metadata to each chunk
-        result = []
-        for i, chunk in enumerate(chunks):
-            chunk_metadata = metadata.copy()
-            chunk_metadata['chunk_index'] = i
-            chunk_metadata['total_chunks'] = len(chunks)
+        spans = []
+        start = self._skip_whitespace(text, 0)
+        while start < length:
+            first = int(np.searchsorted(offsets, start, side="right")) - 1
+            budget_end = first + self.chunk_tokens
             
-            result.append({
-                'text': chunk,
-                'metadata': chunk_metadata
-            })
+            if budget_end >= total_tokens:
+                end = length
+            else:
+                limit = int(offsets[budget_end])
+                end = self._split_point(text, start + (limit - start) // 2, limit)
+            
+            trimmed = end
+            while trimmed > start and text[trimmed - 1].isspace():
+                trimmed -= 1
+            tokens = int(np.searchsorted(offsets, trimmed) - np.searchsorted(offsets, start))
+            spans.append((start, trimmed, max(tokens, 1)))
+            
+            if end >= length:
+                break
+            
+            # Back up by the overlap, then forward to the next word; without
+            # a word boundary in the overlap the next chunk starts at the end
+            last = int(np.searchsorted(offsets, end, side="right")) - 1
+            overlap_start = int(offsets[max(last - self.chunk_overlap_tokens, first + 1)])
+            space = text.find(" ", overlap_start, end)
+            next_start = space + 1 if space != -1 else end
+            if next_start <= start:
+                next_start = end
+            start = self._skip_whitespace(text, next_start)
         
-        return result
\ No newline at end of file
+        return spans
+    
+    @staticmethod
+    def _split_point(text: str, low: int, high: int) -> int:
+        """Position just after the most preferred separator in text[low:high], else high"""
+        for separator in SEPARATORS:
+            position = text.rfind(separator, low, high)
+            if position != -1:
+                return position + len(separator)
+        return high
+    
+    @staticmethod
+    def _skip_whitespace(text: str, position: int) -> int:
+        while position < len(text) and text[position].isspace():
+            position += 1
+        return position
\ No newline at end of file
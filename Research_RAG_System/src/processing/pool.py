@@ -0,0 +1,167 @@
+import asyncio
+import multiprocessing
+import threading
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, Any, Iterable, Iterator, Optional, Tuple
+from src.config.settings import settings
+from src.processing.text_cleaner import TextCleaner
+from src.processing.chunker import TextChunker
+from src.utils.executor import run_blocking
+from src.vectorstore.fingerprint_index import page_fingerprint
+
+
+# Cleaner and chunker owned by each worker process
+_worker_cleaner: Optional[TextCleaner] = None
+_worker_chunker: Optional[TextChunker] = None
+
+
+def process_document(
+    text_cleaner: TextCleaner,
+    text_chunker: TextChunker,
+    text: str,
+    metadata: Dict[str, Any],
+    previous_fingerprint: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Clean, fingerprint and chunk one crawled document
+
+    Args:
+        text_cleaner: Cleaner to use
+        text_chunker: Chunker to use
+        text: Extracted page text
+        metadata: Page metadata, attached to every chunk
+        previous_fingerprint: Fingerprint stored for the page by the last
+            crawl; chunking is skipped when the page has not changed
+
+    Returns:
+        Dictionary with the page 'fingerprint' and its 'chunks' as a
+        ChunkedDocument, which is None when the fingerprint matches
+        previous_fingerprint
+    """
+    clean_text = text_cleaner.clean(text)
+    fingerprint = page_fingerprint(clean_text, metadata)
+
+    if fingerprint == previous_fingerprint:
+        return {'fingerprint': fingerprint, 'chunks': None}
+
+    return {
+        'fingerprint': fingerprint,
+        'chunks': text_chunker.chunk_document(clean_text, metadata)
+    }
+
+
+def _init_worker(chunk_tokens: int, chunk_overlap_tokens: int):
+    """Build the worker process's cleaner and chunker once"""
+    global _worker_cleaner, _worker_chunker
+    _worker_cleaner = TextCleaner()
+    _worker_chunker = TextChunker(chunk_tokens=chunk_tokens, chunk_overlap_tokens=chunk_overlap_tokens)
+
+
+def _process_in_worker(text: str, metadata: Dict[str, Any], previous_fingerprint: Optional[str]) -> Dict[str, Any]:
+    return process_document(_worker_cleaner, _worker_chunker, text, metadata, previous_fingerprint)
+
+
+class ProcessingPool:
+    """
+    Cleans and chunks crawled documents in a pool of worker processes
+
+    Cleaning and chunking are pure-Python CPU work, so threads serialize on
+    the GIL; separate processes let large pages use every core. With zero
+    workers documents are processed in-process instead.
+    """
+
+    def __init__(self, text_cleaner: TextCleaner, text_chunker: TextChunker, workers: int = None):
+        self.text_cleaner = text_cleaner
+        self.text_chunker = text_chunker
+        self.workers = settings.processing_workers if workers is None else workers
+
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> Optional[ProcessPoolExecutor]:
+        """Get or create the worker processes, or None when running in-process"""
+        if self.workers <= 0:
+            return None
+        with self._lock:
+            if self._executor is None:
+                # Spawned rather than forked: the parent runs threads and an
+                # event loop that a forked child must not inherit
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(self.text_chunker.chunk_tokens, self.text_chunker.chunk_overlap_tokens)
+                )
+            return self._executor
+
+    def submit(self, text: str, metadata: Dict[str, Any], previous_fingerprint: Optional[str] = None) -> Future:
+        """
+        Start processing a document
+
+        Returns:
+            Future resolving to the process_document result. Without worker
+            processes the document is processed before this returns.
+        """
+        executor = self._get_executor()
+        if executor is not None:
+            return executor.submit(_process_in_worker, text, metadata, previous_fingerprint)
+
+        future = Future()
+        try:
+            future.set_result(
+                process_document(self.text_cleaner, self.text_chunker, text, metadata, previous_fingerprint)
+            )
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    async def process(self, text: str, metadata: Dict[str, Any], previous_fingerprint: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Clean, fingerprint and chunk a document without blocking the event loop
+
+        Args:
+            text: Extracted page text
+            metadata: Page metadata
+            previous_fingerprint: Fingerprint from the last crawl, if any
+
+        Returns:
+            The process_document result
+        """
+        if self._get_executor() is None:
+            return await run_blocking(
+                process_document, self.text_cleaner, self.text_chunker, text, metadata, previous_fingerprint
+            )
+        return await asyncio.wrap_future(self.submit(text, metadata, previous_fingerprint))
+
+    def imap(self, documents: Iterable[Tuple[str, Dict[str, Any]]], max_in_flight: int = None) -> Iterator[Dict[str, Any]]:
+        """
+        Process documents in parallel, yielding results in input order
+
+        Documents are read lazily and at most max_in_flight are outstanding,
+        so the consumer (e.g. embedding) works on early results while the
+        workers process later ones.
+
+        Args:
+            documents: (text, metadata) pairs
+            max_in_flight: Documents submitted ahead of the consumer,
+                by default twice the worker count
+
+        Yields:
+            process_document results, in the order of documents
+        """
+        max_in_flight = max_in_flight or max(2 * self.workers, 1)
+        pending = deque()
+        for text, metadata in documents:
+            pending.append(self.submit(text, metadata))
+            if len(pending) >= max_in_flight:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+    def shutdown(self):
+        """Stop the worker processes"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True, cancel_futures=True)
+                self._executor = None
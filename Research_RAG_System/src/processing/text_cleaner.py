@@ -1,6 +1,35 @@
 import re
 
 
+# Characters kept besides letters, digits and whitespace
+KEPT_CHARACTER = re.compile(r'[\w.,!?;:()\-$€₹£¥]')
+WHITESPACE = re.compile(r'\s')
+
+# Stands in for a removed character until whitespace has been collapsed
+REMOVED = '\x00'
+
+MULTIPLE_SPACES = re.compile(r' {2,}')
+MULTIPLE_PERIODS = re.compile(r'\.{2,}')
+
+
+class _CleaningTable(dict):
+    """str.translate table that classifies each character the first time it is seen"""
+
+    def __missing__(self, codepoint: int) -> str:
+        char = chr(codepoint)
+        if WHITESPACE.match(char):
+            value = ' '
+        elif KEPT_CHARACTER.match(char):
+            value = char
+        else:
+            value = REMOVED
+        self[codepoint] = value
+        return value
+
+
+_TABLE = _CleaningTable()
+
+
 class TextCleaner:
     """Cleans and normalizes text content"""
     
@@ -18,14 +47,20 @@ class TextCleaner:
         if not text:
             return ""
         
-        # Remove extra whitespace
-        text = re.sub(r'\s+', ' ', text)
+        # Map every character in one pass: whitespace to a space, special
+        # characters (anything but basic punctuation) to a placeholder
+        text = text.translate(_TABLE)
         
-        # Remove special characters but keep basic punctuation
-        text = re.sub(r'[^\w\s.,!?;:()\-$€₹£¥]', '', text)
+        # Collapse whitespace before dropping the placeholders, so spaces
+        # either side of a removed character stay separate
+        if '  ' in text:
+            text = MULTIPLE_SPACES.sub(' ', text)
+        if REMOVED in text:
+            text = text.replace(REMOVED, '')
         
         # Remove multiple periods
-        text = re.sub(r'\.{2,}', '.', text)
+        if '..' in text:
+            text = MULTIPLE_PERIODS.sub('.', text)
         
         # Strip leading/trailing whitespace
         text = text.strip()
@@ -0,0 +1,90 @@
+import logging
+from functools import lru_cache
+from typing import List, Optional
+import tiktoken
+from tiktoken.model import encoding_name_for_model
+from src.config.settings import settings
+from src.vectorstore.embeddings import EMBEDDING_PROVIDERS
+
+logger = logging.getLogger(__name__)
+
+
+# Rough characters-per-token ratio used when no tokenizer is available
+CHARS_PER_TOKEN = 4
+
+# Chat formatting tokens added per message, and once to prime the reply
+TOKENS_PER_MESSAGE = 3
+TOKENS_PER_REPLY = 3
+
+# Encoding for models tiktoken does not know, e.g. local embedding models
+DEFAULT_ENCODING = "cl100k_base"
+
+
+def get_encoding(model: str = None) -> Optional[tiktoken.Encoding]:
+    """
+    Get the tokenizer for a model, falling back to cl100k_base
+
+    Accepts chat model names, including fine-tuned ones such as
+    "ft:gpt-4o-mini-2024-07-18:acme::abc123", and embedding model settings
+    such as "openai:text-embedding-3-small". Returns None when the tokenizer files
+    cannot be loaded (e.g. offline), in which case token counts are
+    estimated from character length.
+    """
+    name = model or settings.embedding_model
+    provider, separator, rest = name.partition(":")
+    if separator and provider in EMBEDDING_PROVIDERS:
+        name = rest
+    try:
+        encoding_name = encoding_name_for_model(name)
+    except KeyError:
+        encoding_name = DEFAULT_ENCODING
+    return _load_encoding(encoding_name)
+
+
+@lru_cache()
+def _load_encoding(encoding_name: str) -> Optional[tiktoken.Encoding]:
+    """Load an encoding once per process, remembering a failure so it is not retried"""
+    try:
+        return tiktoken.get_encoding(encoding_name)
+    except Exception as e:
+        logger.warning("Tokenizer %s unavailable, estimating token counts: %s", encoding_name, e)
+        return None
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the token count of a text from its length"""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def count_tokens(text: str, model: str = None) -> int:
+    """Count the tokens in a text for the given model"""
+    encoding = get_encoding(model)
+    if encoding is None:
+        return estimate_tokens(text)
+    return len(encoding.encode_ordinary(text))
+
+
+def count_tokens_batch(texts: List[str], model: str = None) -> List[int]:
+    """Count the tokens in several texts for the given model"""
+    encoding = get_encoding(model)
+    if encoding is None:
+        return [estimate_tokens(text) for text in texts]
+    return [len(tokens) for tokens in encoding.encode_ordinary_batch(texts)]
+
+
+def truncate_to_tokens(text: str, max_tokens: int, model: str = None) -> str:
+    """Cut a text to at most max_tokens tokens for the given model"""
+    if max_tokens <= 0:
+        return ""
+    encoding = get_encoding(model)
+    if encoding is None:
+        return text[:max_tokens * CHARS_PER_TOKEN]
+    tokens = encoding.encode_ordinary(text)
+    if len(tokens) <= max_tokens:
+        return text
+    return encoding.decode(tokens[:max_tokens])
+
+
+def count_chat_tokens(contents: List[str], model: str = None) -> int:
+    """Count the prompt tokens of chat messages with the given contents"""
+    return sum(count_tokens_batch(contents, model)) + TOKENS_PER_MESSAGE * len(contents) + TOKENS_PER_REPLY
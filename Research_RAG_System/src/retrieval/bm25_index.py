@@ -0,0 +1,237 @@
+import math
+import os
+import pickle
+import re
+import threading
+from array import array
+from collections import Counter
+from typing import List, Dict, Optional, Tuple
+import numpy as np
+
+
+# Keeps model numbers and SKUs such as "xps-15", "rtx4090" or "b0c1.2" whole
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[-_./][a-z0-9]+)*")
+
+FORMAT_VERSION = 1
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase lexical terms"""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class BM25Index:
+    """
+    In-process inverted index with BM25 scoring
+
+    Posting lists are typed arrays (uint32 document numbers, uint16 term
+    frequencies), so the index costs a few bytes per posting rather than a
+    Python object each. Deleted chunks are tombstoned and dropped when the
+    index is compacted.
+    """
+
+    def __init__(self, path: Optional[str] = None, k1: float = 1.2, b: float = 0.75):
+        self.path = path
+        self.k1 = k1
+        self.b = b
+
+        self._lock = threading.RLock()
+        self._reset()
+        self.dirty = False
+
+        if path and os.path.exists(path):
+            self.load()
+
+    def _reset(self):
+        """Start from an empty index"""
+        self.terms: Dict[str, int] = {}
+        self.postings_docs: List[array] = []
+        self.postings_tfs: List[array] = []
+        self.doc_ids: List[Optional[str]] = []
+        self.doc_index: Dict[str, int] = {}
+        self.doc_lengths = array('I')
+        self.live = bytearray()
+        self.total_length = 0
+        self._norm_cache: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self.doc_index)
+
+    def add(self, chunk_id: str, text: str):
+        """
+        Index a chunk, replacing any previous version with the same ID
+
+        Args:
+            chunk_id: Chunk ID in the vector store
+            text: Chunk text
+        """
+        frequencies = Counter(tokenize(text))
+        length = sum(frequencies.values())
+
+        with self._lock:
+            if chunk_id in self.doc_index:
+                self._remove(chunk_id)
+
+            doc = len(self.doc_ids)
+            self.doc_ids.append(chunk_id)
+            self.doc_index[chunk_id] = doc
+            self.doc_lengths.append(length)
+            self.live.append(1)
+            self.total_length += length
+
+            for term, count in frequencies.items():
+                term_id = self.terms.get(term)
+                if term_id is None:
+                    term_id = len(self.postings_docs)
+                    self.terms[term] = term_id
+                    self.postings_docs.append(array('I'))
+                    self.postings_tfs.append(array('H'))
+                self.postings_docs[term_id].append(doc)
+                self.postings_tfs[term_id].append(min(count, 0xFFFF))
+
+            self._norm_cache = None
+            self.dirty = True
+
+    def remove(self, chunk_ids: List[str]):
+        """Remove chunks from the index"""
+        with self._lock:
+            for chunk_id in chunk_ids:
+                if chunk_id in self.doc_index:
+                    self._remove(chunk_id)
+            self._norm_cache = None
+            self.dirty = True
+
+            # Rebuild posting lists once tombstones make up a quarter of them
+            dead = len(self.doc_ids) - len(self.doc_index)
+            if dead > 1000 and dead * 4 > len(self.doc_ids):
+                self._compact()
+
+    def _remove(self, chunk_id: str):
+        """Tombstone a chunk. Caller holds the lock."""
+        doc = self.doc_index.pop(chunk_id)
+        self.doc_ids[doc] = None
+        self.live[doc] = 0
+        self.total_length -= self.doc_lengths[doc]
+
+    def search(self, query: str, k: int) -> List[Tuple[str, float]]:
+        """
+        Find the chunks that best match a query
+
+        Args:
+            query: Natural language query
+            k: Number of results to return
+
+        Returns:
+            List of (chunk ID, BM25 score) pairs, best first
+        """
+        terms = set(tokenize(query))
+
+        with self._lock:
+            live_count = len(self.doc_index)
+            if not terms or not live_count:
+                return []
+
+            norm = self._length_norm()
+            live = np.frombuffer(self.live, dtype=np.uint8)
+            scores = np.zeros(len(self.doc_ids), dtype=np.float32)
+
+            for term in terms:
+                term_id = self.terms.get(term)
+                if term_id is None:
+                    continue
+                docs = np.frombuffer(self.postings_docs[term_id], dtype=np.uint32)
+                tfs = np.frombuffer(self.postings_tfs[term_id], dtype=np.uint16).astype(np.float32)
+                # Tombstoned postings stay until the next compaction; leave them out of df
+                df = int(np.count_nonzero(live[docs]))
+                if not df:
+                    continue
+                idf = math.log(1 + (live_count - df + 0.5) / (df + 0.5))
+                scores[docs] += idf * tfs * (self.k1 + 1) / (tfs + norm[docs])
+                del docs
+
+            scores *= live
+
+            k = min(k, len(scores))
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [(self.doc_ids[doc], float(scores[doc])) for doc in top if scores[doc] > 0]
+
+    def _length_norm(self) -> np.ndarray:
+        """Per-document BM25 length normalization. Caller holds the lock."""
+        if self._norm_cache is None:
+            lengths = np.frombuffer(self.doc_lengths, dtype=np.uint32).astype(np.float32)
+            average = self.total_length / max(len(self.doc_index), 1)
+            self._norm_cache = self.k1 * (1 - self.b + self.b * lengths / max(average, 1e-9))
+        return self._norm_cache
+
+    def _compact(self):
+        """Drop tombstoned documents and renumber. Caller holds the lock."""
+        live = np.frombuffer(self.live, dtype=np.uint8).astype(bool)
+        renumber = np.cumsum(live, dtype=np.int64) - 1
+
+        terms, postings_docs, postings_tfs = {}, [], []
+        for term, term_id in self.terms.items():
+            docs = np.frombuffer(self.postings_docs[term_id], dtype=np.uint32)
+            keep = live[docs]
+            if not keep.any():
+                continue
+            terms[term] = len(postings_docs)
+            postings_docs.append(array('I', renumber[docs[keep]].astype(np.uint32).tobytes()))
+            postings_tfs.append(array('H', np.frombuffer(self.postings_tfs[term_id], dtype=np.uint16)[keep].tobytes()))
+            del docs
+
+        doc_ids = [chunk_id for chunk_id in self.doc_ids if chunk_id is not None]
+        lengths = np.frombuffer(self.doc_lengths, dtype=np.uint32)[live]
+
+        self.terms = terms
+        self.postings_docs = postings_docs
+        self.postings_tfs = postings_tfs
+        self.doc_ids = doc_ids
+        self.doc_index = {chunk_id: doc for doc, chunk_id in enumerate(doc_ids)}
+        self.doc_lengths = array('I', lengths.tobytes())
+        self.live = bytearray(b'\x01' * len(doc_ids))
+        self._norm_cache = None
+
+    def save(self):
+        """Write the index to its path, replacing the previous file atomically"""
+        if not self.path:
+            return
+
+        with self._lock:
+            state = {
+                'version': FORMAT_VERSION,
+                'terms': self.terms,
+                'postings_docs': self.postings_docs,
+                'postings_tfs': self.postings_tfs,
+                'doc_ids': self.doc_ids,
+                'doc_lengths': self.doc_lengths,
+                'live': self.live,
+                'total_length': self.total_length
+            }
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.path)
+            self.dirty = False
+
+    def load(self):
+        """Read the index from its path"""
+        with open(self.path, 'rb') as f:
+            state = pickle.load(f)
+        if state.get('version') != FORMAT_VERSION:
+            raise ValueError(f"Unsupported BM25 index format in {self.path}")
+
+        with self._lock:
+            self.terms = state['terms']
+            self.postings_docs = state['postings_docs']
+            self.postings_tfs = state['postings_tfs']
+            self.doc_ids = state['doc_ids']
+            self.doc_index = {chunk_id: doc for doc, chunk_id in enumerate(self.doc_ids) if chunk_id is not None}
+            self.doc_lengths = state['doc_lengths']
+            self.live = state['live']
+            self.total_length = state['total_length']
+            self._norm_cache = None
+            self.dirty = False
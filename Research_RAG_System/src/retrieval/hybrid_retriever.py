@@ -1,58 +1,312 @@
-from typing import List, Dict, Any
+import asyncio
+from typing import List, Dict, Any, Optional, Tuple, Union
+from src.config.settings import settings
+from src.observability.tracing import increment, span
 from src.vectorstore.chroma_store import ChromaVectorStore
+from src.retrieval.query_cache import QueryCache
 from src.retrieval.query_processor import QueryProcessor
+from src.retrieval.reranker import Reranker
+from src.utils.executor import run_blocking
+from src.utils.singleflight import SingleFlight
 
 
 class HybridRetriever:
-    """Performs hybrid retrieval combining semantic search and metadata filtering"""
+    """Performs hybrid retrieval fusing semantic search, BM25 keyword search and metadata filtering"""
     
-    def __init__(self, vector_store: ChromaVectorStore):
+    def __init__(self, vector_store: ChromaVectorStore, reranker: Optional[Reranker] = None):
         self.vector_store = vector_store
         self.query_processor = QueryProcessor()
+        self.reranker = reranker
+        self.flights = SingleFlight("retrieve")
     
-    def retrieve(self, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
+    def retrieve(self, query: str, top_k: int = 5, filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
         """
         Retrieve relevant documents using hybrid search
         
+        Dense and lexical candidates are merged with reciprocal-rank fusion,
+        so exact product names and model numbers that embeddings miss still
+        surface. Price filters are applied inside both searches, so every
+        candidate already satisfies them. With a sharded store, queries
+        naming a store or category only search its shards, unless those
+        hold fewer than top_k matches, in which case every shard is
+        searched. With a re-ranker, more fused candidates are re-scored
+        and the best that fit the re-rank token budget are kept. Concurrent calls with the same normalized query,
+        filters and top_k share one search.
+        
         Args:
             query: Natural language query
             top_k: Number of results to return
+            filters: Optional explicit filters, e.g. {"price_max": 50};
+                these override filters parsed from the query
             
         Returns:
             List of relevant documents
         """
-        # Process query to extract filters
-        processed = self.query_processor.process_query(query)
-        
-        # Build Chroma filter if price constraints exist
-        chroma_filter = None
-        if processed['filters']:
-            chroma_filter = self._build_chroma_filter(processed['filters'])
-        
-        # Perform similarity search
-        results = self.vector_store.similarity_search(
-            query=processed['query'],
-            k=top_k,
-            filter=chroma_filter
+        if not settings.single_flight_enabled:
+            return self._retrieve(query, top_k, filters)
+        key = self._flight_key(query, top_k, filters)
+        return list(self.flights.do_sync(key, lambda: self._retrieve(query, top_k, filters)))
+    
+    async def aretrieve(self, query: str, top_k: int = 5, filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """
+        Async retrieve
+        
+        The dense and lexical searches run concurrently without blocking
+        the event loop.
+        """
+        if not settings.single_flight_enabled:
+            return await self._aretrieve(query, top_k, filters)
+        key = self._flight_key(query, top_k, filters)
+        return list(await self.flights.do(key, lambda: self._aretrieve(query, top_k, filters)))
+    
+    async def aretrieve_batch(
+        self,
+        requests: List[Tuple[str, Optional[Dict[str, Any]]]],
+        top_k: int = 5
+    ) -> List[Union[List[Dict[str, Any]], Exception]]:
+        """
+        aretrieve for several queries at once
+        
+        Filters are parsed from each query separately. All search queries
+        are embedded in one call and searched with one multi-query Chroma
+        request per distinct filter; lexical search, fusion and re-ranking
+        then run per query.
+        
+        Args:
+            requests: (query, filters) pairs
+            top_k: Number of results per query
+            
+        Returns:
+            One entry per request, in order: its documents, or the exception
+            that failed it
+        """
+        prepared = [self._prepare_search(query, filters) for query, filters in requests]
+        search_queries = [search_query for search_query, _, _ in prepared]
+        chroma_filters = [chroma_filter for _, chroma_filter, _ in prepared]
+        shards = [query_shards for _, _, query_shards in prepared]
+        
+        candidates = max(top_k, settings.hybrid_candidates)
+        if self.reranker is not None:
+            candidates = max(candidates, self._rerank_candidates(top_k))
+        dense_results, lexical_results = await asyncio.gather(
+            self.vector_store.asimilarity_search_batch(search_queries, k=candidates, filters=chroma_filters, shards=shards),
+            run_blocking(self._lexical_batch, search_queries, candidates, chroma_filters, shards)
+        )
+        widen = [i for i in range(len(requests)) if self._route_too_narrow(shards[i], dense_results[i], top_k)]
+        if widen:
+            widened_dense, widened_lexical = await asyncio.gather(
+                self.vector_store.asimilarity_search_batch(
+                    [search_queries[i] for i in widen], k=candidates, filters=[chroma_filters[i] for i in widen]
+                ),
+                run_blocking(
+                    self._lexical_batch,
+                    [search_queries[i] for i in widen],
+                    candidates,
+                    [chroma_filters[i] for i in widen],
+                    [None] * len(widen)
+                )
+            )
+            for i, dense, lexical in zip(widen, widened_dense, widened_lexical):
+                dense_results[i], lexical_results[i] = dense, lexical
+        
+        async def finish(i: int) -> List[Dict[str, Any]]:
+            if isinstance(lexical_results[i], Exception):
+                raise lexical_results[i]
+            if self.reranker is None:
+                return self._fuse(dense_results[i], lexical_results[i], top_k)
+            fused = self._fuse(dense_results[i], lexical_results[i], self._rerank_candidates(top_k))
+            with span("rerank", candidates=len(fused)) as s:
+                results = await self.reranker.arerank(search_queries[i], fused, top_k)
+                s.set(results=len(results))
+            return results
+        
+        return await asyncio.gather(*(finish(i) for i in range(len(requests))), return_exceptions=True)
+    
+    def _lexical_batch(
+        self,
+        queries: List[str],
+        k: int,
+        filters: List[Optional[Dict[str, Any]]],
+        shards: List[Optional[List[str]]]
+    ) -> List[Union[List[Dict[str, Any]], Exception]]:
+        """Lexical search per query; a failed search only fails its query"""
+        results = []
+        for query, chroma_filter, query_shards in zip(queries, filters, shards):
+            try:
+                results.append(self.vector_store.lexical_search(query=query, k=k, filter=chroma_filter, shards=query_shards))
+            except Exception as e:
+                results.append(e)
+        return results
+    
+    @staticmethod
+    def _flight_key(query: str, top_k: int, filters: Optional[Dict[str, Any]]) -> Tuple[str, int, str]:
+        """Calls with equal keys return the same documents"""
+        return QueryCache.normalize_query(query), top_k, QueryCache.filters_key(filters)
+    
+    def _retrieve(self, query: str, top_k: int, filters: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        search_query, chroma_filter, shards = self._prepare_search(query, filters)
+        
+        # Over-fetch candidates from both searches
+        candidates = max(top_k, settings.hybrid_candidates)
+        if self.reranker is not None:
+            candidates = max(candidates, self._rerank_candidates(top_k))
+        dense_results = self.vector_store.similarity_search(
+            query=search_query,
+            k=candidates,
+            filter=chroma_filter,
+            shards=shards
+        )
+        if self._route_too_narrow(shards, dense_results, top_k):
+            shards = None
+            dense_results = self.vector_store.similarity_search(query=search_query, k=candidates, filter=chroma_filter)
+        lexical_results = self.vector_store.lexical_search(
+            query=search_query,
+            k=candidates,
+            filter=chroma_filter,
+            shards=shards
+        )
+        
+        if self.reranker is None:
+            return self._fuse(dense_results, lexical_results, top_k)
+        fused = self._fuse(dense_results, lexical_results, self._rerank_candidates(top_k))
+        with span("rerank", candidates=len(fused)) as s:
+            results = self.reranker.rerank(search_query, fused, top_k)
+            s.set(results=len(results))
+        return results
+    
+    async def _aretrieve(self, query: str, top_k: int, filters: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        search_query, chroma_filter, shards = self._prepare_search(query, filters)
+        
+        candidates = max(top_k, settings.hybrid_candidates)
+        if self.reranker is not None:
+            candidates = max(candidates, self._rerank_candidates(top_k))
+        dense_results, lexical_results = await asyncio.gather(
+            self.vector_store.asimilarity_search(query=search_query, k=candidates, filter=chroma_filter, shards=shards),
+            self.vector_store.alexical_search(query=search_query, k=candidates, filter=chroma_filter, shards=shards)
         )
+        if self._route_too_narrow(shards, dense_results, top_k):
+            dense_results, lexical_results = await asyncio.gather(
+                self.vector_store.asimilarity_search(query=search_query, k=candidates, filter=chroma_filter),
+                self.vector_store.alexical_search(query=search_query, k=candidates, filter=chroma_filter)
+            )
         
+        if self.reranker is None:
+            return self._fuse(dense_results, lexical_results, top_k)
+        fused = self._fuse(dense_results, lexical_results, self._rerank_candidates(top_k))
+        with span("rerank", candidates=len(fused)) as s:
+            results = await self.reranker.arerank(search_query, fused, top_k)
+            s.set(results=len(results))
         return results
     
-    def _build_chroma_filter(self, filters: Dict[str, Any]) -> Dict[str, Any]:
+    @staticmethod
+    def _route_too_narrow(shards: Optional[List[str]], dense_results: List[Dict[str, Any]], k: int) -> bool:
+        """
+        Whether a search routed to the shards a query names found fewer
+        than the k results asked for and should be repeated over every shard
+        
+        A word in the query may name a shard without the user meaning to
+        restrict the search to it. Finding fewer than the over-fetched
+        candidates is expected of small shards and filtered queries.
+        """
+        if not shards or len(dense_results) >= k:
+            return False
+        increment("shard_route_fallbacks")
+        return True
+    
+    def _fuse(self, dense_results: List[Dict[str, Any]], lexical_results: List[Dict[str, Any]], top_k: int) -> List[Dict[str, Any]]:
+        """Fuse the dense and lexical candidates inside a span"""
+        with span("fuse", candidates=len(dense_results) + len(lexical_results)) as s:
+            results = self.fuse_results([dense_results, lexical_results], top_k)
+            s.set(results=len(results))
+        return results
+    
+    @staticmethod
+    def _rerank_candidates(top_k: int) -> int:
+        """Number of fused candidates passed to the re-ranker"""
+        return max(top_k, settings.rerank_candidates)
+    
+    def _prepare_search(
+        self,
+        query: str,
+        filters: Optional[Dict[str, Any]]
+    ) -> Tuple[str, Optional[Dict[str, Any]], Optional[List[str]]]:
+        """Extract filters and shard hints from the query and merge in explicit filters"""
+        with span("query.process") as s:
+            # Process query to extract filters and the shards it names
+            shard_names = self.vector_store.shard_names() if settings.shard_routing_enabled else None
+            processed = self.query_processor.process_query(query, shard_names)
+            if filters:
+                processed['filters'].update(filters)
+            
+            # Build Chroma filter if price constraints exist
+            chroma_filter = None
+            if processed['filters']:
+                chroma_filter = self._build_chroma_filter(processed['filters'])
+            s.set(filters=len(processed['filters']), shards=len(processed.get('shards') or ()))
+        
+        return processed['query'], chroma_filter, processed.get('shards')
+    
+    @staticmethod
+    def fuse_results(result_lists: List[List[Dict[str, Any]]], top_k: int, rrf_k: int = None) -> List[Dict[str, Any]]:
         """
-        Convert our filter format to Chroma's filter format
+        Merge ranked result lists with reciprocal-rank fusion
         
-        Note: This is a simplified version. Chroma filtering works with
-        exact metadata matches. For numeric comparisons, we'd need to
-        store price as a numeric field and use Chroma's where clause.
+        Args:
+            result_lists: Ranked lists of results, dense first
+            top_k: Number of results to return
+            rrf_k: Rank smoothing constant
+            
+        Returns:
+            Fused results whose 'score' is the RRF score (higher is better)
         """
-        # For now, we'll return None and handle filtering post-retrieval
-        # In production, you'd want to store numeric price and use Chroma's $gt, $lt operators
-        return None
+        if rrf_k is None:
+            rrf_k = settings.rrf_k
+        
+        fused: Dict[str, Dict[str, Any]] = {}
+        score_keys = ['dense_score', 'lexical_score']
+        for list_index, results in enumerate(result_lists):
+            for rank, result in enumerate(results):
+                key = result.get('id') or result['content']
+                entry = fused.get(key)
+                if entry is None:
+                    entry = dict(result)
+                    entry['score'] = 0.0
+                    fused[key] = entry
+                entry['score'] += 1.0 / (rrf_k + rank + 1)
+                if list_index < len(score_keys):
+                    entry[score_keys[list_index]] = result['score']
+        
+        ranked = sorted(fused.values(), key=lambda entry: entry['score'], reverse=True)
+        return ranked[:top_k]
+    
+    def _build_chroma_filter(self, filters: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Convert our filter format to a Chroma where clause
+        
+        Prices are compared against the numeric 'price_value' metadata
+        written at ingest time, so products without a parsed price never
+        match a price filter.
+        """
+        conditions = []
+        if filters.get('price_max') is not None:
+            conditions.append({'price_value': {'$lte': float(filters['price_max'])}})
+        if filters.get('price_min') is not None:
+            conditions.append({'price_value': {'$gte': float(filters['price_min'])}})
+        if filters.get('price_currency'):
+            conditions.append({'price_currency': filters['price_currency']})
+        
+        if not conditions:
+            return None
+        if len(conditions) == 1:
+            return conditions[0]
+        return {'$and': conditions}
     
     def filter_by_price(self, results: List[Dict[str, Any]], filters: Dict[str, Any]) -> List[Dict[str, Any]]:
         """
-        Filter results by price after retrieval (fallback method)
+        Filter results by price after retrieval
+        
+        Kept for callers holding results from elsewhere; retrieve() already
+        applies price filters inside the search.
         
         Args:
             results: Retrieved documents
@@ -61,6 +315,13 @@ class HybridRetriever:
         Returns:
             Filtered results
         """
+        with span("filter.price", candidates=len(results)) as s:
+            filtered_results = self._filter_by_price(results, filters)
+            s.set(results=len(filtered_results))
+        return filtered_results
+    
+    @staticmethod
+    def _filter_by_price(results: List[Dict[str, Any]], filters: Dict[str, Any]) -> List[Dict[str, Any]]:
         filtered_results = []
         
         for result in results:
@@ -0,0 +1,291 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Dict, Any, Callable, Optional, Set, Tuple
+import numpy as np
+from src.config.settings import settings
+from src.retrieval.query_processor import QueryProcessor
+
+
+class _CacheEntry:
+    """A cached answer with the data needed to expire and invalidate it"""
+
+    def __init__(self, response: Dict[str, Any], filters_key: str, embedding: Optional[np.ndarray]):
+        self.response = response
+        self.filters_key = filters_key
+        self.embedding = embedding
+        self.created_at = time.monotonic()
+        self.urls = {
+            source['metadata']['url']
+            for source in response.get('sources', [])
+            if source.get('metadata', {}).get('url')
+        }
+
+
+class QueryCache:
+    """
+    Two-tier cache of query answers
+
+    The exact tier matches the normalized query text plus filters. The
+    optional semantic tier reuses an answer when a new query embedding is
+    within a cosine similarity threshold of a cached one with the same
+    filters. Filters include those parsed from the query text, such as
+    "under $50" and the shards it names, so near-identical queries that
+    differ only there never share an answer. Entries expire after a TTL, the cache is LRU-bounded, and
+    entries are invalidated when a crawl rewrites one of their sources.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = None,
+        ttl: float = None,
+        semantic_threshold: Optional[float] = None,
+        shard_names: Optional[Callable[[], List[str]]] = None
+    ):
+        self.max_entries = max_entries or settings.query_cache_max_entries
+        self.ttl = ttl or settings.query_cache_ttl_seconds
+        self.semantic_threshold = (
+            semantic_threshold if semantic_threshold is not None
+            else settings.query_cache_semantic_threshold
+        )
+        self.shard_names = shard_names
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, _CacheEntry]" = OrderedDict()
+        self._keys_by_url: Dict[str, Set[str]] = {}
+
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+
+    @property
+    def semantic_enabled(self) -> bool:
+        """Whether the semantic tier is configured"""
+        return self.semantic_threshold is not None
+
+    @staticmethod
+    def normalize_query(query: str) -> str:
+        """Normalize query text for exact matching"""
+        return " ".join(query.lower().split())
+
+    @staticmethod
+    def filters_key(filters: Optional[Dict[str, Any]]) -> str:
+        """Canonical form of request filters"""
+        return json.dumps(filters or {}, sort_keys=True, default=str)
+
+    def scope_key(self, query: str, filters: Optional[Dict[str, Any]]) -> str:
+        """Canonical form of a query's filters, parsed and explicit, and the shards it names"""
+        shards = self.shard_names() if self.shard_names is not None and settings.shard_routing_enabled else None
+        processed = QueryProcessor.process_query(query, shards)
+        processed['filters'].update(filters or {})
+        return json.dumps(
+            [processed['filters'], processed.get('shards') or []],
+            sort_keys=True,
+            default=str
+        )
+
+    def get(
+        self,
+        query: str,
+        filters: Optional[Dict[str, Any]] = None,
+        embed: Optional[Callable[[str], List[float]]] = None
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[List[float]]]:
+        """
+        Look up a cached answer
+
+        Args:
+            query: Natural language query
+            filters: Request filters
+            embed: Embeds the query; called only on an exact-tier miss when
+                the semantic tier is enabled
+
+        Returns:
+            The cached response dictionary (or None) and the query embedding
+            if one was computed
+        """
+        filters_key = self.scope_key(query, filters)
+        with self._lock:
+            response = self._exact_lookup(query, filters_key)
+            if response is not None:
+                return response, None
+
+        if not self.semantic_enabled or embed is None:
+            with self._lock:
+                self.misses += 1
+            return None, None
+
+        # Embed outside the lock; it may be a network call
+        embedding = embed(query)
+        with self._lock:
+            return self._semantic_lookup(embedding, filters_key), embedding
+
+    def get_many(
+        self,
+        requests: List[Tuple[str, Optional[Dict[str, Any]]]],
+        embed_batch: Optional[Callable[[List[str]], List[List[float]]]] = None
+    ) -> List[Tuple[Optional[Dict[str, Any]], Optional[List[float]]]]:
+        """
+        Look up cached answers for several queries
+
+        Args:
+            requests: (query, filters) pairs
+            embed_batch: Embeds several queries; called once with every
+                exact-tier miss when the semantic tier is enabled
+
+        Returns:
+            One (cached response or None, query embedding if computed) pair
+            per request, in order
+        """
+        results: List[Tuple[Optional[Dict[str, Any]], Optional[List[float]]]] = [(None, None)] * len(requests)
+        filters_keys = [self.scope_key(query, filters) for query, filters in requests]
+        missed = []
+        with self._lock:
+            for i, (query, _) in enumerate(requests):
+                response = self._exact_lookup(query, filters_keys[i])
+                if response is not None:
+                    results[i] = response, None
+                else:
+                    missed.append(i)
+
+        if not missed:
+            return results
+        if not self.semantic_enabled or embed_batch is None:
+            with self._lock:
+                self.misses += len(missed)
+            return results
+
+        # Embed outside the lock; it may be a network call
+        embeddings = embed_batch([requests[i][0] for i in missed])
+        with self._lock:
+            for i, embedding in zip(missed, embeddings):
+                results[i] = self._semantic_lookup(embedding, filters_keys[i]), embedding
+        return results
+
+    def put(
+        self,
+        query: str,
+        filters: Optional[Dict[str, Any]],
+        response: Dict[str, Any],
+        embedding: Optional[List[float]] = None
+    ):
+        """
+        Cache an answer
+
+        Args:
+            query: Natural language query
+            filters: Request filters
+            response: Response dictionary to cache
+            embedding: Query embedding, for the semantic tier
+        """
+        filters_key = self.scope_key(query, filters)
+        key = self.normalize_query(query) + "\0" + filters_key
+        entry = _CacheEntry(
+            response,
+            filters_key,
+            self._normalize(embedding) if embedding is not None and self.semantic_enabled else None
+        )
+
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = entry
+            for url in entry.urls:
+                self._keys_by_url.setdefault(url, set()).add(key)
+
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate_urls(self, urls: List[str]) -> int:
+        """
+        Drop every cached answer that cites one of the URLs
+
+        Args:
+            urls: URLs whose stored content changed
+
+        Returns:
+            Number of entries dropped
+        """
+        with self._lock:
+            keys = set()
+            for url in urls:
+                keys |= self._keys_by_url.get(url, set())
+            for key in keys:
+                self._remove(key)
+        return len(keys)
+
+    def clear(self):
+        """Drop every cached answer"""
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_url.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit and miss counters and current size"""
+        with self._lock:
+            return {
+                'exact_hits': self.exact_hits,
+                'semantic_hits': self.semantic_hits,
+                'misses': self.misses,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries
+            }
+
+    def _exact_lookup(self, query: str, filters_key: str) -> Optional[Dict[str, Any]]:
+        """Response cached for the normalized query and filters. Caller holds the lock."""
+        key = self.normalize_query(query) + "\0" + filters_key
+        entry = self._live_entry(key)
+        if entry is None:
+            return None
+        self._entries.move_to_end(key)
+        self.exact_hits += 1
+        return entry.response
+
+    def _semantic_lookup(self, embedding: List[float], filters_key: str) -> Optional[Dict[str, Any]]:
+        """
+        Response cached for the most similar query above the threshold,
+        counting a miss if there is none. Caller holds the lock.
+        """
+        query_vector = self._normalize(embedding)
+        best_key, best_score = None, self.semantic_threshold
+        for key in list(self._entries):
+            entry = self._live_entry(key)
+            if entry is None or entry.embedding is None or entry.filters_key != filters_key:
+                continue
+            score = float(np.dot(entry.embedding, query_vector))
+            if score >= best_score:
+                best_key, best_score = key, score
+
+        if best_key is None:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(best_key)
+        self.semantic_hits += 1
+        return self._entries[best_key].response
+
+    def _live_entry(self, key: str) -> Optional[_CacheEntry]:
+        """Get an entry, expiring it if its TTL has passed. Caller holds the lock."""
+        entry = self._entries.get(key)
+        if entry is not None and time.monotonic() - entry.created_at > self.ttl:
+            self._remove(key)
+            return None
+        return entry
+
+    def _remove(self, key: str):
+        """Remove an entry and its URL index references. Caller holds the lock."""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for url in entry.urls:
+            keys = self._keys_by_url.get(url)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_url[url]
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        """Unit-length copy of an embedding, so dot products are cosines"""
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
@@ -1,5 +1,6 @@
 import re
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
+from src.vectorstore.sharding import shard_aliases
 
 
 class QueryProcessor:
@@ -34,15 +35,34 @@ class QueryProcessor:
         return filters if filters else None
     
     @staticmethod
-    def process_query(query: str) -> Dict[str, Any]:
+    def extract_shard_hints(query: str, shards: List[str]) -> Optional[List[str]]:
+        """
+        Find the shards a query names, so the others can be skipped
+        
+        Examples:
+            "gaming laptops under $800", tag shards "laptops", "headphones" -> ["laptops"]
+            "headphones at bestbuy", domain shards "bestbuy.com", "amazon.com" -> ["bestbuy.com"]
+            "what should I buy?" -> None
+        """
+        text = " " + " ".join(re.findall(r'[a-z0-9.]+', query.lower())).replace(". ", " ").rstrip(".") + " "
+        hints = [
+            shard for shard in shards
+            if any(f" {alias} " in text for alias in shard_aliases(shard))
+        ]
+        return hints or None
+    
+    @staticmethod
+    def process_query(query: str, shards: Optional[List[str]] = None) -> Dict[str, Any]:
         """
         Process query and extract all filters
         
         Args:
             query: Natural language query
+            shards: Optional shard names to look for in the query
             
         Returns:
-            Dictionary with 'query' and optional 'filters'
+            Dictionary with 'query', optional 'filters' and, when the
+            query names any of the shards, 'shards'
         """
         result = {
             'query': query,
@@ -54,4 +74,10 @@ class QueryProcessor:
         if price_filters:
             result['filters'].update(price_filters)
         
+        # Route to the shards the query names
+        if shards:
+            shard_hints = QueryProcessor.extract_shard_hints(query, shards)
+            if shard_hints:
+                result['shards'] = shard_hints
+        
         return result
\ No newline at end of file
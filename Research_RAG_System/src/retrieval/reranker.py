@@ -0,0 +1,198 @@
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import List, Dict, Any, Optional
+import numpy as np
+from src.config.settings import settings
+from src.processing.tokens import count_tokens_batch
+from src.retrieval.bm25_index import tokenize
+from src.utils.executor import run_blocking
+from src.vectorstore.embeddings import encode_inputs, load_onnx_model
+
+
+def create_reranker(name: str = None) -> Optional["Reranker"]:
+    """
+    Create the re-ranker selected by settings.rerank_model
+
+    "local:<model>" runs an ONNX cross-encoder on the CPU; "lexical" scores
+    query term coverage without a model. Returns None when re-ranking is
+    disabled.
+    """
+    name = name or settings.rerank_model
+    if not name:
+        return None
+    if name == "lexical":
+        return TermOverlapReranker()
+    provider, separator, model = name.partition(":")
+    if provider != "local" or not separator:
+        raise ValueError(f"Unknown re-ranker {name!r}, expected 'local:<model>' or 'lexical'")
+    return CrossEncoderReranker(model)
+
+
+def passage_text(doc: Dict[str, Any]) -> str:
+    """Text a candidate is scored on: its product title and chunk content"""
+    title = doc.get('metadata', {}).get('title')
+    content = doc.get('content', '')
+    return f"{title}\n{content}" if title else content
+
+
+class RerankTimeout(Exception):
+    """Scoring did not finish before the deadline"""
+
+
+class Reranker(ABC):
+    """
+    Re-scores retrieved candidates against the query
+
+    Candidates are scored in batches, best fused rank first. When the time
+    budget runs out the remaining candidates keep their retrieval order
+    behind the scored ones, so a slow re-ranker degrades to plain retrieval
+    instead of delaying the answer. Subclasses implement score_batch.
+    """
+
+    def __init__(self, batch_size: int = None, timeout: float = None):
+        self.batch_size = batch_size or settings.rerank_batch_size
+        self.timeout = timeout if timeout is not None else settings.rerank_timeout
+
+        self.timeouts = 0
+
+    @abstractmethod
+    def score_batch(self, query: str, passages: List[str], deadline: float) -> List[float]:
+        """
+        Relevance scores for passages, higher is better
+
+        Raises:
+            RerankTimeout: If scoring passes the monotonic deadline
+        """
+
+    def rerank(
+        self,
+        query: str,
+        candidates: List[Dict[str, Any]],
+        top_k: int,
+        token_budget: int = None,
+        min_score: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Keep the best candidates that fit a token budget
+
+        Args:
+            query: Search query
+            candidates: Retrieved documents, best first
+            top_k: Maximum number of documents to keep
+            token_budget: Maximum total content tokens kept; the best
+                document is always kept
+            min_score: Drop scored documents below this relevance score,
+                keeping at least the best one
+
+        Returns:
+            Documents in re-ranked order, with 'rerank_score' set on the
+            ones scored before the deadline
+        """
+        if token_budget is None:
+            token_budget = settings.rerank_token_budget
+        if min_score is None:
+            min_score = settings.rerank_min_score
+        if not candidates:
+            return []
+
+        deadline = time.monotonic() + self.timeout
+        scored = []
+        for start in range(0, len(candidates), self.batch_size):
+            batch = candidates[start:start + self.batch_size]
+            try:
+                scores = self.score_batch(query, [passage_text(doc) for doc in batch], deadline)
+            except RerankTimeout:
+                self.timeouts += 1
+                break
+            for doc, score in zip(batch, scores):
+                scored.append({**doc, 'rerank_score': float(score)})
+            if time.monotonic() >= deadline and start + self.batch_size < len(candidates):
+                self.timeouts += 1
+                break
+
+        ranked = sorted(scored, key=lambda doc: doc['rerank_score'], reverse=True)
+        if min_score is not None:
+            ranked = [doc for doc in ranked if doc['rerank_score'] >= min_score] or ranked[:1]
+        ranked += candidates[len(scored):]
+
+        kept = []
+        used = 0
+        for doc, tokens in zip(ranked[:top_k], count_tokens_batch([doc.get('content', '') for doc in ranked[:top_k]])):
+            if kept and used + tokens > token_budget:
+                break
+            kept.append(doc)
+            used += tokens
+        return kept
+
+    async def arerank(
+        self,
+        query: str,
+        candidates: List[Dict[str, Any]],
+        top_k: int,
+        token_budget: int = None,
+        min_score: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """Async rerank, run in the bounded blocking executor"""
+        return await run_blocking(self.rerank, query, candidates, top_k, token_budget, min_score)
+
+
+class TermOverlapReranker(Reranker):
+    """
+    Model-free re-ranker scoring the fraction of query terms a passage contains
+
+    Cheap enough to always finish in time; useful where no cross-encoder is
+    available. Ties keep their retrieval order.
+    """
+
+    def score_batch(self, query: str, passages: List[str], deadline: float) -> List[float]:
+        terms = set(tokenize(query))
+        if not terms:
+            return [0.0] * len(passages)
+        return [len(terms.intersection(tokenize(passage))) / len(terms) for passage in passages]
+
+
+class CrossEncoderReranker(Reranker):
+    """
+    Re-ranker running a local ONNX cross-encoder on (query, passage) pairs
+
+    The model directory holds model.onnx (or onnx/model.onnx) and
+    tokenizer.json, e.g. an exported ms-marco-MiniLM-L-6-v2. A batch still
+    running at the deadline is terminated through ONNX Runtime's run
+    options, so the time budget also bounds a single slow batch.
+    """
+
+    def __init__(self, model: str, threads: int = None, max_length: int = None, **kwargs):
+        super().__init__(**kwargs)
+        threads = threads if threads is not None else settings.embedding_threads
+        self.tokenizer, self.session = load_onnx_model(model, threads, max_length or settings.rerank_max_length)
+        self.input_names = [model_input.name for model_input in self.session.get_inputs()]
+        self._run_lock = threading.Lock()
+
+    def score_batch(self, query: str, passages: List[str], deadline: float) -> List[float]:
+        # Imported by load_onnx_model, which reports a missing install
+        import onnxruntime
+
+        inputs = encode_inputs(self.tokenizer.encode_batch([(query, passage) for passage in passages]))
+        run_options = onnxruntime.RunOptions()
+
+        with self._run_lock:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise RerankTimeout()
+            timer = threading.Timer(remaining, setattr, (run_options, 'terminate', True))
+            timer.start()
+            try:
+                logits = self.session.run(None, {name: inputs[name] for name in self.input_names}, run_options)[0]
+            except Exception:
+                if run_options.terminate:
+                    raise RerankTimeout()
+                raise
+            finally:
+                timer.cancel()
+
+        # One relevance logit per pair, or [irrelevant, relevant] logits
+        logits = np.asarray(logits, dtype=np.float32).reshape(len(passages), -1)
+        if logits.shape[1] == 1:
+            return logits[:, 0].tolist()
+        return (logits[:, -1] - logits[:, 0]).tolist()
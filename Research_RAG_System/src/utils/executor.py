@@ -0,0 +1,95 @@
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Optional, Sequence
+from src.config.settings import settings
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+_scatter_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Get or create the bounded pool that runs blocking calls off the event loop"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.blocking_executor_workers,
+                thread_name_prefix="blocking"
+            )
+        return _executor
+
+
+async def run_blocking(func: Callable, *args, **kwargs) -> Any:
+    """
+    Run a blocking call in the bounded executor and await its result
+
+    Context variables are copied into the worker thread, so request-scoped
+    state stays visible to the call.
+
+    Args:
+        func: Blocking callable
+        *args: Positional arguments for func
+        **kwargs: Keyword arguments for func
+
+    Returns:
+        Whatever func returns
+    """
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    call = functools.partial(context.run, func, *args, **kwargs)
+    return await loop.run_in_executor(get_executor(), call)
+
+
+def get_scatter_executor() -> ThreadPoolExecutor:
+    """
+    Get or create the pool that runs the per-shard parts of one search
+
+    Kept apart from the blocking executor, whose threads wait on it, so a
+    busy blocking executor cannot starve the searches it is waiting for.
+    """
+    global _scatter_executor
+    with _executor_lock:
+        if _scatter_executor is None:
+            _scatter_executor = ThreadPoolExecutor(
+                max_workers=settings.shard_search_workers,
+                thread_name_prefix="scatter"
+            )
+        return _scatter_executor
+
+
+def scatter(func: Callable, items: Sequence[Any]) -> List[Any]:
+    """
+    Call func on every item in parallel and collect the results in order
+
+    A single item is handled in the calling thread. Each call runs in a
+    copy of the caller's context, like run_blocking.
+
+    Args:
+        func: Blocking callable taking one item
+        items: Items to call it on
+
+    Returns:
+        func(item) for each item; the first exception raised is re-raised
+    """
+    if len(items) <= 1:
+        return [func(item) for item in items]
+    executor = get_scatter_executor()
+    futures = [executor.submit(contextvars.copy_context().run, func, item) for item in items]
+    return [future.result() for future in futures]
+
+
+def shutdown_executor():
+    """Wait for running blocking calls and release the executor threads"""
+    global _executor, _scatter_executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+            _executor = None
+        if _scatter_executor is not None:
+            _scatter_executor.shutdown(wait=True)
+            _scatter_executor = None
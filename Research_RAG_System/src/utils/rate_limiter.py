@@ -0,0 +1,519 @@
+import asyncio
+import contextlib
+import contextvars
+import itertools
+import json
+import random
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+import httpx
+from src.config.settings import settings
+from src.observability.tracing import increment
+
+
+# Request priorities; lower is served first
+INTERACTIVE = 0
+BACKGROUND = 1
+
+# Longest a waiter sleeps before re-checking the budgets
+MAX_POLL_INTERVAL = 1.0
+
+_priority: contextvars.ContextVar[int] = contextvars.ContextVar("openai_priority", default=INTERACTIVE)
+
+_DURATION = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNITS = {'ms': 0.001, 's': 1.0, 'm': 60.0, 'h': 3600.0}
+
+
+@contextlib.contextmanager
+def background_priority():
+    """Run OpenAI calls made inside the block behind interactive ones"""
+    token = _priority.set(BACKGROUND)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """Seconds in a rate limit header value such as "6m0s", "20ms" or "1.5" """
+    if not value:
+        return None
+    parts = _DURATION.findall(value)
+    if not parts:
+        try:
+            return float(value)
+        except ValueError:
+            return None
+    return sum(float(number) * _DURATION_UNITS[unit] for number, unit in parts)
+
+
+def estimate_request(content: bytes) -> Tuple[str, int]:
+    """
+    Model and token cost of a chat or embedding request body
+
+    Text is estimated at four characters per token, the way the API
+    estimates it for rate limiting; the requested completion tokens count
+    against the budget too.
+    """
+    try:
+        body = json.loads(content or b"{}")
+    except ValueError:
+        return "", 0
+    if not isinstance(body, dict):
+        return "", 0
+
+    chars = 0
+    tokens = 0
+    for message in body.get('messages') or []:
+        content_value = message.get('content') if isinstance(message, dict) else None
+        if isinstance(content_value, str):
+            chars += len(content_value)
+        elif isinstance(content_value, list):
+            chars += sum(len(part.get('text', '')) for part in content_value if isinstance(part, dict))
+
+    inputs = body.get('input')
+    if isinstance(inputs, str):
+        chars += len(inputs)
+    elif isinstance(inputs, list):
+        for item in inputs:
+            if isinstance(item, str):
+                chars += len(item)
+            elif isinstance(item, list):
+                # Pre-tokenized input
+                tokens += len(item)
+            else:
+                tokens += 1
+
+    completion = body.get('max_completion_tokens') or body.get('max_tokens') or 0
+    return str(body.get('model', '')), tokens + chars // 4 + int(completion)
+
+
+class _Bucket:
+    """Per-minute budget refilled continuously; unlimited until its size is known"""
+
+    __slots__ = ("capacity", "level", "updated")
+
+    def __init__(self, per_minute: Optional[float]):
+        self.capacity = float(per_minute) if per_minute else None
+        self.level = self.capacity or 0.0
+        self.updated = time.monotonic()
+
+    def refill(self, now: float):
+        if self.capacity is not None:
+            self.level = min(self.capacity, self.level + (now - self.updated) * self.capacity / 60.0)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until amount is available"""
+        if self.capacity is None:
+            return 0.0
+        # A request larger than the whole budget waits for a full bucket
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) * 60.0 / self.capacity
+
+    def take(self, amount: float):
+        if self.capacity is not None:
+            self.level -= amount
+
+    def sync(self, limit: Optional[str], remaining: Optional[str]):
+        """Adopt the limit and remaining budget reported by the API"""
+        try:
+            learned = self.capacity is None
+            if limit:
+                self.capacity = float(limit)
+            if remaining is not None and self.capacity is not None:
+                # Calls admitted since this response was sent are already
+                # taken from our level, so never raise it from the header
+                self.level = float(remaining) if learned else min(self.level, float(remaining))
+        except ValueError:
+            pass
+
+
+class _Ticket:
+    """A waiting or admitted call"""
+
+    __slots__ = ("priority", "model", "tokens", "seq", "event", "loop")
+
+    def __init__(self, priority: int, model: str, tokens: int, seq: int, event, loop=None):
+        self.priority = priority
+        self.model = model
+        self.tokens = tokens
+        self.seq = seq
+        self.event = event
+        self.loop = loop
+
+    def wake(self):
+        if self.loop is None:
+            self.event.set()
+        else:
+            self.loop.call_soon_threadsafe(self.event.set)
+
+
+class RateLimiter:
+    """
+    Shared admission control for OpenAI API calls
+
+    Calls are admitted in priority order (interactive before background,
+    then first come first served) when three conditions hold:
+    - A concurrency slot is free. The number of slots adapts by AIMD: it
+      grows by one per window of successful calls and halves on a 429.
+    - The model's requests-per-minute and tokens-per-minute budgets, synced
+      from the x-ratelimit-* response headers, cover the call.
+    - No backoff is in progress. A 429 pauses all calls for its retry-after
+      time, or an exponential delay, with jitter.
+
+    Background calls may hold at most background_share of the slots, so
+    interactive queries are not starved by ingestion. Budgets are per
+    model: a call waiting for its model's budget does not hold up calls to
+    other models, while calls to the same model keep their order.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[int] = None,
+        tokens_per_minute: Optional[int] = None,
+        max_concurrency: int = None,
+        initial_concurrency: int = None,
+        background_share: float = None,
+        backoff_base: float = None
+    ):
+        self.requests_per_minute = requests_per_minute if requests_per_minute is not None else settings.openai_rpm_limit
+        self.tokens_per_minute = tokens_per_minute if tokens_per_minute is not None else settings.openai_tpm_limit
+        self.max_concurrency = max_concurrency or settings.openai_max_concurrency
+        self.limit = float(min(initial_concurrency or settings.openai_initial_concurrency, self.max_concurrency))
+        self.background_share = background_share if background_share is not None else settings.openai_background_share
+        self.backoff_base = backoff_base if backoff_base is not None else settings.openai_backoff_base
+
+        self._lock = threading.Lock()
+        self._budgets: Dict[str, Tuple[_Bucket, _Bucket]] = {}
+        self._waiters: List[_Ticket] = []
+        self._seq = itertools.count()
+        self._paused_until = 0.0
+        self._last_decrease = 0.0
+        self.in_flight = 0
+        self.background_in_flight = 0
+        self.admitted = 0
+        self.throttled = 0
+
+    def acquire(self, model: str, tokens: int, priority: int = INTERACTIVE) -> _Ticket:
+        """Block until a call may start; release the returned ticket when it ends"""
+        ticket = _Ticket(priority, model, tokens, next(self._seq), threading.Event())
+        self._enqueue(ticket)
+        try:
+            while True:
+                delay = self._try_admit(ticket)
+                if delay is None:
+                    return ticket
+                ticket.event.wait(min(delay, MAX_POLL_INTERVAL))
+                ticket.event.clear()
+        except BaseException:
+            self._abandon(ticket)
+            raise
+
+    async def aacquire(self, model: str, tokens: int, priority: int = INTERACTIVE) -> _Ticket:
+        """Async acquire"""
+        ticket = _Ticket(priority, model, tokens, next(self._seq), asyncio.Event(), asyncio.get_running_loop())
+        self._enqueue(ticket)
+        try:
+            while True:
+                delay = self._try_admit(ticket)
+                if delay is None:
+                    return ticket
+                try:
+                    await asyncio.wait_for(ticket.event.wait(), timeout=min(delay, MAX_POLL_INTERVAL))
+                except asyncio.TimeoutError:
+                    pass
+                ticket.event.clear()
+        except BaseException:
+            self._abandon(ticket)
+            raise
+
+    def record(self, ticket: _Ticket, status: int, headers: httpx.Headers, attempt: int = 0):
+        """
+        Learn from a response: sync the budgets and adapt the concurrency
+
+        Args:
+            ticket: The admitted call
+            status: HTTP status code
+            headers: Response headers
+            attempt: Retry attempt of the call, for the backoff delay
+        """
+        now = time.monotonic()
+        with self._lock:
+            requests, tokens = self._budget(ticket.model)
+            requests.refill(now)
+            tokens.refill(now)
+            requests.sync(headers.get('x-ratelimit-limit-requests'), headers.get('x-ratelimit-remaining-requests'))
+            tokens.sync(headers.get('x-ratelimit-limit-tokens'), headers.get('x-ratelimit-remaining-tokens'))
+
+            if status == 429:
+                self.throttled += 1
+                # Simultaneous 429s are one congestion signal
+                if now - self._last_decrease >= 1.0:
+                    self.limit = max(1.0, self.limit / 2)
+                    self._last_decrease = now
+                delay = self._retry_after(headers)
+                if delay is None:
+                    delay = self.backoff_base * (2 ** attempt)
+                self._paused_until = max(self._paused_until, now + delay * random.uniform(1.0, 1.5))
+            elif status < 500:
+                self.limit = min(float(self.max_concurrency), self.limit + 1.0 / self.limit)
+        if status == 429:
+            increment("openai_throttled", model=ticket.model)
+
+    def release(self, ticket: _Ticket):
+        """Free the call's concurrency slot"""
+        with self._lock:
+            self.in_flight -= 1
+            if ticket.priority == BACKGROUND:
+                self.background_in_flight -= 1
+            heads = self._heads()
+        for head in heads:
+            head.wake()
+
+    def stats(self) -> Dict[str, Any]:
+        """Current concurrency limit and counters"""
+        with self._lock:
+            return {
+                'concurrency_limit': int(self.limit),
+                'in_flight': self.in_flight,
+                'waiting': len(self._waiters),
+                'admitted': self.admitted,
+                'throttled': self.throttled
+            }
+
+    def _budget(self, model: str) -> Tuple[_Bucket, _Bucket]:
+        """Requests and tokens buckets of a model; limits are per model"""
+        budget = self._budgets.get(model)
+        if budget is None:
+            budget = self._budgets[model] = (_Bucket(self.requests_per_minute), _Bucket(self.tokens_per_minute))
+        return budget
+
+    def _enqueue(self, ticket: _Ticket):
+        with self._lock:
+            self._waiters.append(ticket)
+            self._waiters.sort(key=lambda waiter: (waiter.priority, waiter.seq))
+
+    def _abandon(self, ticket: _Ticket):
+        with self._lock:
+            if ticket in self._waiters:
+                self._waiters.remove(ticket)
+            heads = self._heads()
+        for head in heads:
+            head.wake()
+
+    def _heads(self) -> List[_Ticket]:
+        """First waiter for each model. Caller holds the lock."""
+        heads: Dict[str, _Ticket] = {}
+        for waiter in self._waiters:
+            heads.setdefault(waiter.model, waiter)
+        return list(heads.values())
+
+    def _budget_wait(self, ticket: _Ticket, now: float) -> float:
+        """Seconds until the model's budgets cover the ticket. Caller holds the lock."""
+        requests, tokens = self._budget(ticket.model)
+        requests.refill(now)
+        tokens.refill(now)
+        return max(requests.wait_time(1), tokens.wait_time(ticket.tokens))
+
+    def _try_admit(self, ticket: _Ticket) -> Optional[float]:
+        """Admit the ticket, or return how long to wait before trying again"""
+        now = time.monotonic()
+        with self._lock:
+            if now < self._paused_until:
+                return self._paused_until - now
+
+            # Waiters ahead go first, unless only their own model's budget
+            # holds them back and this call is for another model
+            blocked = set()
+            for waiter in self._waiters:
+                if waiter is ticket:
+                    break
+                if waiter.model in blocked:
+                    continue
+                if waiter.model == ticket.model or self._budget_wait(waiter, now) <= 0:
+                    return MAX_POLL_INTERVAL
+                blocked.add(waiter.model)
+
+            if self.in_flight >= int(self.limit):
+                return MAX_POLL_INTERVAL
+            if ticket.priority == BACKGROUND and self.background_in_flight >= max(1, int(self.limit * self.background_share)):
+                return MAX_POLL_INTERVAL
+
+            delay = self._budget_wait(ticket, now)
+            if delay > 0:
+                return delay
+
+            requests, tokens = self._budget(ticket.model)
+            requests.take(1)
+            tokens.take(ticket.tokens)
+            self._waiters.remove(ticket)
+            self.in_flight += 1
+            if ticket.priority == BACKGROUND:
+                self.background_in_flight += 1
+            self.admitted += 1
+            heads = self._heads()
+        # The next waiters may fit in the remaining slots
+        for head in heads:
+            head.wake()
+        return None
+
+    @staticmethod
+    def _retry_after(headers: httpx.Headers) -> Optional[float]:
+        """Delay requested by a 429 response, in seconds"""
+        if headers.get('retry-after-ms'):
+            try:
+                return float(headers['retry-after-ms']) / 1000
+            except ValueError:
+                pass
+        for name in ('retry-after', 'x-ratelimit-reset-requests', 'x-ratelimit-reset-tokens'):
+            delay = parse_duration(headers.get(name))
+            if delay is not None:
+                return delay
+        return None
+
+
+class _ReleasingStream(httpx.SyncByteStream):
+    """Response body that frees the call's slot once it is closed"""
+
+    def __init__(self, stream: httpx.SyncByteStream, release):
+        self._stream = stream
+        self._release = release
+
+    def __iter__(self):
+        yield from self._stream
+
+    def close(self):
+        try:
+            self._stream.close()
+        finally:
+            if self._release is not None:
+                self._release()
+                self._release = None
+
+
+class _AsyncReleasingStream(httpx.AsyncByteStream):
+    """Async response body that frees the call's slot once it is closed"""
+
+    def __init__(self, stream: httpx.AsyncByteStream, release):
+        self._stream = stream
+        self._release = release
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self):
+        try:
+            await self._stream.aclose()
+        finally:
+            if self._release is not None:
+                self._release()
+                self._release = None
+
+
+def _give_up(response: httpx.Response):
+    """Stop the OpenAI client from retrying a 429 the limiter already retried"""
+    response.headers['x-should-retry'] = 'false'
+
+
+class RateLimitedTransport(httpx.BaseTransport):
+    """
+    httpx transport admitting each request through a RateLimiter
+
+    429 responses are retried here, after the limiter's backoff, up to
+    settings.openai_max_retries times. The concurrency slot is held until
+    the response body is closed, so streamed completions count as in flight.
+    """
+
+    def __init__(self, limiter: "RateLimiter" = None, transport: httpx.BaseTransport = None):
+        self.limiter = limiter or get_rate_limiter()
+        self.transport = transport or httpx.HTTPTransport()
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        model, tokens = estimate_request(request.read())
+        priority = _priority.get()
+        for attempt in range(settings.openai_max_retries + 1):
+            ticket = self.limiter.acquire(model, tokens, priority)
+            try:
+                response = self.transport.handle_request(request)
+            except BaseException:
+                self.limiter.release(ticket)
+                raise
+            self.limiter.record(ticket, response.status_code, response.headers, attempt)
+            if response.status_code != 429:
+                response.stream = _ReleasingStream(response.stream, lambda ticket=ticket: self.limiter.release(ticket))
+                return response
+            self.limiter.release(ticket)
+            if attempt == settings.openai_max_retries:
+                _give_up(response)
+                return response
+            response.close()
+
+    def close(self):
+        self.transport.close()
+
+
+class AsyncRateLimitedTransport(httpx.AsyncBaseTransport):
+    """Async RateLimitedTransport"""
+
+    def __init__(self, limiter: "RateLimiter" = None, transport: httpx.AsyncBaseTransport = None):
+        self.limiter = limiter or get_rate_limiter()
+        self.transport = transport or httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        model, tokens = estimate_request(await request.aread())
+        priority = _priority.get()
+        for attempt in range(settings.openai_max_retries + 1):
+            ticket = await self.limiter.aacquire(model, tokens, priority)
+            try:
+                response = await self.transport.handle_async_request(request)
+            except BaseException:
+                self.limiter.release(ticket)
+                raise
+            self.limiter.record(ticket, response.status_code, response.headers, attempt)
+            if response.status_code != 429:
+                response.stream = _AsyncReleasingStream(response.stream, lambda ticket=ticket: self.limiter.release(ticket))
+                return response
+            self.limiter.release(ticket)
+            if attempt == settings.openai_max_retries:
+                _give_up(response)
+                return response
+            await response.aclose()
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+
+_limiter: Optional[RateLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Get or create the limiter shared by every OpenAI client in the process"""
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = RateLimiter()
+        return _limiter
+
+
+def openai_http_clients() -> Dict[str, Any]:
+    """
+    HTTP client arguments for ChatOpenAI and OpenAIEmbeddings
+
+    Returns:
+        {'http_client': ..., 'http_async_client': ...} routing requests
+        through the shared limiter, or {} if rate limiting is disabled
+    """
+    if not settings.openai_rate_limit_enabled:
+        return {}
+    limiter = get_rate_limiter()
+    return {
+        'http_client': httpx.Client(transport=RateLimitedTransport(limiter)),
+        'http_async_client': httpx.AsyncClient(transport=AsyncRateLimitedTransport(limiter))
+    }
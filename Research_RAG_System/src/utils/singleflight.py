@@ -0,0 +1,116 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Hashable
+from src.observability.tracing import increment
+
+
+class _Flight:
+    """One in-flight async call and the number of callers awaiting it"""
+
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical calls into one execution
+
+    The first caller for a key runs the call; callers arriving with the same
+    key while it runs wait for it and receive its result, or its exception.
+    Nothing is cached: once the call finishes the next caller runs it again.
+
+    An async caller that is cancelled stops waiting without cancelling the
+    shared call, unless it was the last caller waiting for it.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._futures: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.shared = 0
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Await func(), or the run of it already in flight for key
+
+        Args:
+            key: Identity of the call, e.g. the normalized query and filters
+            func: Coroutine function to run if no identical call is in flight
+
+        Returns:
+            Whatever func returns
+        """
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(func()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _, key=key, flight=flight: self._land(key, flight))
+            self.calls += 1
+        else:
+            self.shared += 1
+            increment("singleflight_shared", call=self.name)
+
+        flight.waiters += 1
+        try:
+            # Shielded, so one caller's cancellation does not reach the others
+            return await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            if flight.waiters == 1 and not flight.task.done():
+                # Nobody else is waiting: stop the call and let the next caller start afresh
+                self._land(key, flight)
+                flight.task.cancel()
+            raise
+        finally:
+            flight.waiters -= 1
+
+    def do_sync(self, key: Hashable, func: Callable[[], Any]) -> Any:
+        """
+        Blocking do(): call func(), or wait for the run already in flight for key
+
+        Args:
+            key: Identity of the call
+            func: Callable to run if no identical call is in flight
+
+        Returns:
+            Whatever func returns
+        """
+        with self._lock:
+            future = self._futures.get(key)
+            leader = future is None
+            if leader:
+                future = self._futures[key] = Future()
+                self.calls += 1
+            else:
+                self.shared += 1
+        if not leader:
+            increment("singleflight_shared", call=self.name)
+            return future.result()
+
+        try:
+            result = func()
+        except BaseException as e:
+            self._land_sync(key)
+            future.set_exception(e)
+            raise
+        self._land_sync(key)
+        future.set_result(result)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        """Executed and coalesced call counts"""
+        return {'calls': self.calls, 'shared': self.shared, 'in_flight': len(self._flights) + len(self._futures)}
+
+    def _land(self, key: Hashable, flight: _Flight):
+        """Stop routing new callers to a finished or abandoned flight"""
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    def _land_sync(self, key: Hashable):
+        with self._lock:
+            del self._futures[key]
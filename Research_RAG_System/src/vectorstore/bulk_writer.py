@@ -0,0 +1,205 @@
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from typing import List, Dict, Any, Callable, Optional
+from src.config.settings import settings
+from src.observability.tracing import span
+from src.processing.tokens import count_tokens_batch
+from src.utils.rate_limiter import background_priority
+from src.vectorstore.chroma_store import ChromaVectorStore
+
+
+# OpenAI accepts at most this many inputs per embedding request
+MAX_EMBEDDING_INPUTS = 2048
+
+
+class _PendingDocument:
+    """Chunks of one document waiting to be written"""
+
+    def __init__(self, chunks: List[Dict[str, Any]], tokens: List[int]):
+        self.chunks = chunks
+        self.tokens = tokens
+        self.ids = [chunk.get('id') or str(uuid.uuid4()) for chunk in chunks]
+        self.future: Future = Future()
+        self.error: Optional[Exception] = None
+
+
+class BulkVectorWriter:
+    """
+    Buffers chunks from many documents and writes them to Chroma in bulk
+
+    Chunks are embedded in batches sized by token count and upserted in
+    batches as large as Chroma accepts. The buffer is flushed when it holds
+    enough chunks or when its oldest document has waited long enough.
+    """
+
+    def __init__(
+        self,
+        vector_store: ChromaVectorStore,
+        buffer_chunks: int = None,
+        flush_interval: float = None,
+        batch_tokens: int = None,
+        max_retries: int = None,
+        retry_backoff: float = 0.5
+    ):
+        self.vector_store = vector_store
+        self.buffer_chunks = buffer_chunks or settings.ingest_buffer_chunks
+        self.flush_interval = flush_interval if flush_interval is not None else settings.ingest_flush_interval
+        self.batch_tokens = batch_tokens or settings.embedding_batch_tokens
+        self.max_retries = max_retries if max_retries is not None else settings.ingest_max_retries
+        self.retry_backoff = retry_backoff
+
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._buffer: List[_PendingDocument] = []
+        self._buffered_chunks = 0
+        self._oldest: Optional[float] = None
+
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Start the background thread that flushes on time"""
+        if self._thread is None and self.flush_interval > 0:
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, name="bulk-writer", daemon=True)
+            self._thread.start()
+
+    def close(self):
+        """Stop the background thread and write everything still buffered"""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def add(self, chunks: List[Dict[str, Any]]) -> Future:
+        """
+        Buffer the chunks of one document
+
+        Args:
+            chunks: List of dictionaries with 'text', 'metadata' and optionally
+                'id' and 'tokens' (the text's token count, if already known)
+
+        Returns:
+            Future resolving to the chunk IDs once they are stored
+        """
+        tokens = [chunk.get('tokens') for chunk in chunks]
+        if None in tokens:
+            tokens = count_tokens_batch([chunk['text'] for chunk in chunks])
+        document = _PendingDocument(chunks, tokens)
+        if not chunks:
+            document.future.set_result([])
+            return document.future
+
+        with self._lock:
+            self._buffer.append(document)
+            self._buffered_chunks += len(chunks)
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            full = self._buffered_chunks >= self.buffer_chunks
+
+        if full:
+            self.flush()
+
+        return document.future
+
+    def flush(self):
+        """Embed and write everything currently buffered"""
+        with self._flush_lock:
+            with self._lock:
+                documents = self._buffer
+                self._buffer = []
+                self._buffered_chunks = 0
+                self._oldest = None
+
+            if documents:
+                # Ingestion embeddings queue behind interactive queries
+                with background_priority():
+                    self._write(documents)
+
+    def _run(self):
+        """Flush buffers that have waited longer than the flush interval"""
+        while not self._stopped.wait(self.flush_interval / 4):
+            with self._lock:
+                due = self._oldest is not None and time.monotonic() - self._oldest >= self.flush_interval
+            if due:
+                self.flush()
+            # Save the last writes' side indexes for other API workers once writes stop
+            self.vector_store.maybe_save_indexes()
+
+    def _write(self, documents: List[_PendingDocument]):
+        """Write buffered documents, resolving each document's future"""
+        # Chroma rejects repeated IDs in one write, e.g. a URL queued twice
+        records = []
+        seen = set()
+        for document in documents:
+            for chunk_id, chunk, tokens in zip(document.ids, document.chunks, document.tokens):
+                if chunk_id not in seen:
+                    seen.add(chunk_id)
+                    records.append((document, chunk_id, chunk, tokens))
+
+        write_size = self.vector_store.max_write_batch_size()
+        for batch in self._embedding_batches(records):
+            texts = [chunk['text'] for _, _, chunk, _ in batch]
+            try:
+                with span("embed.documents", texts=len(texts), tokens=sum(record[3] for record in batch)):
+                    vectors = self._with_retries(self.vector_store.embeddings.embed_documents, texts)
+            except Exception as e:
+                self._fail(batch, e)
+                continue
+
+            # A failed write batch only fails the documents it contains
+            for start in range(0, len(batch), write_size):
+                part = batch[start:start + write_size]
+                try:
+                    self._with_retries(
+                        self.vector_store.upsert_embeddings,
+                        [chunk_id for _, chunk_id, _, _ in part],
+                        [chunk['text'] for _, _, chunk, _ in part],
+                        vectors[start:start + write_size],
+                        [chunk['metadata'] for _, _, chunk, _ in part]
+                    )
+                except Exception as e:
+                    self._fail(part, e)
+
+        for document in documents:
+            if document.error is not None:
+                document.future.set_exception(document.error)
+            else:
+                document.future.set_result(document.ids)
+
+    def _embedding_batches(self, records: List[tuple]) -> List[List[tuple]]:
+        """Group records into embedding requests bounded by token count"""
+        batches = []
+        batch = []
+        batch_tokens = 0
+        for record in records:
+            tokens = record[3]
+            if batch and (batch_tokens + tokens > self.batch_tokens or len(batch) >= MAX_EMBEDDING_INPUTS):
+                batches.append(batch)
+                batch = []
+                batch_tokens = 0
+            batch.append(record)
+            batch_tokens += tokens
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def _with_retries(self, func: Callable, *args):
+        """Call func, retrying with jittered exponential backoff"""
+        for attempt in range(self.max_retries + 1):
+            try:
+                return func(*args)
+            except Exception:
+                if attempt == self.max_retries:
+                    raise
+                time.sleep(self.retry_backoff * (2 ** attempt) * random.uniform(0.5, 1.5))
+
+    @staticmethod
+    def _fail(batch: List[tuple], error: Exception):
+        """Mark every document with a chunk in the batch as failed"""
+        for document, _, _, _ in batch:
+            document.error = error
@@ -1,40 +1,406 @@
+import heapq
+import json
+import logging
+import os
+import threading
+import time
 from typing import List, Dict, Any, Optional
+import numpy as np
 import chromadb
 from chromadb.config import Settings as ChromaSettings
-from langchain_openai import OpenAIEmbeddings
+from langchain_core.embeddings import Embeddings
 from langchain_chroma import Chroma
 from src.config.settings import settings
+from src.observability.tracing import span
+from src.retrieval.bm25_index import BM25Index
+from src.utils.executor import run_blocking, scatter
+from src.vectorstore.embedding_cache import CachedEmbeddings
+from src.vectorstore.embeddings import create_embeddings
+from src.vectorstore.fingerprint_index import chunk_id
+from src.vectorstore.quantized_index import QuantizedIndex, distances
+from src.vectorstore.sharding import SHARD_KEYS, shard_collection_name, shard_key
+from src.vectorstore.writer_lock import WriterLock
+
+logger = logging.getLogger(__name__)
+
+# How often processes that do not write check for shards and side indexes from the writer
+SIDE_INDEX_REFRESH_INTERVAL = 1.0
 
 
 class ChromaVectorStore:
     """Manages the Chroma vector database"""
     
-    def __init__(self):
+    def __init__(self, embeddings: Optional[Embeddings] = None, client: Optional[chromadb.ClientAPI] = None):
         # Initialize embeddings
-        self.embeddings = OpenAIEmbeddings(
-            model=settings.embedding_model,
-            openai_api_key=settings.openai_api_key
-        )
+        self.embeddings = embeddings or self._create_embeddings()
         
-        # Initialize Chroma client with persistent storage
-        self.client = chromadb.PersistentClient(
-            path=settings.vector_db_path,
-            settings=ChromaSettings(anonymized_telemetry=False)
-        )
+        # Initialize Chroma client with persistent storage, or a pooled client for a Chroma server
+        self.client = client or self._create_client()
         
-        # Initialize or get collection
+        # Initialize or get collection, with the configured HNSW index
         self.vectorstore = Chroma(
             client=self.client,
             collection_name=settings.collection_name,
-            embedding_function=self.embeddings
+            embedding_function=self.embeddings,
+            collection_configuration={'hnsw': self._hnsw_configuration()}
+        )
+        self.collection = self.client.get_collection(settings.collection_name)
+        self.space = self._apply_search_configuration(self.collection)
+        
+        # With sharding, chunks go to one collection per source domain or tag
+        # and searches scatter across them; the base collection keeps chunks
+        # stored before sharding was enabled
+        if settings.shard_by and settings.shard_by not in SHARD_KEYS:
+            raise ValueError(f"Unsupported shard_by {settings.shard_by!r}, expected one of {SHARD_KEYS}")
+        self.shards: Dict[str, Any] = {'': self.collection}
+        self._shards_lock = threading.Lock()
+        # Chunk count per shard, cached until the shard is written to
+        self._shard_counts: Dict[str, int] = {}
+        self._counts_generation = 0
+        self._counts_lock = threading.Lock()
+        self._discover_shards()
+        
+        # Only the process holding the writer lock ingests and saves the side
+        # indexes; other API workers reload them when the writer saves
+        self.writer_lock = WriterLock(os.path.join(settings.vector_db_path, "writer.lock")) if client is None else None
+        if self.writer_lock is not None and not self.writer_lock.try_acquire() and not settings.vector_db_host:
+            # An embedded Chroma database cannot be shared between processes
+            raise RuntimeError(
+                f"Another process is using {settings.vector_db_path}; set VECTOR_DB_HOST to a Chroma "
+                "server to run several API workers"
+            )
+        self._index_mtimes: Dict[str, float] = {}
+        self._last_refresh = time.monotonic()
+        
+        # Lexical index over the same chunks, persisted next to the Chroma data
+        self.lexical_index: Optional[BM25Index] = None
+        self._last_lexical_save = time.monotonic()
+        self._save_lock = threading.Lock()
+        if settings.bm25_enabled:
+            self.lexical_index = self._load_lexical_index(client is None)
+        
+        # Optional quantized copy of the vectors for first-stage scoring
+        self.quantized_index: Optional[QuantizedIndex] = None
+        if settings.quantized_index:
+            self.quantized_index = self._load_quantized_index(client is None)
+    
+    @staticmethod
+    def _create_client() -> chromadb.ClientAPI:
+        """Client for the configured Chroma server, or for the local database"""
+        if settings.vector_db_host:
+            return chromadb.HttpClient(
+                host=settings.vector_db_host,
+                port=settings.vector_db_port,
+                ssl=settings.vector_db_ssl,
+                settings=ChromaSettings(
+                    anonymized_telemetry=False,
+                    chroma_http_max_connections=settings.vector_db_pool_size,
+                    chroma_http_max_keepalive_connections=settings.vector_db_pool_size
+                )
+            )
+        return chromadb.PersistentClient(
+            path=settings.vector_db_path,
+            settings=ChromaSettings(anonymized_telemetry=False)
         )
     
+    @property
+    def is_writer(self) -> bool:
+        """Whether this process writes to the store and saves its side indexes"""
+        return self.writer_lock is None or self.writer_lock.held
+    
+    def acquire_writer(self) -> bool:
+        """
+        Become the writing process if no other process is
+        
+        A process taking over from a writer that exited reloads the side
+        indexes it saved and rebuilds them if they miss chunks written
+        after the last save.
+        
+        Returns:
+            True if this process is the writer
+        """
+        if self.is_writer:
+            return True
+        if not self.writer_lock.try_acquire():
+            return False
+        if self.lexical_index is not None:
+            self.lexical_index = self._load_lexical_index(True)
+        if self.quantized_index is not None:
+            self.quantized_index = self._load_quantized_index(True)
+        return True
+    
+    def release_writer(self):
+        """Let a standby process take over writing"""
+        if self.writer_lock is not None:
+            self.writer_lock.release()
+    
+    def _needs_rebuild(self, index) -> bool:
+        """
+        Whether a loaded side index has to be rebuilt from the collection
+        
+        The writer rebuilds an index that has fallen out of step with the
+        collection, e.g. after a crash between saves; other processes only
+        build a missing one, in memory, and wait for the writer's save.
+        """
+        count = self._count()
+        if self.is_writer:
+            return len(index) != count
+        return len(index) == 0 and count > 0
+    
+    def _track_mtime(self, path: Optional[str]):
+        """Remember the modification time of a side index file as it is loaded"""
+        if path and os.path.exists(path):
+            self._index_mtimes[path] = os.path.getmtime(path)
+    
+    def _refresh_from_writer(self):
+        """Open shards the writer process has created and reload side indexes it has saved"""
+        if self.is_writer or time.monotonic() - self._last_refresh < SIDE_INDEX_REFRESH_INTERVAL:
+            return
+        self._last_refresh = time.monotonic()
+        self._discover_shards()
+        # The writer's changes are not seen here, so count again
+        self.invalidate_counts()
+        for index in self._side_indexes():
+            try:
+                mtime = os.path.getmtime(index.path)
+            except OSError:
+                continue
+            if mtime == self._index_mtimes.get(index.path):
+                continue
+            try:
+                index.load()
+                self._index_mtimes[index.path] = mtime
+            except Exception as e:
+                logger.error("Error reloading side index from %s: %s", index.path, e)
+    
+    @staticmethod
+    def _hnsw_configuration() -> Dict[str, Any]:
+        """HNSW parameters for a new collection"""
+        return {
+            'space': settings.hnsw_space,
+            'max_neighbors': settings.hnsw_m,
+            'ef_construction': settings.hnsw_ef_construction,
+            'ef_search': settings.hnsw_ef_search
+        }
+    
+    @staticmethod
+    def _apply_search_configuration(collection) -> str:
+        """
+        Bring an existing collection's search-time settings up to date
+        
+        ef_search can change at any time; the distance space, M and
+        ef_construction are fixed when the collection is created.
+        
+        Returns:
+            The collection's distance space
+        """
+        current = (collection.configuration or {}).get('hnsw') or {}
+        if current.get('ef_search') != settings.hnsw_ef_search:
+            collection.modify(configuration={'hnsw': {'ef_search': settings.hnsw_ef_search}})
+        
+        wanted = ChromaVectorStore._hnsw_configuration()
+        fixed = [name for name in ('space', 'max_neighbors', 'ef_construction') if name in current and current[name] != wanted[name]]
+        if fixed:
+            logger.warning(
+                "Collection %s was created with %s; the configured values only apply to a new collection",
+                collection.name,
+                ", ".join(f"{name}={current[name]}" for name in fixed)
+            )
+        return current.get('space', settings.hnsw_space)
+    
+    def _discover_shards(self):
+        """Open shard collections created since the last look, e.g. by another process"""
+        if not settings.shard_by:
+            return
+        prefix = shard_collection_name(settings.collection_name, '')
+        found = {
+            collection.name[len(prefix):]: collection
+            for collection in self.client.list_collections()
+            if collection.name.startswith(prefix)
+        }
+        with self._shards_lock:
+            shards = dict(self.shards)
+            for key, collection in found.items():
+                if key not in shards:
+                    self._apply_search_configuration(collection)
+                    shards[key] = collection
+            # The base collection is only searched while it still holds unsharded chunks
+            if '' in shards and len(shards) > 1 and self.collection.count() == 0:
+                del shards['']
+            self.shards = shards
+    
+    def shard_names(self) -> List[str]:
+        """Keys of the shard collections, empty without sharding"""
+        return sorted(key for key in self.shards if key)
+    
+    def _shard_of(self, metadata: Dict[str, Any]) -> str:
+        """Shard a chunk is written to"""
+        return shard_key(metadata, settings.shard_by) if settings.shard_by else ''
+    
+    def _shard_collection(self, key: str):
+        """Collection holding a shard, created on its first write"""
+        collection = self.shards.get(key)
+        if collection is not None:
+            return collection
+        with self._shards_lock:
+            collection = self.shards.get(key)
+            if collection is None:
+                collection = self.client.get_or_create_collection(
+                    name=shard_collection_name(settings.collection_name, key),
+                    embedding_function=None,
+                    configuration={'hnsw': self._hnsw_configuration()}
+                )
+                # Copy on write, so searches iterate a stable mapping
+                shards = {**self.shards, key: collection}
+                if '' in shards and self.collection.count() == 0:
+                    del shards['']
+                self.shards = shards
+            return collection
+    
+    def _select_shard_keys(self, shards: Optional[List[str]] = None) -> List[str]:
+        """Shards to search: the named shards that exist, otherwise all of them"""
+        current = self.shards
+        if shards:
+            selected = [key for key in shards if key in current]
+            if selected:
+                return selected
+        return list(current)
+    
+    def _select_shards(self, shards: Optional[List[str]] = None) -> list:
+        """Collections of the shards to search"""
+        current = self.shards
+        return [current[key] for key in self._select_shard_keys(shards) if key in current]
+    
+    def _count(self, keys: Optional[List[str]] = None) -> int:
+        """
+        Number of chunks in the given shards, by default in all of them
+        
+        Counts are cached per shard until it is written to, so searches
+        that check whether they have seen every chunk do not query each
+        shard every time.
+        """
+        current = self.shards
+        keys = [key for key in (current if keys is None else keys) if key in current]
+        with self._counts_lock:
+            generation = self._counts_generation
+            counts = dict(self._shard_counts)
+        missing = [key for key in keys if key not in counts]
+        if missing:
+            fresh = dict(zip(missing, scatter(lambda key: current[key].count(), missing)))
+            counts.update(fresh)
+            with self._counts_lock:
+                # A write since the counts were read makes them stale
+                if self._counts_generation == generation:
+                    self._shard_counts.update(fresh)
+        return sum(counts[key] for key in keys)
+    
+    def invalidate_counts(self, keys: Optional[List[str]] = None):
+        """Forget the cached chunk counts of shards that were written to, by default of all of them"""
+        with self._counts_lock:
+            self._counts_generation += 1
+            if keys is None:
+                self._shard_counts.clear()
+            else:
+                for key in keys:
+                    self._shard_counts.pop(key, None)
+    
+    def _iter_stored(self, include: List[str]):
+        """Yield every stored chunk in pages of at most the write batch size"""
+        batch_size = self.max_write_batch_size()
+        for collection in list(self.shards.values()):
+            offset = 0
+            while True:
+                batch = collection.get(include=include, limit=batch_size, offset=offset)
+                yield batch
+                if len(batch['ids']) < batch_size:
+                    break
+                offset += batch_size
+    
+    def _get(
+        self,
+        ids: Optional[List[str]],
+        include: List[str],
+        where: Optional[Dict[str, Any]] = None,
+        shards: Optional[List[str]] = None
+    ) -> Dict[str, list]:
+        """collection.get on the selected shards, with their results concatenated"""
+        collections = self._select_shards(shards)
+        responses = scatter(lambda collection: collection.get(ids=ids, where=where or None, include=include), collections)
+        if len(responses) == 1:
+            return responses[0]
+        merged = {'ids': []}
+        for field in include:
+            merged[field] = []
+        for response in responses:
+            merged['ids'].extend(response['ids'])
+            for field in include:
+                merged[field].extend(response[field])
+        return merged
+    
+    def _load_lexical_index(self, persistent: bool) -> BM25Index:
+        """Load the BM25 index, rebuilding it from the collection if it is missing"""
+        path = os.path.join(settings.vector_db_path, "bm25.idx") if persistent else None
+        self._track_mtime(path)
+        try:
+            index = BM25Index(path)
+        except Exception as e:
+            logger.error("Error loading BM25 index from %s: %s", path, e)
+            if path and self.is_writer:
+                os.remove(path)
+            index = BM25Index(None)
+            index.path = path
+        
+        if self._needs_rebuild(index):
+            index = BM25Index(None)
+            index.path = path
+            self._rebuild_lexical_index(index)
+        return index
+    
+    def _rebuild_lexical_index(self, index: BM25Index):
+        """Index every chunk already stored in the collection"""
+        for batch in self._iter_stored(['documents']):
+            for doc_id, text in zip(batch['ids'], batch['documents']):
+                index.add(doc_id, text or "")
+        if self.is_writer:
+            index.save()
+    
+    def _load_quantized_index(self, persistent: bool) -> QuantizedIndex:
+        """Load the quantized index, rebuilding it from the collection if it is missing"""
+        path = os.path.join(settings.vector_db_path, f"vectors.{settings.quantized_index}") if persistent else None
+        self._track_mtime(path)
+        try:
+            index = QuantizedIndex(settings.quantized_index, path)
+        except Exception as e:
+            logger.error("Error loading quantized index from %s: %s", path, e)
+            if path and self.is_writer:
+                os.remove(path)
+            index = QuantizedIndex(settings.quantized_index, None)
+            index.path = path
+        
+        if self._needs_rebuild(index):
+            index = QuantizedIndex(settings.quantized_index, None)
+            index.path = path
+            for batch in self._iter_stored(['embeddings']):
+                if batch['ids']:
+                    index.add(batch['ids'], batch['embeddings'])
+            if self.is_writer:
+                index.save()
+        return index
+    
+    @staticmethod
+    def _create_embeddings() -> Embeddings:
+        """Create the configured embeddings, behind the embedding cache if enabled"""
+        return create_embeddings()
+    
     def add_documents(self, chunks: List[Dict[str, Any]]) -> List[str]:
         """
         Add document chunks to the vector store
         
+        Chunks are upserted under deterministic IDs, so adding the same
+        chunk twice does not create a duplicate.
+        
         Args:
-            chunks: List of dictionaries with 'text' and 'metadata'
+            chunks: List of dictionaries with 'text', 'metadata' and optionally 'id'
             
         Returns:
             List of document IDs
@@ -44,20 +410,154 @@ class ChromaVectorStore:
         
         texts = [chunk['text'] for chunk in chunks]
         metadatas = [chunk['metadata'] for chunk in chunks]
+        ids = [
+            chunk.get('id') or chunk_id(chunk['metadata'].get('url', ''), i, chunk['text'])
+            for i, chunk in enumerate(chunks)
+        ]
         
-        # Add to vector store
-        ids = self.vectorstore.add_texts(
-            texts=texts,
-            metadatas=metadatas
-        )
+        # Embed and add to vector store
+        with span("embed.documents", texts=len(texts)):
+            vectors = self.embeddings.embed_documents(texts)
+        self.upsert_embeddings(ids, texts, vectors, metadatas)
         
         return ids
     
+    def upsert_embeddings(
+        self,
+        ids: List[str],
+        texts: List[str],
+        vectors: List[List[float]],
+        metadatas: List[Dict[str, Any]]
+    ):
+        """
+        Write already-embedded chunks to the collection
+        
+        Args:
+            ids: Chunk IDs
+            texts: Chunk texts
+            vectors: Embeddings for the texts
+            metadatas: Chunk metadata
+        """
+        with span("chroma.upsert", chunks=len(ids)) as s:
+            groups = self._group_by_shard(metadatas)
+            try:
+                for key, rows in groups.items():
+                    self._shard_collection(key).upsert(
+                        ids=[ids[i] for i in rows],
+                        embeddings=[vectors[i] for i in rows],
+                        documents=[texts[i] for i in rows],
+                        metadatas=[metadatas[i] for i in rows]
+                    )
+            finally:
+                self.invalidate_counts(list(groups))
+            s.set(shards=len(groups))
+            if self.lexical_index is not None:
+                for doc_id, text in zip(ids, texts):
+                    self.lexical_index.add(doc_id, text)
+            if self.quantized_index is not None:
+                self.quantized_index.add(ids, vectors)
+        self.maybe_save_indexes()
+    
+    def _group_by_shard(self, metadatas: List[Dict[str, Any]]) -> Dict[str, List[int]]:
+        """Positions of the chunks going to each shard"""
+        if not settings.shard_by:
+            return {'': list(range(len(metadatas)))}
+        groups: Dict[str, List[int]] = {}
+        for i, metadata in enumerate(metadatas):
+            groups.setdefault(self._shard_of(metadata), []).append(i)
+        return groups
+    
+    def update_metadatas(self, ids: List[str], metadatas: List[Dict[str, Any]]):
+        """
+        Replace the metadata of stored chunks without re-embedding them
+        
+        With sharding, a chunk whose new metadata belongs to another shard,
+        e.g. after its page's first tag changed, is moved there with its
+        stored embedding.
+        """
+        if not ids:
+            return
+        if not settings.shard_by:
+            self.collection.update(ids=ids, metadatas=metadatas)
+            return
+        
+        wanted = {doc_id: self._shard_of(metadata) for doc_id, metadata in zip(ids, metadatas)}
+        new_metadata = dict(zip(ids, metadatas))
+        collections = list(self.shards.items())
+        found = scatter(lambda item: item[1].get(ids=ids, include=[])['ids'], collections)
+        for (key, collection), stored_ids in zip(collections, found):
+            staying = [doc_id for doc_id in stored_ids if wanted[doc_id] == key]
+            if staying:
+                collection.update(ids=staying, metadatas=[new_metadata[doc_id] for doc_id in staying])
+            moving = [doc_id for doc_id in stored_ids if wanted[doc_id] != key]
+            if moving:
+                stored = collection.get(ids=moving, include=['embeddings', 'documents'])
+                self.upsert_embeddings(
+                    stored['ids'],
+                    stored['documents'],
+                    [list(vector) for vector in stored['embeddings']],
+                    [new_metadata[doc_id] for doc_id in stored['ids']]
+                )
+                collection.delete(ids=moving)
+                self.invalidate_counts([key])
+    
+    def delete(self, ids: List[str]):
+        """Delete chunks by ID"""
+        if ids:
+            try:
+                scatter(lambda collection: collection.delete(ids=ids), list(self.shards.values()))
+            finally:
+                self.invalidate_counts()
+            if self.lexical_index is not None:
+                self.lexical_index.remove(ids)
+            if self.quantized_index is not None:
+                self.quantized_index.remove(ids)
+            self.maybe_save_indexes()
+    
+    def _side_indexes(self) -> list:
+        """The lexical and quantized indexes kept next to the collection"""
+        return [index for index in (self.lexical_index, self.quantized_index) if index is not None]
+    
+    def maybe_save_indexes(self):
+        """Save the side indexes with unsaved changes if the save interval has passed"""
+        if not self.is_writer:
+            return
+        if time.monotonic() - self._last_lexical_save < settings.bm25_save_interval:
+            return
+        if self._save_lock.acquire(blocking=False):
+            try:
+                self._last_lexical_save = time.monotonic()
+                for index in self._side_indexes():
+                    if index.dirty:
+                        index.save()
+            finally:
+                self._save_lock.release()
+    
+    def persist(self):
+        """Save the side indexes that have unsaved changes"""
+        if not self.is_writer:
+            return
+        with self._save_lock:
+            for index in self._side_indexes():
+                if index.dirty:
+                    index.save()
+            self._last_lexical_save = time.monotonic()
+    
+    def get_ids_for_url(self, url: str) -> List[str]:
+        """Get the IDs of every chunk stored for a URL"""
+        return self._get(None, [], where={'url': url})['ids']
+    
+    def max_write_batch_size(self) -> int:
+        """Largest number of records Chroma accepts in one write"""
+        return self.client.get_max_batch_size()
+    
     def similarity_search(
         self, 
         query: str, 
         k: int = None,
-        filter: Optional[Dict[str, Any]] = None
+        filter: Optional[Dict[str, Any]] = None,
+        ef: Optional[int] = None,
+        shards: Optional[List[str]] = None
     ) -> List[Dict[str, Any]]:
         """
         Search for similar documents
@@ -66,6 +566,8 @@ class ChromaVectorStore:
             query: Search query
             k: Number of results to return
             filter: Optional metadata filters
+            ef: Optional HNSW candidate list size for this query
+            shards: Optional shards to search instead of all of them
             
         Returns:
             List of documents with content and metadata
@@ -73,31 +575,304 @@ class ChromaVectorStore:
         if k is None:
             k = settings.top_k_results
         
-        # Perform search
-        if filter:
-            results = self.vectorstore.similarity_search_with_score(
-                query=query,
-                k=k,
-                filter=filter
+        with span("embed.query"):
+            vector = self.embeddings.embed_query(query)
+        return self.search_by_vector(vector, k, filter, ef, shards)
+    
+    async def asimilarity_search(
+        self,
+        query: str,
+        k: int = None,
+        filter: Optional[Dict[str, Any]] = None,
+        ef: Optional[int] = None,
+        shards: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Async similarity_search
+        
+        The query is embedded with the async embeddings client; the Chroma
+        lookup runs in the bounded blocking executor.
+        """
+        if k is None:
+            k = settings.top_k_results
+        
+        with span("embed.query"):
+            vector = await self.embeddings.aembed_query(query)
+        return await run_blocking(self.search_by_vector, vector, k, filter, ef, shards)
+    
+    def search_by_vector(
+        self,
+        vector: List[float],
+        k: int,
+        filter: Optional[Dict[str, Any]] = None,
+        ef: Optional[int] = None,
+        shards: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Search for documents similar to an already-embedded query
+        
+        Uses the quantized index with full-precision re-ranking when it is
+        enabled, otherwise Chroma's HNSW index. With sharding, the shards
+        are searched in parallel and their top-k merged by distance.
+        
+        Args:
+            vector: Query embedding
+            k: Number of results to return
+            filter: Optional metadata filters
+            ef: Optional HNSW candidate list size for this query. HNSW
+                searches with max(ef_search, n_results), so a larger ef is
+                applied by asking for ef results and keeping the best k.
+            shards: Optional shards to search instead of all of them
+            
+        Returns:
+            List of documents with content, metadata and distance score
+        """
+        self._refresh_from_writer()
+        if self.quantized_index is not None and len(self.quantized_index):
+            with span("search.quantized", k=k) as s:
+                results = self._quantized_search(vector, k, filter, shards)
+                s.set(results=len(results))
+            if len(results) == k or len(results) == self._count(self._select_shard_keys(shards)):
+                return results
+        
+        collections = self._select_shards(shards)
+        with span("search.dense", k=k, shards=len(collections)) as s:
+            responses = scatter(
+                lambda collection: self._query(collection, [vector], max(k, ef or 0), filter)[0],
+                collections
             )
-        else:
-            results = self.vectorstore.similarity_search_with_score(
-                query=query,
-                k=k
+            results = self._merge(responses, k)
+            s.set(results=len(results))
+        return results
+    
+    async def asimilarity_search_batch(
+        self,
+        queries: List[str],
+        k: int = None,
+        filters: Optional[List[Optional[Dict[str, Any]]]] = None,
+        shards: Optional[List[Optional[List[str]]]] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        similarity_search for several queries at once
+        
+        All queries are embedded in one embedding call and searched with
+        one Chroma query per distinct filter and shard.
+        
+        Args:
+            queries: Search queries
+            k: Number of results per query
+            filters: Optional metadata filter per query
+            shards: Optional shards to search per query
+            
+        Returns:
+            One result list per query, in order
+        """
+        if not queries:
+            return []
+        if k is None:
+            k = settings.top_k_results
+        
+        with span("embed.query", texts=len(queries)):
+            vectors = await self.embeddings.aembed_documents(queries)
+        return await run_blocking(self.search_by_vectors, vectors, k, filters, shards)
+    
+    def search_by_vectors(
+        self,
+        vectors: List[List[float]],
+        k: int,
+        filters: Optional[List[Optional[Dict[str, Any]]]] = None,
+        shards: Optional[List[Optional[List[str]]]] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        search_by_vector for several query embeddings
+        
+        Queries sharing a filter go to each shard as one multi-query request.
+        
+        Args:
+            vectors: Query embeddings
+            k: Number of results per query
+            filters: Optional metadata filter per query
+            shards: Optional shards to search per query
+            
+        Returns:
+            One result list per query, in order
+        """
+        if filters is None:
+            filters = [None] * len(vectors)
+        if shards is None:
+            shards = [None] * len(vectors)
+        if self.quantized_index is not None and len(self.quantized_index):
+            return [
+                self.search_by_vector(vector, k, filter, shards=query_shards)
+                for vector, filter, query_shards in zip(vectors, filters, shards)
+            ]
+        self._refresh_from_writer()
+        
+        # Chroma takes one where clause per request
+        groups: Dict[str, List[int]] = {}
+        for i, filter in enumerate(filters):
+            groups.setdefault(json.dumps(filter or None, sort_keys=True), []).append(i)
+        requests = []
+        for indexes in groups.values():
+            by_shard: Dict[str, tuple] = {}
+            for i in indexes:
+                for collection in self._select_shards(shards[i]):
+                    by_shard.setdefault(collection.name, (collection, []))[1].append(i)
+            requests.extend(by_shard.values())
+        
+        with span("search.dense", k=k, queries=len(vectors), requests=len(requests)) as s:
+            responses = scatter(
+                lambda request: self._query(request[0], [vectors[i] for i in request[1]], k, filters[request[1][0]]),
+                requests
             )
+            per_query: List[List[List[Dict[str, Any]]]] = [[] for _ in vectors]
+            for (_, indexes), response in zip(requests, responses):
+                for i, results in zip(indexes, response):
+                    per_query[i].append(results)
+            results = [self._merge(lists, k) for lists in per_query]
+            s.set(results=sum(len(query_results) for query_results in results))
+        return results
+    
+    @staticmethod
+    def _query(
+        collection,
+        vectors: List[List[float]],
+        k: int,
+        filter: Optional[Dict[str, Any]] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """One Chroma query for several embeddings, formatted per query"""
+        response = collection.query(
+            query_embeddings=vectors,
+            n_results=k,
+            where=filter or None,
+            include=['documents', 'metadatas', 'distances']
+        )
+        return [
+            [
+                {
+                    'id': doc_id,
+                    'content': text,
+                    'metadata': metadata,
+                    'score': float(distance)
+                }
+                for doc_id, text, metadata, distance in zip(
+                    response['ids'][row],
+                    response['documents'][row],
+                    response['metadatas'][row],
+                    response['distances'][row]
+                )
+            ]
+            for row in range(len(vectors))
+        ]
+    
+    @staticmethod
+    def _merge(result_lists: List[List[Dict[str, Any]]], k: int) -> List[Dict[str, Any]]:
+        """The k closest results across shards; distances are comparable, as every shard uses the same space"""
+        if len(result_lists) == 1:
+            return result_lists[0][:k]
+        return heapq.nsmallest(k, (result for results in result_lists for result in results), key=lambda result: result['score'])
+    
+    def _quantized_search(
+        self,
+        vector: List[float],
+        k: int,
+        filter: Optional[Dict[str, Any]] = None,
+        shards: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Score every chunk with the quantized index, then re-rank the best
+        candidates with their full-precision vectors from Chroma
+        
+        The quantized index holds no metadata and covers every shard, so
+        filtered or shard-restricted searches take more candidates and let
+        Chroma apply the filter and shard selection to them.
+        """
+        candidates = k * settings.quantized_rerank_factor * (4 if filter or shards else 1)
+        hits = self.quantized_index.search(vector, candidates, self.space)
+        if not hits:
+            return []
+        
+        ids = [chunk_id for chunk_id, _ in hits]
+        stored = self._get(ids, ['embeddings', 'documents', 'metadatas'], filter, shards)
+        if not stored['ids']:
+            return []
+        
+        exact = distances(self.space, vector, np.asarray(stored['embeddings'], dtype=np.float32))
+        order = np.argsort(exact)[:k]
+        return [
+            {
+                'id': stored['ids'][i],
+                'content': stored['documents'][i],
+                'metadata': stored['metadatas'][i],
+                'score': float(exact[i])
+            }
+            for i in order
+        ]
+    
+    def lexical_search(
+        self,
+        query: str,
+        k: int = None,
+        filter: Optional[Dict[str, Any]] = None,
+        shards: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Search for documents by BM25 keyword match
         
-        # Format results
-        formatted_results = []
-        for doc, score in results:
-            formatted_results.append({
-                'content': doc.page_content,
-                'metadata': doc.metadata,
-                'score': float(score)
-            })
+        Args:
+            query: Search query
+            k: Number of results to return
+            filter: Optional metadata filters
+            shards: Optional shards to search instead of all of them
+            
+        Returns:
+            List of documents with content, metadata and BM25 score
+        """
+        if self.lexical_index is None:
+            return []
+        if k is None:
+            k = settings.top_k_results
+        
+        self._refresh_from_writer()
+        with span("search.lexical", k=k) as s:
+            # Over-fetch when filtering, since some hits will not match the
+            # filter; the index covers every shard
+            hits = self.lexical_index.search(query, k * 4 if filter or shards else k)
+            if not hits:
+                return []
+            
+            scores = dict(hits)
+            stored = self._get(list(scores), ['documents', 'metadatas'], filter, shards)
+            s.set(results=min(len(stored['ids']), k))
         
-        return formatted_results
+        results = [
+            {
+                'id': doc_id,
+                'content': text,
+                'metadata': metadata,
+                'score': scores[doc_id]
+            }
+            for doc_id, text, metadata in zip(stored['ids'], stored['documents'], stored['metadatas'])
+        ]
+        results.sort(key=lambda result: result['score'], reverse=True)
+        return results[:k]
+    
+    async def alexical_search(
+        self,
+        query: str,
+        k: int = None,
+        filter: Optional[Dict[str, Any]] = None,
+        shards: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """Async lexical_search, run in the bounded blocking executor"""
+        return await run_blocking(self.lexical_search, query, k, filter, shards)
+    
+    def get_embedding_cache_stats(self) -> Optional[Dict[str, Any]]:
+        """Get embedding cache counters, or None if the cache is disabled"""
+        if isinstance(self.embeddings, CachedEmbeddings):
+            return self.embeddings.cache.stats()
+        return None
     
     def get_collection_count(self) -> int:
-        """Get the number of documents in the collection"""
-        collection = self.client.get_collection(settings.collection_name)
-        return collection.count()
\ No newline at end of file
+        """Get the number of documents in the collection, across every shard"""
+        return self._count()
\ No newline at end of file
@@ -0,0 +1,195 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from typing import List, Dict, Any, Optional
+from langchain_core.embeddings import Embeddings
+from src.config.settings import settings
+from src.utils.executor import run_blocking
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS embeddings (
+    key TEXT PRIMARY KEY,
+    vector BLOB NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings(last_used);
+"""
+
+
+def normalize_text(text: str) -> str:
+    """Normalize chunk text so formatting-only differences share a cache entry"""
+    return " ".join(text.split())
+
+
+def cache_key(model: str, text: str) -> str:
+    """Content address for a text embedded by a model"""
+    return hashlib.sha256(f"{model}\0{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """Disk-backed store of embeddings keyed by content hash, with LRU eviction"""
+
+    def __init__(self, path: str = None, max_entries: int = None):
+        self.path = path or settings.embedding_cache_path
+        self.max_entries = max_entries or settings.embedding_cache_max_entries
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        self.entries = self.conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+        self.hits = 0
+        self.misses = 0
+
+    def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        """
+        Look up embeddings and mark them as recently used
+
+        Args:
+            keys: Cache keys
+
+        Returns:
+            Mapping of the keys found to their embeddings
+        """
+        found = {}
+        unique = list(dict.fromkeys(keys))
+        with self._lock:
+            # Stay under SQLite's bound parameter limit
+            for start in range(0, len(unique), 500):
+                part = unique[start:start + 500]
+                rows = self.conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(part))})",
+                    part
+                ).fetchall()
+                for key, blob in rows:
+                    vector = array('f')
+                    vector.frombytes(blob)
+                    found[key] = vector.tolist()
+
+            if found:
+                now = time.time()
+                self.conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                    [(now, key) for key in found]
+                )
+
+            hits = sum(1 for key in keys if key in found)
+            self.hits += hits
+            self.misses += len(keys) - hits
+        return found
+
+    def put_many(self, items: Dict[str, List[float]]):
+        """
+        Store embeddings, evicting the least recently used beyond the size cap
+
+        Args:
+            items: Mapping of cache keys to embeddings
+        """
+        if not items:
+            return
+
+        now = time.time()
+        with self._lock, self.conn:
+            self.conn.execute("BEGIN")
+            cursor = self.conn.executemany(
+                "INSERT OR IGNORE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)",
+                [(key, array('f', vector).tobytes(), now) for key, vector in items.items()]
+            )
+            self.entries += cursor.rowcount
+
+            if self.entries > self.max_entries:
+                # Evict a little extra so eviction doesn't run on every insert
+                excess = self.entries - self.max_entries + self.max_entries // 20
+                self.conn.execute(
+                    "DELETE FROM embeddings WHERE key IN "
+                    "(SELECT key FROM embeddings ORDER BY last_used LIMIT ?)",
+                    (excess,)
+                )
+                self.entries = self.conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit and miss counters and current size"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else None,
+            'entries': self.entries,
+            'max_entries': self.max_entries
+        }
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that serves repeated texts from an EmbeddingCache"""
+
+    def __init__(self, embeddings: Embeddings, model: str, cache: Optional[EmbeddingCache] = None):
+        self.embeddings = embeddings
+        self.model = model
+        self.cache = cache or EmbeddingCache()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts, only sending cache misses to the wrapped embeddings"""
+        keys = [cache_key(self.model, text) for text in texts]
+        found = self.cache.get_many(keys)
+
+        # Embed each missing text once, even if it repeats in the batch
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in missing:
+                missing[key] = text
+
+        if missing:
+            vectors = self.embeddings.embed_documents(list(missing.values()))
+            computed = dict(zip(missing.keys(), vectors))
+            self.cache.put_many(computed)
+            found.update(computed)
+
+        return [found[key] for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a query, using the cache when possible"""
+        key = cache_key(self.model, text)
+        found = self.cache.get_many([key])
+        if key in found:
+            return found[key]
+
+        vector = self.embeddings.embed_query(text)
+        self.cache.put_many({key: vector})
+        return vector
+    
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Async embed_documents using the wrapped embeddings' async client"""
+        keys = [cache_key(self.model, text) for text in texts]
+        found = await run_blocking(self.cache.get_many, keys)
+
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in missing:
+                missing[key] = text
+
+        if missing:
+            vectors = await self.embeddings.aembed_documents(list(missing.values()))
+            computed = dict(zip(missing.keys(), vectors))
+            await run_blocking(self.cache.put_many, computed)
+            found.update(computed)
+
+        return [found[key] for key in keys]
+    
+    async def aembed_query(self, text: str) -> List[float]:
+        """Async embed_query using the wrapped embeddings' async client"""
+        key = cache_key(self.model, text)
+        found = await run_blocking(self.cache.get_many, [key])
+        if key in found:
+            return found[key]
+
+        vector = await self.embeddings.aembed_query(text)
+        await run_blocking(self.cache.put_many, {key: vector})
+        return vector
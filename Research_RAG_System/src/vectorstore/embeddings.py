@@ -0,0 +1,282 @@
+import asyncio
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_openai import OpenAIEmbeddings
+from src.config.settings import settings
+from src.utils.executor import run_blocking
+from src.utils.rate_limiter import openai_http_clients
+from src.vectorstore.embedding_cache import CachedEmbeddings
+
+if TYPE_CHECKING:
+    import onnxruntime
+    from tokenizers import Tokenizer
+
+
+EMBEDDING_PROVIDERS = ("openai", "local")
+
+
+def parse_embedding_model(name: str) -> Tuple[str, str]:
+    """
+    Split an embedding model setting into provider and model
+
+    Args:
+        name: "provider:model", or a bare OpenAI model name
+
+    Returns:
+        (provider, model) tuple
+    """
+    provider, separator, model = name.partition(":")
+    if not separator:
+        return "openai", name
+    if provider not in EMBEDDING_PROVIDERS:
+        raise ValueError(f"Unknown embedding provider {provider!r}, expected one of {EMBEDDING_PROVIDERS}")
+    return provider, model
+
+
+def embedding_model_id(name: str) -> str:
+    """
+    Canonical name of an embedding model setting, used in cache keys
+
+    "openai:text-embedding-3-small" and "text-embedding-3-small" name the
+    same model. OpenAI models keep their bare name, so entries cached
+    before provider prefixes existed stay valid.
+    """
+    provider, model = parse_embedding_model(name)
+    return model if provider == "openai" else f"{provider}:{model}"
+
+
+def create_embeddings(name: str = None) -> Embeddings:
+    """
+    Create the embeddings selected by settings.embedding_model
+
+    "openai:<model>" (or a bare model name) uses the OpenAI API;
+    "local:<model>" runs an ONNX model on the CPU. The result is wrapped in
+    the embedding cache if it is enabled.
+    """
+    name = name or settings.embedding_model
+    provider, model = parse_embedding_model(name)
+
+    if provider == "local":
+        embeddings = OnnxEmbeddings(model)
+    else:
+        embeddings = OpenAIEmbeddings(
+            model=model,
+            openai_api_key=settings.openai_api_key,
+            **openai_http_clients()
+        )
+
+    if settings.embedding_cache_enabled:
+        embeddings = CachedEmbeddings(embeddings, model=embedding_model_id(name))
+    return embeddings
+
+
+def model_file(model_dir: str, filename: str) -> str:
+    """Path of a model file in a local model directory or its onnx/ subdirectory"""
+    for path in (os.path.join(model_dir, filename), os.path.join(model_dir, "onnx", filename)):
+        if os.path.exists(path):
+            return path
+    raise FileNotFoundError(f"{filename} not found in {model_dir}")
+
+
+def load_onnx_model(model: str, threads: int, max_length: int) -> Tuple["Tokenizer", "onnxruntime.InferenceSession"]:
+    """
+    Load a local transformer's tokenizer and ONNX Runtime session
+
+    Args:
+        model: Model directory, or its name under settings.local_model_path
+        threads: Intra-op threads, 0 for one per physical core
+        max_length: Tokens kept per input
+
+    Returns:
+        (tokenizer, session) tuple
+    """
+    try:
+        import onnxruntime
+        from tokenizers import Tokenizer
+    except ImportError as e:
+        raise ImportError(
+            "Local models need onnxruntime and tokenizers: pip install 'research-rag-system[local]'"
+        ) from e
+
+    model_dir = model if os.path.isdir(model) else os.path.join(settings.local_model_path, model)
+
+    tokenizer = Tokenizer.from_file(model_file(model_dir, "tokenizer.json"))
+    tokenizer.enable_truncation(max_length=max_length)
+    tokenizer.no_padding()
+
+    options = onnxruntime.SessionOptions()
+    options.intra_op_num_threads = threads
+    options.inter_op_num_threads = 1
+    options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+    session = onnxruntime.InferenceSession(
+        model_file(model_dir, "model.onnx"),
+        sess_options=options,
+        providers=["CPUExecutionProvider"]
+    )
+    return tokenizer, session
+
+
+def encode_inputs(encodings: list) -> Dict[str, np.ndarray]:
+    """Padded transformer input arrays for a batch of tokenizer encodings"""
+    length = max(len(encoding.ids) for encoding in encodings)
+    input_ids = np.zeros((len(encodings), length), dtype=np.int64)
+    attention_mask = np.zeros((len(encodings), length), dtype=np.int64)
+    token_type_ids = np.zeros((len(encodings), length), dtype=np.int64)
+    for row, encoding in enumerate(encodings):
+        input_ids[row, :len(encoding.ids)] = encoding.ids
+        attention_mask[row, :len(encoding.ids)] = 1
+        token_type_ids[row, :len(encoding.ids)] = encoding.type_ids
+
+    return {'input_ids': input_ids, 'attention_mask': attention_mask, 'token_type_ids': token_type_ids}
+
+
+class DynamicBatcher:
+    """
+    Groups items submitted from many threads into batched calls
+
+    A background thread takes the first waiting item, collects whatever else
+    arrives within max_wait seconds (up to max_batch_size items) and passes
+    them to func in one call. Items that queue up while a batch runs go into
+    the next one, so batches grow with load without adding latency when idle.
+    """
+
+    def __init__(self, func: Callable[[List[Any]], List[Any]], max_batch_size: int, max_wait: float):
+        self.func = func
+        self.max_batch_size = max(max_batch_size, 1)
+        self.max_wait = max_wait
+
+        self._queue: "queue.SimpleQueue[Tuple[Any, Future]]" = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+        self.batches = 0
+        self.items = 0
+
+    def submit(self, item: Any) -> Future:
+        """
+        Queue an item for the next batch
+
+        Returns:
+            Future resolving to func's result for this item
+        """
+        self._start()
+        future = Future()
+        self._queue.put((item, future))
+        return future
+
+    def _start(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+                    self._thread.start()
+
+    def _collect(self) -> List[Tuple[Any, Future]]:
+        """Block for the first item, then gather a batch behind it"""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            try:
+                remaining = deadline - time.monotonic()
+                if remaining > 0:
+                    batch.append(self._queue.get(timeout=remaining))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = [(item, future) for item, future in self._collect() if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            self.batches += 1
+            self.items += len(batch)
+            try:
+                results = self.func([item for item, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+
+
+class OnnxEmbeddings(Embeddings):
+    """
+    Sentence embeddings from a local ONNX transformer model on the CPU
+
+    The model directory holds model.onnx (or onnx/model.onnx) and the
+    Hugging Face tokenizer.json, e.g. an exported all-MiniLM-L6-v2.
+    Documents are embedded in length-sorted batches to limit padding;
+    queries from concurrent requests are grouped by a DynamicBatcher.
+    Token embeddings are mean-pooled over the attention mask and
+    L2-normalized.
+    """
+
+    def __init__(
+        self,
+        model: str,
+        threads: int = None,
+        batch_size: int = None,
+        max_length: int = None,
+        batch_wait_ms: float = None
+    ):
+        self.batch_size = batch_size or settings.embedding_max_batch_size
+        self.max_length = max_length or settings.embedding_max_length
+        threads = threads if threads is not None else settings.embedding_threads
+        batch_wait_ms = batch_wait_ms if batch_wait_ms is not None else settings.embedding_batch_wait_ms
+
+        self.tokenizer, self.session = load_onnx_model(model, threads, self.max_length)
+        self.input_names = [model_input.name for model_input in self.session.get_inputs()]
+        # One inference at a time: each run already uses every intra-op thread
+        self._run_lock = threading.Lock()
+
+        self.batcher = DynamicBatcher(self._embed_batch, self.batch_size, batch_wait_ms / 1000)
+
+    def _infer(self, texts: List[str]) -> np.ndarray:
+        """Embed one padded batch"""
+        inputs = encode_inputs(self.tokenizer.encode_batch(texts))
+        with self._run_lock:
+            output = self.session.run(None, {name: inputs[name] for name in self.input_names})[0]
+
+        if output.ndim == 3:
+            mask = inputs['attention_mask'][:, :, None].astype(np.float32)
+            output = (output * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+        norms = np.linalg.norm(output, axis=1, keepdims=True)
+        return output / np.maximum(norms, 1e-12)
+
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts in batches of similar length, returned in input order"""
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        vectors: List[Optional[List[float]]] = [None] * len(texts)
+        for start in range(0, len(order), self.batch_size):
+            rows = order[start:start + self.batch_size]
+            for i, vector in zip(rows, self._infer([texts[i] for i in rows]).tolist()):
+                vectors[i] = vector
+        return vectors
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed document chunks"""
+        if not texts:
+            return []
+        return self._embed_batch(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a query, batched with queries from other requests"""
+        return self.batcher.submit(text).result()
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Async embed_documents; inference runs in the blocking executor"""
+        return await run_blocking(self.embed_documents, texts)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        """Async embed_query; waits on the batcher without holding a thread"""
+        return await asyncio.wrap_future(self.batcher.submit(text))
@@ -0,0 +1,100 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import List, Dict, Any, Optional
+from src.config.settings import settings
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    url TEXT PRIMARY KEY,
+    content_hash TEXT NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    chunk_ids TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+"""
+
+
+def content_hash(text: str) -> str:
+    """Fingerprint of a piece of content"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def page_fingerprint(text: str, metadata: Dict[str, Any]) -> str:
+    """Fingerprint of a cleaned page and the metadata extracted from it"""
+    return content_hash(text + "\0" + json.dumps(metadata, sort_keys=True, default=str))
+
+
+def chunk_id(url: str, chunk_index: int, text: str) -> str:
+    """Deterministic chunk ID derived from URL, position and content"""
+    return hashlib.sha256(f"{url}\0{chunk_index}\0{content_hash(text)}".encode("utf-8")).hexdigest()
+
+
+class FingerprintIndex:
+    """Tracks what was last stored for each URL so re-crawls only write changes"""
+
+    def __init__(self, path: str = None):
+        self.path = path or settings.fingerprint_db_path
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the fingerprint recorded for a URL
+
+        Args:
+            url: Page URL
+
+        Returns:
+            Dictionary with 'content_hash', 'etag', 'last_modified' and
+            'chunk_ids', or None if the URL was never stored
+        """
+        with self._lock:
+            row = self.conn.execute("SELECT * FROM pages WHERE url = ?", (url,)).fetchone()
+        if row is None:
+            return None
+
+        result = dict(row)
+        result['chunk_ids'] = json.loads(result['chunk_ids'])
+        return result
+
+    def put(
+        self,
+        url: str,
+        content_hash: str,
+        chunk_ids: List[str],
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None
+    ):
+        """Record what is now stored for a URL"""
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO pages (url, content_hash, etag, last_modified, chunk_ids, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (url, content_hash, etag, last_modified, json.dumps(chunk_ids), time.time())
+            )
+
+    def update_validators(self, url: str, etag: Optional[str], last_modified: Optional[str]):
+        """Refresh the HTTP cache validators of an unchanged page"""
+        with self._lock:
+            self.conn.execute(
+                "UPDATE pages SET etag = ?, last_modified = ?, updated_at = ? WHERE url = ?",
+                (etag, last_modified, time.time(), url)
+            )
+
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            self.conn.close()
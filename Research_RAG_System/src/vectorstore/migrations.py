@@ -0,0 +1,128 @@
+"""
+One-off data migrations for existing Chroma collections
+
+Usage:
+    python -m src.vectorstore.migrations backfill-prices
+    SHARD_BY=domain python -m src.vectorstore.migrations reshard
+"""
+import argparse
+from typing import Dict, Any
+from src.config.settings import settings
+from src.crawler.metadata_extractor import MetadataExtractor
+from src.vectorstore.chroma_store import ChromaVectorStore
+from src.vectorstore.sharding import shard_key
+
+
+def backfill_price_values(vector_store: ChromaVectorStore) -> Dict[str, Any]:
+    """
+    Add numeric 'price_value' and 'price_currency' metadata to chunks
+    stored before prices were normalized at ingest time
+
+    Safe to run more than once; chunks that already have a numeric price
+    are left alone. Every shard is migrated, and chunks stay in the shard
+    they are in.
+
+    Args:
+        vector_store: Vector store whose collections to migrate
+
+    Returns:
+        Dictionary with the number of chunks scanned and updated
+    """
+    batch_size = vector_store.max_write_batch_size()
+    scanned = 0
+    updated = 0
+
+    for collection in list(vector_store.shards.values()):
+        offset = 0
+        while True:
+            batch = collection.get(include=['metadatas'], limit=batch_size, offset=offset)
+            ids = []
+            metadatas = []
+            for doc_id, metadata in zip(batch['ids'], batch['metadatas']):
+                if not metadata or 'price_value' in metadata or not metadata.get('price'):
+                    continue
+                price_value, price_currency = MetadataExtractor.parse_price(metadata['price'])
+                if price_value is None:
+                    continue
+
+                metadata = dict(metadata)
+                metadata['price_value'] = price_value
+                if price_currency:
+                    metadata['price_currency'] = price_currency
+                ids.append(doc_id)
+                metadatas.append(metadata)
+
+            # Update in place rather than through update_metadatas, which may
+            # move chunks between shards: the page order, and so the offsets,
+            # must not change while paging
+            if ids:
+                collection.update(ids=ids, metadatas=metadatas)
+            scanned += len(batch['ids'])
+            updated += len(ids)
+
+            if len(batch['ids']) < batch_size:
+                break
+            offset += batch_size
+
+    return {'scanned': scanned, 'updated': updated}
+
+
+def reshard(vector_store: ChromaVectorStore) -> Dict[str, Any]:
+    """
+    Move chunks stored before sharding from the base collection into the
+    shards SHARD_BY assigns them to
+
+    Embeddings are copied, not recomputed. Safe to interrupt and run again;
+    chunks are only deleted from the base collection once copied.
+
+    Args:
+        vector_store: Vector store whose base collection to split
+
+    Returns:
+        Dictionary with the number of chunks moved per shard
+    """
+    if not settings.shard_by:
+        raise ValueError("Set SHARD_BY to 'domain' or 'tag' before resharding")
+
+    collection = vector_store.collection
+    batch_size = vector_store.max_write_batch_size()
+    moved: Dict[str, int] = {}
+
+    while True:
+        # Moved chunks leave the base collection, so always read its first page
+        batch = collection.get(include=['embeddings', 'documents', 'metadatas'], limit=batch_size)
+        if not batch['ids']:
+            break
+        vector_store.upsert_embeddings(
+            batch['ids'],
+            batch['documents'],
+            [list(vector) for vector in batch['embeddings']],
+            batch['metadatas']
+        )
+        collection.delete(ids=batch['ids'])
+        vector_store.invalidate_counts([''])
+        for metadata in batch['metadatas']:
+            key = shard_key(metadata, settings.shard_by)
+            moved[key] = moved.get(key, 0) + 1
+
+    vector_store.persist()
+    return {'moved': moved}
+
+
+MIGRATIONS = {
+    'backfill-prices': backfill_price_values,
+    'reshard': reshard,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a vector store data migration")
+    parser.add_argument("migration", choices=sorted(MIGRATIONS))
+    args = parser.parse_args()
+
+    result = MIGRATIONS[args.migration](ChromaVectorStore())
+    print(f"{args.migration}: {result}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+import os
+import pickle
+import threading
+from typing import List, Dict, Optional, Tuple
+import numpy as np
+
+
+FORMAT_VERSION = 1
+
+QUANTIZED_DTYPES = ("int8", "float16")
+
+# Rows scored per block, bounding the float32 copy made while scoring
+SCORE_BLOCK_ROWS = 65536
+
+
+def distances(space: str, query: np.ndarray, vectors: np.ndarray, norms: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Distances from a query to each row of vectors, as Chroma reports them
+
+    Args:
+        space: Collection distance space: 'l2' (squared), 'cosine' or 'ip'
+        query: Query vector
+        vectors: One vector per row
+        norms: Squared norms of the rows, computed if not given
+
+    Returns:
+        float32 distances, smaller is closer
+    """
+    query = np.asarray(query, dtype=np.float32)
+    dots = vectors @ query
+    if space == "ip":
+        return 1.0 - dots
+    if norms is None:
+        norms = np.einsum("ij,ij->i", vectors, vectors)
+    query_norm = float(query @ query)
+    if space == "cosine":
+        return 1.0 - dots / np.maximum(np.sqrt(norms * query_norm), 1e-12)
+    return np.maximum(norms - 2.0 * dots + query_norm, 0.0)
+
+
+class QuantizedIndex:
+    """
+    Compact in-memory copy of the collection's vectors for first-stage scoring
+
+    Vectors are stored as int8 (each row scaled by its largest component)
+    or float16, a quarter or half the size of float32. Scoring every row is
+    a blocked matrix-vector product; callers re-rank the best candidates
+    with the full-precision vectors. Removed rows are replaced by the last
+    row, so the arrays stay dense.
+    """
+
+    def __init__(self, dtype: str = "int8", path: Optional[str] = None):
+        if dtype not in QUANTIZED_DTYPES:
+            raise ValueError(f"Unsupported quantized dtype {dtype!r}, expected one of {QUANTIZED_DTYPES}")
+        self.dtype = dtype
+        self.path = path
+
+        self._lock = threading.RLock()
+        self._reset(0)
+        self.dirty = False
+
+        if path and os.path.exists(path):
+            self.load()
+
+    def _reset(self, dimensions: int):
+        """Start from an empty index"""
+        self.dimensions = dimensions
+        self.ids: List[str] = []
+        self.positions: Dict[str, int] = {}
+        self.codes = np.zeros((0, dimensions), dtype=np.int8 if self.dtype == "int8" else np.float16)
+        self.scales = np.zeros(0, dtype=np.float32)
+        self.norms = np.zeros(0, dtype=np.float32)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def nbytes(self) -> int:
+        """Memory held by the vector arrays"""
+        count = len(self.ids)
+        return count * (self.codes.itemsize * self.dimensions + self.scales.itemsize + self.norms.itemsize)
+
+    def _quantize(self, vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Codes and per-row scales of float32 vectors"""
+        if self.dtype == "float16":
+            return vectors.astype(np.float16), np.ones(len(vectors), dtype=np.float32)
+        scales = np.abs(vectors).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        codes = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+        return codes, scales.astype(np.float32)
+
+    def _grow(self, needed: int):
+        """Make room for at least `needed` rows. Caller holds the lock."""
+        capacity = len(self.codes)
+        if needed <= capacity:
+            return
+        capacity = max(needed, capacity * 2, 1024)
+        for name in ("codes", "scales", "norms"):
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:len(self.ids)] = old[:len(self.ids)]
+            setattr(self, name, new)
+
+    def add(self, chunk_ids: List[str], vectors: List[List[float]]):
+        """
+        Add vectors, replacing any stored under the same IDs
+
+        Args:
+            chunk_ids: Chunk IDs in the vector store
+            vectors: Full-precision embeddings
+        """
+        if not chunk_ids:
+            return
+        vectors = np.asarray(vectors, dtype=np.float32)
+        codes, scales = self._quantize(vectors)
+        decoded = codes.astype(np.float32) * scales[:, None]
+        norms = np.einsum("ij,ij->i", decoded, decoded)
+
+        with self._lock:
+            if self.dimensions != vectors.shape[1]:
+                if self.ids:
+                    raise ValueError(f"Expected {self.dimensions}-dimensional vectors, got {vectors.shape[1]}")
+                self._reset(vectors.shape[1])
+
+            self._grow(len(self.ids) + len(chunk_ids))
+            for chunk_id, code, scale, norm in zip(chunk_ids, codes, scales, norms):
+                row = self.positions.get(chunk_id)
+                if row is None:
+                    row = len(self.ids)
+                    self.ids.append(chunk_id)
+                    self.positions[chunk_id] = row
+                self.codes[row] = code
+                self.scales[row] = scale
+                self.norms[row] = norm
+            self.dirty = True
+
+    def remove(self, chunk_ids: List[str]):
+        """Remove vectors by chunk ID"""
+        with self._lock:
+            for chunk_id in chunk_ids:
+                row = self.positions.pop(chunk_id, None)
+                if row is None:
+                    continue
+                last = len(self.ids) - 1
+                if row != last:
+                    moved = self.ids[last]
+                    self.ids[row] = moved
+                    self.positions[moved] = row
+                    self.codes[row] = self.codes[last]
+                    self.scales[row] = self.scales[last]
+                    self.norms[row] = self.norms[last]
+                self.ids.pop()
+            self.dirty = True
+
+    def search(self, vector: List[float], k: int, space: str = "l2") -> List[Tuple[str, float]]:
+        """
+        Approximate nearest neighbours from the quantized vectors
+
+        Args:
+            vector: Query embedding
+            k: Number of candidates to return
+            space: Collection distance space
+
+        Returns:
+            List of (chunk ID, approximate distance) pairs, closest first
+        """
+        query = np.asarray(vector, dtype=np.float32)
+
+        with self._lock:
+            count = len(self.ids)
+            if not count or k <= 0:
+                return []
+
+            scores = np.empty(count, dtype=np.float32)
+            for start in range(0, count, SCORE_BLOCK_ROWS):
+                end = min(start + SCORE_BLOCK_ROWS, count)
+                block = self.codes[start:end].astype(np.float32)
+                block *= self.scales[start:end, None]
+                scores[start:end] = distances(space, query, block, self.norms[start:end])
+                del block
+
+            k = min(k, count)
+            top = np.argpartition(scores, k - 1)[:k]
+            top = top[np.argsort(scores[top])]
+            return [(self.ids[row], float(scores[row])) for row in top]
+
+    def save(self):
+        """Write the index to its path, replacing the previous file atomically"""
+        if not self.path:
+            return
+
+        with self._lock:
+            count = len(self.ids)
+            state = {
+                'version': FORMAT_VERSION,
+                'dtype': self.dtype,
+                'dimensions': self.dimensions,
+                'ids': self.ids,
+                'codes': self.codes[:count],
+                'scales': self.scales[:count],
+                'norms': self.norms[:count]
+            }
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.path)
+            self.dirty = False
+
+    def load(self):
+        """Read the index from its path"""
+        with open(self.path, 'rb') as f:
+            state = pickle.load(f)
+        if state.get('version') != FORMAT_VERSION or state.get('dtype') != self.dtype:
+            raise ValueError(f"Unsupported quantized index format in {self.path}")
+
+        with self._lock:
+            self.dimensions = state['dimensions']
+            self.ids = state['ids']
+            self.positions = {chunk_id: row for row, chunk_id in enumerate(self.ids)}
+            self.codes = state['codes']
+            self.scales = state['scales']
+            self.norms = state['norms']
+            self.dirty = False
@@ -0,0 +1,66 @@
+import re
+from typing import Any, Dict, List
+from urllib.parse import urlsplit
+
+SHARD_KEYS = ("domain", "tag")
+
+# Shard collections are named <collection_name>__<shard>
+SHARD_SEPARATOR = "__"
+
+# Shard for chunks without a domain or tag
+DEFAULT_SHARD = "other"
+
+# Labels that never identify a site on their own, e.g. the "co" in amazon.co.uk
+_GENERIC_LABELS = {"ac", "co", "com", "gov", "net", "org", "shop", "store"}
+
+
+def shard_key(metadata: Dict[str, Any], shard_by: str) -> str:
+    """
+    Shard a chunk belongs to
+
+    Args:
+        metadata: Chunk metadata with 'url' and optionally 'tags'
+        shard_by: "domain" for the URL's host without "www.", or "tag"
+            for the page's first tag
+
+    Returns:
+        A shard key usable in a Chroma collection name
+    """
+    if shard_by == "domain":
+        value = urlsplit(metadata.get('url') or '').hostname or ''
+        if value.startswith("www."):
+            value = value[4:]
+    elif shard_by == "tag":
+        tags = metadata.get('tags') or []
+        value = tags[0] if tags else ''
+    else:
+        raise ValueError(f"Unsupported shard_by {shard_by!r}, expected one of {SHARD_KEYS}")
+
+    key = re.sub(r'[^a-z0-9.]+', '-', value.lower()).strip('.-')[:63].strip('.-')
+    return key or DEFAULT_SHARD
+
+
+def shard_collection_name(collection_name: str, key: str) -> str:
+    """Name of the Chroma collection holding a shard"""
+    return f"{collection_name}{SHARD_SEPARATOR}{key}"
+
+
+def shard_aliases(key: str) -> List[str]:
+    """
+    Phrases that name a shard in a query
+
+    Examples:
+        "bestbuy.com" -> ["bestbuy.com", "bestbuy"]
+        "gaming-laptops" -> ["gaming laptops", "gaming laptop"]
+    """
+    if key == DEFAULT_SHARD:
+        return []
+    if "." in key:
+        labels = [label for label in key.split(".")[:-1] if len(label) > 2 and label not in _GENERIC_LABELS]
+        return [key] + labels[-1:]
+
+    phrase = key.replace("-", " ")
+    aliases = [phrase]
+    if phrase.endswith("s") and len(phrase) > 3:
+        aliases.append(phrase[:-1])
+    return aliases
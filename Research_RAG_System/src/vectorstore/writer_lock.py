@@ -0,0 +1,62 @@
+import os
+from typing import Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: one process per data directory
+    fcntl = None
+
+
+class WriterLock:
+    """
+    Cross-process lock electing the one process that writes to a data directory
+
+    API workers started by `uvicorn --workers N` share the vector store and
+    the job queue. Exactly one of them holds this lock and runs ingestion;
+    the others serve queries and take the lock over if the writer exits.
+    The lock is an flock on a file, so the kernel releases it when the
+    holding process dies, however it dies.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fd: Optional[int] = None
+
+    @property
+    def held(self) -> bool:
+        return self._fd is not None
+
+    def try_acquire(self) -> bool:
+        """
+        Take the lock if no other process holds it, without waiting
+
+        Returns:
+            True if this process now holds the lock
+        """
+        if self._fd is not None:
+            return True
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        if fcntl is not None:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                os.close(fd)
+                return False
+
+        os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode())
+        self._fd = fd
+        return True
+
+    def release(self):
+        """Give up the lock so a standby process can take over"""
+        if self._fd is None:
+            return
+        if fcntl is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        os.close(self._fd)
+        self._fd = None
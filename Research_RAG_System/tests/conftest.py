@@ -0,0 +1,29 @@
+import os
+import tempfile
+
+# Settings are read at import time: keep test state out of ./data and never call OpenAI
+_data_dir = tempfile.mkdtemp(prefix="rag-tests-")
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+os.environ.setdefault("JOBS_DB_PATH", os.path.join(_data_dir, "jobs.db"))
+os.environ.setdefault("FINGERPRINT_DB_PATH", os.path.join(_data_dir, "fingerprints.db"))
+os.environ.setdefault("EMBEDDING_CACHE_PATH", os.path.join(_data_dir, "embedding_cache.db"))
+os.environ.setdefault("VECTOR_DB_PATH", os.path.join(_data_dir, "chroma_db"))
+
+import chromadb
+import pytest
+from chromadb.config import Settings as ChromaSettings
+from benchmarks.fakes import CountingEmbeddings
+from src.vectorstore.chroma_store import ChromaVectorStore
+
+
+@pytest.fixture
+def embeddings():
+    return CountingEmbeddings()
+
+
+@pytest.fixture
+def vector_store(embeddings):
+    """Vector store on a fresh in-memory Chroma client"""
+    client = chromadb.EphemeralClient(settings=ChromaSettings(anonymized_telemetry=False, allow_reset=True))
+    client.reset()
+    return ChromaVectorStore(embeddings=embeddings, client=client)
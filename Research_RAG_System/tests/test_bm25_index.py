@@ -0,0 +1,27 @@
+import pytest
+from src.retrieval.bm25_index import BM25Index
+
+TEXTS = {
+    f"chunk-{i}": f"{'gaming' if i % 3 else 'office'} laptop {i} with {8 * (1 + i % 4)} GB RAM"
+                  + (" and an rtx4090 graphics card" if i % 5 == 0 else "")
+    for i in range(40)
+}
+
+
+def test_scores_after_deletes_match_a_fresh_index():
+    index = BM25Index()
+    for chunk_id, text in TEXTS.items():
+        index.add(chunk_id, text)
+    deleted = [chunk_id for i, chunk_id in enumerate(TEXTS) if i % 3 == 0 or i % 5 == 0]
+    index.remove(deleted)
+
+    fresh = BM25Index()
+    for chunk_id, text in TEXTS.items():
+        if chunk_id not in deleted:
+            fresh.add(chunk_id, text)
+
+    for query in ("office laptop", "gaming laptop 16 GB", "rtx4090", "laptop 7"):
+        # Several chunks tie, so compare scores by chunk rather than rank order
+        expected = dict(fresh.search(query, k=len(TEXTS)))
+        results = dict(index.search(query, k=len(TEXTS)))
+        assert results == pytest.approx(expected, rel=1e-5)
@@ -0,0 +1,70 @@
+import time
+
+import pytest
+from benchmarks.fakes import CountingEmbeddings
+from src.vectorstore.bulk_writer import BulkVectorWriter
+
+
+class RecordingEmbeddings(CountingEmbeddings):
+    """Records the texts of every embedding request and fails those containing 'boom'"""
+
+    def __init__(self):
+        super().__init__()
+        self.requests = []
+
+    def embed_documents(self, texts):
+        self.requests.append(list(texts))
+        if any("boom" in text for text in texts):
+            raise RuntimeError("embedding failed")
+        return super().embed_documents(texts)
+
+
+def document(name: str, chunks: int, tokens: int = 40):
+    return [
+        {'text': f"{name} chunk {i}", 'tokens': tokens, 'metadata': {'url': f"https://example.com/{name}", 'chunk_index': i}}
+        for i in range(chunks)
+    ]
+
+
+@pytest.fixture
+def embeddings():
+    return RecordingEmbeddings()
+
+
+def test_batches_are_split_by_token_budget(vector_store, embeddings):
+    writer = BulkVectorWriter(vector_store, buffer_chunks=1000, flush_interval=0, batch_tokens=100, max_retries=0)
+    futures = [writer.add(document("a", 3)), writer.add(document("b", 2))]
+    writer.close()
+
+    # 5 chunks of 40 tokens with a 100-token budget: 2 + 2 + 1
+    assert [len(request) for request in embeddings.requests] == [2, 2, 1]
+    assert all(len(future.result(timeout=0)) for future in futures)
+    assert vector_store.get_collection_count() == 5
+
+
+def test_time_based_flush_writes_without_a_full_buffer(vector_store, embeddings):
+    writer = BulkVectorWriter(vector_store, buffer_chunks=1000, flush_interval=0.2, max_retries=0)
+    writer.start()
+    try:
+        start = time.monotonic()
+        ids = writer.add(document("a", 2)).result(timeout=5)
+        assert time.monotonic() - start >= 0.2
+        assert len(ids) == 2
+        assert vector_store.get_collection_count() == 2
+    finally:
+        writer.close()
+
+
+def test_failed_batch_only_fails_its_own_documents(vector_store, embeddings):
+    # One document per embedding batch
+    writer = BulkVectorWriter(vector_store, buffer_chunks=1000, flush_interval=0, batch_tokens=80, max_retries=0)
+    ok = writer.add(document("ok", 2))
+    failed = writer.add(document("boom", 2))
+    also_ok = writer.add(document("fine", 2))
+    writer.close()
+
+    assert len(ok.result(timeout=0)) == 2
+    assert len(also_ok.result(timeout=0)) == 2
+    with pytest.raises(RuntimeError, match="embedding failed"):
+        failed.result(timeout=0)
+    assert vector_store.get_collection_count() == 4
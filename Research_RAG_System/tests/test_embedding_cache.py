@@ -0,0 +1,38 @@
+import sqlite3
+
+import pytest
+from benchmarks.fakes import CountingEmbeddings
+from src.vectorstore.embedding_cache import CachedEmbeddings, EmbeddingCache, cache_key
+from src.vectorstore.embeddings import create_embeddings, embedding_model_id
+
+
+def test_model_spellings_share_cache_keys():
+    assert embedding_model_id("openai:text-embedding-3-small") == embedding_model_id("text-embedding-3-small")
+    assert embedding_model_id("local:all-MiniLM-L6-v2") != embedding_model_id("all-MiniLM-L6-v2")
+
+    prefixed = create_embeddings("openai:text-embedding-3-small")
+    bare = create_embeddings("text-embedding-3-small")
+    assert cache_key(prefixed.model, "laptop") == cache_key(bare.model, "laptop")
+
+
+def test_cached_texts_are_not_embedded_again(tmp_path):
+    cache = EmbeddingCache(path=str(tmp_path / "cache.db"))
+    fake = CountingEmbeddings()
+    first = CachedEmbeddings(fake, model=embedding_model_id("openai:text-embedding-3-small"), cache=cache)
+    second = CachedEmbeddings(fake, model=embedding_model_id("text-embedding-3-small"), cache=cache)
+
+    vectors = first.embed_documents(["a  laptop", "a phone"])
+    assert second.embed_documents(["a laptop", "a phone"]) == [pytest.approx(v, abs=1e-6) for v in vectors]
+    assert fake.texts == 2
+
+
+def test_failed_write_leaves_the_cache_usable(tmp_path):
+    cache = EmbeddingCache(path=str(tmp_path / "cache.db"))
+
+    # The second key cannot be bound, so the insert fails part way through
+    with pytest.raises(sqlite3.Error):
+        cache.put_many({"a": [0.5], ("not", "a", "key"): [0.5]})
+
+    cache.put_many({"b": [0.25]})
+    assert cache.get_many(["a", "b"]) == {"b": [0.25]}
+    assert cache.stats()['entries'] == 1
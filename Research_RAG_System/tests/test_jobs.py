@@ -0,0 +1,74 @@
+import asyncio
+import sqlite3
+from types import SimpleNamespace
+
+import pytest
+from src.jobs.manager import IngestionJobManager
+from src.jobs.store import JobStore
+
+
+def test_failed_transaction_leaves_the_connection_usable(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"))
+
+    # url is NOT NULL, so the second insert fails inside the transaction
+    with pytest.raises(sqlite3.IntegrityError):
+        store.create_job(["https://shop.example.com/1", None])
+
+    job_id = store.create_job(["https://shop.example.com/2"])
+    assert [entry['url'] for entry in store.get_job(job_id)['urls']] == ["https://shop.example.com/2"]
+    assert store.claim_next("worker-0")['url'] == "https://shop.example.com/2"
+
+
+class FlakyStore(JobStore):
+    """Job store whose first claim fails as if another process held the database"""
+
+    claims = 0
+
+    def claim_next(self, worker):
+        self.claims += 1
+        if self.claims == 1:
+            raise sqlite3.OperationalError("database is locked")
+        return super().claim_next(worker)
+
+
+def test_worker_survives_errors_and_fails_the_claimed_url(tmp_path):
+    store = FlakyStore(str(tmp_path / "jobs.db"))
+    job_id = store.create_job(["https://shop.example.com/1", "https://shop.example.com/2"])
+
+    def add(chunks):
+        raise RuntimeError("writer closed")
+
+    manager = IngestionJobManager(
+        store=store,
+        crawler=None,
+        processing_pool=None,
+        writer=SimpleNamespace(add=add),
+        fingerprints=None,
+        workers=1,
+        poll_interval=0.01
+    )
+
+    async def prepare_url(url):
+        if url.endswith("/2"):
+            return {'status': 'skipped', 'error': "No content extracted"}
+        return {'status': 'write', 'url': url, 'new_chunks': []}
+
+    manager.prepare_url = prepare_url
+
+    async def run():
+        manager._wakeup = asyncio.Event()
+        worker = asyncio.create_task(manager._worker("worker-0"))
+        for _ in range(200):
+            if store.get_job(job_id)['finished_at'] is not None:
+                break
+            await asyncio.sleep(0.01)
+        worker.cancel()
+        await asyncio.gather(worker, return_exceptions=True)
+
+    asyncio.run(run())
+
+    urls = store.get_job(job_id)['urls']
+    assert [(entry['status'], entry['error']) for entry in urls] == [
+        ('failed', "writer closed"),
+        ('skipped', "No content extracted")
+    ]
@@ -0,0 +1,65 @@
+import asyncio
+import os
+from types import SimpleNamespace
+
+import pytest
+from src.config.settings import settings
+from src.jobs.manager import IngestionJobManager
+from src.jobs.store import JobStore
+from src.retrieval.query_cache import QueryCache
+from src.vectorstore.chroma_store import ChromaVectorStore
+from src.vectorstore.writer_lock import WriterLock
+
+
+def answer(url: str) -> dict:
+    return {'answer': "cached", 'sources': [{'metadata': {'url': url}}]}
+
+
+def test_standby_worker_drops_answers_the_writer_invalidates(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "query_cache_sync_interval", 0.05)
+    monkeypatch.setattr(settings, "writer_failover_interval", 60.0)
+    path = str(tmp_path / "jobs.db")
+    # Each process opens the job database itself
+    writer_store, standby_store = JobStore(path), JobStore(path)
+    writer_store.publish_invalidations(["https://shop.example.com/old"])
+
+    cache = QueryCache(max_entries=10, ttl=60)
+    cache.put("best laptop", None, answer("https://shop.example.com/1"))
+    cache.put("best phone", None, answer("https://shop.example.com/2"))
+    cache.put("old laptop", None, answer("https://shop.example.com/old"))
+    standby = IngestionJobManager(
+        store=standby_store,
+        crawler=None,
+        processing_pool=None,
+        writer=SimpleNamespace(vector_store=SimpleNamespace(is_writer=False, acquire_writer=lambda: False)),
+        fingerprints=None,
+        query_cache=cache
+    )
+
+    async def run():
+        await standby.start()
+        writer_store.publish_invalidations(["https://shop.example.com/1"])
+        await asyncio.sleep(0.3)
+        for task in standby._tasks:
+            task.cancel()
+        await asyncio.gather(*standby._tasks, return_exceptions=True)
+
+    asyncio.run(run())
+
+    assert cache.get("best laptop")[0] is None
+    assert cache.get("best phone")[0] is not None
+    # Invalidations published before the worker started are not replayed
+    assert cache.get("old laptop")[0] is not None
+
+
+def test_second_process_cannot_open_an_embedded_store(tmp_path, monkeypatch, embeddings):
+    monkeypatch.setattr(settings, "vector_db_path", str(tmp_path))
+    monkeypatch.setattr(settings, "vector_db_host", None)
+    # Another process holds the writer lock on the data directory
+    other = WriterLock(os.path.join(str(tmp_path), "writer.lock"))
+    assert other.try_acquire()
+    try:
+        with pytest.raises(RuntimeError, match="VECTOR_DB_HOST"):
+            ChromaVectorStore(embeddings=embeddings)
+    finally:
+        other.release()
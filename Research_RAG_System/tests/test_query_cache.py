@@ -0,0 +1,76 @@
+from src.retrieval.query_cache import QueryCache
+
+
+def answer(url: str) -> dict:
+    return {'answer': url, 'sources': [{'metadata': {'url': url}}]}
+
+
+class RecordingEmbed:
+    """Embeds queries as fixed vectors and records each batch"""
+
+    VECTORS = {
+        "best gaming laptop": [1.0, 0.0, 0.0],
+        "top gaming laptop": [0.99, 0.1, 0.0],
+        "cheap headphones": [0.0, 1.0, 0.0],
+        "quiet keyboard": [0.0, 0.0, 1.0],
+    }
+
+    def __init__(self):
+        self.batches = []
+
+    def __call__(self, queries):
+        self.batches.append(list(queries))
+        return [self.VECTORS[query] for query in queries]
+
+
+def test_get_many_embeds_exact_misses_in_one_call():
+    cache = QueryCache(max_entries=10, ttl=60, semantic_threshold=0.95)
+    cache.put("best gaming laptop", None, answer("https://a"), RecordingEmbed.VECTORS["best gaming laptop"])
+    cache.put("cheap headphones", {'price_max': 50}, answer("https://b"), RecordingEmbed.VECTORS["cheap headphones"])
+    embed = RecordingEmbed()
+
+    results = cache.get_many([
+        ("Best  gaming laptop", None),        # exact
+        ("top gaming laptop", None),          # semantic
+        ("cheap headphones", None),           # cached with other filters
+        ("quiet keyboard", None),             # miss
+    ], embed_batch=embed)
+
+    assert embed.batches == [["top gaming laptop", "cheap headphones", "quiet keyboard"]]
+    assert [response and response['answer'] for response, _ in results] == ["https://a", "https://a", None, None]
+    assert [embedding for _, embedding in results] == [None] + [RecordingEmbed.VECTORS[q] for q in embed.batches[0]]
+    assert cache.stats()['exact_hits'] == 1
+    assert cache.stats()['semantic_hits'] == 1
+    assert cache.stats()['misses'] == 2
+
+
+def test_get_many_without_semantic_tier_does_not_embed():
+    cache = QueryCache(max_entries=10, ttl=60, semantic_threshold=None)
+    cache.put("best gaming laptop", None, answer("https://a"))
+    embed = RecordingEmbed()
+
+    results = cache.get_many([("best gaming laptop", None), ("top gaming laptop", None)], embed_batch=embed)
+
+    assert embed.batches == []
+    assert [response and response['answer'] for response, _ in results] == ["https://a", None]
+
+
+def test_queries_differing_only_in_price_do_not_share_answers():
+    cache = QueryCache(max_entries=10, ttl=60, semantic_threshold=0.95)
+    cache.put("laptops under $500", None, answer("https://a"), [1.0, 0.0, 0.0])
+
+    def embed(query):
+        # Nearly identical embeddings, as a real model gives these queries
+        return [0.999, 0.04, 0.0]
+
+    assert cache.get("laptops under $50", None, embed=embed)[0] is None
+    assert cache.get_many([("laptops under $50", None)], embed_batch=lambda queries: [embed(q) for q in queries])[0][0] is None
+    assert cache.get("Laptops under  $500", None, embed=embed)[0]['answer'] == "https://a"
+    assert cache.get("laptops below $500", None, embed=embed)[0]['answer'] == "https://a"
+
+
+def test_queries_naming_other_shards_do_not_share_answers():
+    cache = QueryCache(max_entries=10, ttl=60, semantic_threshold=0.95, shard_names=lambda: ["amazon.com", "bestbuy.com"])
+    cache.put("headphones at bestbuy", None, answer("https://a"), [1.0, 0.0, 0.0])
+
+    assert cache.get("headphones at amazon", None, embed=lambda query: [0.999, 0.04, 0.0])[0] is None
@@ -0,0 +1,89 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+from benchmarks.stub_server import start_rate_limited_openai_server
+from src.config.settings import settings
+from src.utils.rate_limiter import RateLimitedTransport, RateLimiter
+
+
+class RecordingTransport(httpx.HTTPTransport):
+    """Records when each response arrived, with its status and headers"""
+
+    def __init__(self):
+        super().__init__()
+        self.responses = []
+
+    def handle_request(self, request):
+        response = super().handle_request(request)
+        self.responses.append((time.monotonic(), response.status_code, response.headers))
+        return response
+
+
+def chat(client: httpx.Client, url: str) -> httpx.Response:
+    return client.post(url, json={"model": "stub-chat", "messages": [{"role": "user", "content": "Best laptop?"}]})
+
+
+@pytest.fixture
+def server():
+    server, port = start_rate_limited_openai_server(requests_per_minute=60, tokens_per_minute=10 ** 6, latency=0)
+    yield f"http://127.0.0.1:{port}/v1/chat/completions"
+    server.shutdown()
+
+
+def test_429_pauses_halves_the_limit_and_honours_retry_after(server, monkeypatch):
+    monkeypatch.setattr(settings, "openai_max_retries", 3)
+    # Spend the model's budget without the limiter knowing about it
+    with httpx.Client() as client:
+        while chat(client, server).status_code != 429:
+            pass
+
+    limiter = RateLimiter(requests_per_minute=0, tokens_per_minute=0, initial_concurrency=8, backoff_base=0.01)
+    transport = RecordingTransport()
+    with httpx.Client(transport=RateLimitedTransport(limiter, transport)) as client:
+        response = chat(client, server)
+
+    assert response.status_code == 200
+    (throttled_at, status, headers), (retried_at, retry_status, _) = transport.responses
+    assert (status, retry_status) == (429, 200)
+    # The retry waited for the server's retry-after, and nothing was sent in between
+    assert retried_at - throttled_at >= int(headers['retry-after-ms']) / 1000
+    assert limiter.throttled == 1
+    assert limiter.stats()['concurrency_limit'] == 4
+
+
+def test_paused_limiter_holds_back_every_call(server):
+    limiter = RateLimiter(requests_per_minute=0, tokens_per_minute=0, initial_concurrency=8)
+    ticket = limiter.acquire("stub-chat", 10)
+    limiter.record(ticket, 429, httpx.Headers({'retry-after-ms': "300"}))
+    limiter.release(ticket)
+
+    start = time.monotonic()
+    limiter.release(limiter.acquire("stub-embed", 10))
+    assert time.monotonic() - start >= 0.3
+
+
+def test_call_to_another_model_passes_a_waiter_out_of_budget():
+    limiter = RateLimiter(requests_per_minute=1, tokens_per_minute=0, initial_concurrency=8)
+
+    async def run():
+        limiter.release(await limiter.aacquire("chat", 10))
+        # The chat budget is spent for a minute; this waiter heads the queue
+        waiting_chat = asyncio.create_task(limiter.aacquire("chat", 10))
+        await asyncio.sleep(0.05)
+        assert limiter.stats()['waiting'] == 1
+        try:
+            ticket = await asyncio.wait_for(limiter.aacquire("embed", 10), timeout=0.5)
+            limiter.release(ticket)
+            # A second chat call stays behind the first
+            second_chat = asyncio.create_task(limiter.aacquire("chat", 10))
+            await asyncio.sleep(0.05)
+            assert not second_chat.done()
+            second_chat.cancel()
+        finally:
+            waiting_chat.cancel()
+        await asyncio.gather(waiting_chat, second_chat, return_exceptions=True)
+
+    asyncio.run(run())
+    assert limiter.stats()['waiting'] == 0
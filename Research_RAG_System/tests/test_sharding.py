@@ -0,0 +1,113 @@
+import chromadb
+import pytest
+from chromadb.config import Settings as ChromaSettings
+from src.config.settings import settings
+from src.retrieval.hybrid_retriever import HybridRetriever
+from src.vectorstore.chroma_store import ChromaVectorStore
+from src.vectorstore.migrations import backfill_price_values, reshard
+
+
+@pytest.fixture
+def client():
+    client = chromadb.EphemeralClient(settings=ChromaSettings(anonymized_telemetry=False, allow_reset=True))
+    client.reset()
+    return client
+
+
+@pytest.fixture
+def sharded(monkeypatch):
+    monkeypatch.setattr(settings, "shard_by", "domain")
+    monkeypatch.setattr(settings, "shard_routing_enabled", True)
+
+
+def store_chunks(store, embeddings, domain: str, count: int, text: str = "laptop", price: str = None):
+    ids = [f"{domain}-{i}" for i in range(count)]
+    texts = [f"{text} {i} from {domain}" for i in range(count)]
+    metadatas = [{'url': f"https://{domain}/product/{i}", **({'price': price} if price else {})} for i in range(count)]
+    store.upsert_embeddings(ids, texts, embeddings.embed_documents(texts), metadatas)
+
+
+def test_shard_counts_are_cached_until_written(sharded, client, embeddings):
+    store = ChromaVectorStore(embeddings=embeddings, client=client)
+    store_chunks(store, embeddings, "shopa.com", 3)
+    store_chunks(store, embeddings, "shopb.com", 4)
+
+    assert store.get_collection_count() == 7
+    assert store._shard_counts['shopa.com'] == 3
+    assert store._shard_counts['shopb.com'] == 4
+
+    store_chunks(store, embeddings, "shopa.com", 5)
+    assert 'shopa.com' not in store._shard_counts
+    assert store._shard_counts['shopb.com'] == 4
+    assert store.get_collection_count() == 9
+
+    store.delete(["shopb.com-0", "shopb.com-1"])
+    assert store._shard_counts == {}
+    assert store.get_collection_count() == 7
+
+
+def test_routed_search_falls_back_to_every_shard(sharded, client, embeddings):
+    store = ChromaVectorStore(embeddings=embeddings, client=client)
+    store_chunks(store, embeddings, "shopa.com", 2, text="laptop bag")
+    store_chunks(store, embeddings, "shopb.com", 20, text="laptop bag")
+    retriever = HybridRetriever(store)
+
+    # "shopa" names a shard holding too few matches for the candidate list
+    results = retriever.retrieve("laptop bag like shopa sells", top_k=5)
+
+    assert len(results) == 5
+    assert {doc['metadata']['url'].split("/")[2] for doc in results} == {"shopa.com", "shopb.com"}
+
+
+def test_backfill_prices_covers_every_shard_without_moving_chunks(client, embeddings, monkeypatch):
+    monkeypatch.setattr(settings, "shard_by", None)
+    store = ChromaVectorStore(embeddings=embeddings, client=client)
+    store_chunks(store, embeddings, "legacy.com", 5, price="$19.99")
+
+    # Sharding enabled after these chunks were stored, before resharding
+    monkeypatch.setattr(settings, "shard_by", "domain")
+    store = ChromaVectorStore(embeddings=embeddings, client=client)
+    store_chunks(store, embeddings, "shopa.com", 3, price="$5.00")
+    monkeypatch.setattr(client, "get_max_batch_size", lambda: 2)
+
+    assert backfill_price_values(store) == {'scanned': 8, 'updated': 8}
+    assert store.collection.count() == 5
+    stored = store._get(None, ['metadatas'])
+    assert sorted(metadata['price_value'] for metadata in stored['metadatas']) == [5.0] * 3 + [19.99] * 5
+
+
+def test_reshard_keeps_the_total_count(client, embeddings, monkeypatch):
+    monkeypatch.setattr(settings, "shard_by", None)
+    store = ChromaVectorStore(embeddings=embeddings, client=client)
+    store_chunks(store, embeddings, "legacy.com", 5)
+
+    monkeypatch.setattr(settings, "shard_by", "domain")
+    store = ChromaVectorStore(embeddings=embeddings, client=client)
+    store_chunks(store, embeddings, "shopa.com", 3)
+    assert store.get_collection_count() == 8
+
+    assert reshard(store) == {'moved': {'legacy.com': 5}}
+    assert store.collection.count() == 0
+    assert store.get_collection_count() == 8
+
+
+def test_routed_search_with_enough_results_stays_on_its_shard(sharded, client, embeddings):
+    store = ChromaVectorStore(embeddings=embeddings, client=client)
+    store_chunks(store, embeddings, "shopa.com", 8, text="laptop bag")
+    store_chunks(store, embeddings, "shopb.com", 20, text="laptop bag")
+    retriever = HybridRetriever(store)
+    searched = []
+    search = store.similarity_search
+
+    def recording_search(*args, shards=None, **kwargs):
+        searched.append(shards)
+        return search(*args, shards=shards, **kwargs)
+
+    store.similarity_search = recording_search
+
+    # Fewer matches than the candidates over-fetched, but enough for top_k
+    results = retriever.retrieve("laptop bag like shopa sells", top_k=5)
+
+    assert len(results) == 5
+    assert searched == [["shopa.com"]]
+    assert {doc['metadata']['url'].split("/")[2] for doc in results} == {"shopa.com"}
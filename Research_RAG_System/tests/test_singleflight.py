@@ -0,0 +1,116 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from benchmarks.fakes import SlowChatModel
+from src.api.routes import query_products
+from src.config.settings import settings
+from src.generation.rag_chain import RAGChain
+from src.models.schemas import QueryRequest
+from src.retrieval.hybrid_retriever import HybridRetriever
+
+DOCS = [
+    {'id': "chunk-1", 'content': "Product 1 is a laptop with 16 GB RAM.", 'metadata': {'url': "https://shop.example.com/1"}, 'score': 0.9},
+    {'id': "chunk-2", 'content': "Product 2 is a laptop with 32 GB RAM.", 'metadata': {'url': "https://shop.example.com/2"}, 'score': 0.8},
+]
+
+
+class SlowRetriever(HybridRetriever):
+    """Retriever whose search takes a while and is counted"""
+
+    def __init__(self):
+        super().__init__(vector_store=None)
+        self.calls = 0
+
+    async def _aretrieve(self, query, top_k, filters):
+        self.calls += 1
+        await asyncio.sleep(0.05)
+        return DOCS
+
+
+class FailingChatModel(SlowChatModel):
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        self.calls += 1
+        raise RuntimeError("model overloaded")
+
+
+@pytest.fixture(autouse=True)
+def single_flight(monkeypatch):
+    monkeypatch.setattr(settings, "query_cache_enabled", False)
+    monkeypatch.setattr(settings, "single_flight_enabled", True)
+
+
+def pipeline(llm):
+    rag_chain = RAGChain()
+    rag_chain.llm = llm
+    return SlowRetriever(), rag_chain
+
+
+async def ask(retriever, rag_chain, query="Which laptop has the most RAM?"):
+    return await query_products(QueryRequest(query=query), retriever=retriever, rag_chain=rag_chain, query_cache=None)
+
+
+def test_identical_concurrent_queries_share_one_call():
+    llm = SlowChatModel(first_token_delay=0.1, token_delay=0.0)
+    retriever, rag_chain = pipeline(llm)
+
+    async def run():
+        # Spelling differences that normalize away still share the call
+        queries = ["Which laptop has the most RAM?", "which laptop has the most RAM?", "  Which laptop  has the most RAM? "]
+        return await asyncio.gather(*(ask(retriever, rag_chain, queries[i % 3]) for i in range(10)))
+
+    responses = asyncio.run(run())
+
+    assert retriever.calls == 1
+    assert llm.calls == 1
+    assert {response.answer for response in responses} == {"".join(llm.tokens)}
+    assert rag_chain.flights.stats() == {'calls': 1, 'shared': 9, 'in_flight': 0}
+
+
+def test_upstream_error_reaches_every_waiter():
+    llm = FailingChatModel()
+    retriever, rag_chain = pipeline(llm)
+
+    async def run():
+        return await asyncio.gather(*(ask(retriever, rag_chain) for _ in range(5)), return_exceptions=True)
+
+    results = asyncio.run(run())
+
+    assert llm.calls == 1
+    assert all(isinstance(result, HTTPException) and "model overloaded" in result.detail for result in results)
+
+
+def test_cancelled_waiter_does_not_cancel_the_shared_call():
+    llm = SlowChatModel(first_token_delay=0.2, token_delay=0.0)
+    retriever, rag_chain = pipeline(llm)
+
+    async def run():
+        tasks = [asyncio.create_task(ask(retriever, rag_chain)) for _ in range(3)]
+        # Past retrieval, while the shared LLM call is running
+        await asyncio.sleep(0.1)
+        assert rag_chain.flights.stats()['in_flight'] == 1
+        tasks[0].cancel()
+        return await asyncio.gather(*tasks, return_exceptions=True)
+
+    results = asyncio.run(run())
+
+    assert isinstance(results[0], asyncio.CancelledError)
+    assert [result.answer for result in results[1:]] == ["".join(llm.tokens)] * 2
+    assert llm.calls == 1
+
+
+def test_key_is_cleared_after_the_call_completes():
+    llm = SlowChatModel(first_token_delay=0.05, token_delay=0.0)
+    retriever, rag_chain = pipeline(llm)
+
+    async def run():
+        await asyncio.gather(ask(retriever, rag_chain), ask(retriever, rag_chain))
+        assert retriever.flights.stats()['in_flight'] == 0
+        assert rag_chain.flights.stats()['in_flight'] == 0
+        # Nothing is cached: the next caller runs the call again
+        await ask(retriever, rag_chain)
+
+    asyncio.run(run())
+
+    assert retriever.calls == 2
+    assert llm.calls == 2
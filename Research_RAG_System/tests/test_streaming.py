@@ -0,0 +1,102 @@
+import asyncio
+import json
+from typing import List
+
+import pytest
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from src.api.routes import query_products_stream
+from src.config.settings import settings
+from src.generation.rag_chain import RAGChain
+from src.models.schemas import QueryRequest
+
+DOCS = [
+    {'content': "Product 1 is a laptop with 16 GB RAM.", 'metadata': {'url': "https://shop.example.com/1"}, 'score': 0.9},
+    {'content': "Product 2 is a laptop with 32 GB RAM.", 'metadata': {'url': "https://shop.example.com/2"}, 'score': 0.8},
+]
+
+
+class StreamingChatModel(BaseChatModel):
+    """Fake chat model that logs each token it yields and can fail part way through"""
+
+    tokens: List[str] = ["This ", "laptop ", "is ", "good."]
+    fail_after: int = -1
+    log: List[str] = []
+
+    @property
+    def _llm_type(self) -> str:
+        return "streaming-fake"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="".join(self.tokens)))])
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        for i, token in enumerate(self.tokens):
+            if i == self.fail_after:
+                raise RuntimeError("model overloaded")
+            await asyncio.sleep(0.01)
+            self.log.append(f"model:{token}")
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+
+
+class FakeRetriever:
+    async def aretrieve(self, query, top_k=5, filters=None):
+        return DOCS
+
+
+def stream(llm: StreamingChatModel) -> List[dict]:
+    """Run /api/query/stream and return its events, logging each one as it arrives"""
+    rag_chain = RAGChain()
+    rag_chain.llm = llm
+
+    async def run():
+        response = await query_products_stream(
+            QueryRequest(query="Which laptop has the most RAM?"),
+            retriever=FakeRetriever(),
+            rag_chain=rag_chain,
+            query_cache=None
+        )
+        events = []
+        async for line in response.body_iterator:
+            event = json.loads(line)
+            llm.log.append(f"client:{event['type']}")
+            events.append(event)
+        return events
+
+    return asyncio.run(run())
+
+
+@pytest.fixture(autouse=True)
+def no_query_cache(monkeypatch):
+    monkeypatch.setattr(settings, "query_cache_enabled", False)
+
+
+def test_sources_arrive_before_tokens():
+    events = stream(StreamingChatModel(log=[]))
+
+    assert [event['type'] for event in events] == ["sources"] + ["token"] * 4 + ["done"]
+    assert [source['metadata']['url'] for source in events[0]['sources']] == [doc['metadata']['url'] for doc in DOCS]
+    assert "".join(event['content'] for event in events[1:-1]) == "This laptop is good."
+
+
+def test_tokens_are_sent_as_they_are_generated():
+    llm = StreamingChatModel(log=[])
+    stream(llm)
+
+    # Each token reaches the client before the model produces the next one
+    assert llm.log == [
+        "client:sources",
+        "model:This ", "client:token",
+        "model:laptop ", "client:token",
+        "model:is ", "client:token",
+        "model:good.", "client:token",
+        "client:done"
+    ]
+
+
+def test_generation_error_ends_stream_with_error_event():
+    events = stream(StreamingChatModel(log=[], fail_after=2))
+
+    assert [event['type'] for event in events] == ["sources", "token", "token", "error"]
+    assert "model overloaded" in events[-1]['detail']
@@ -0,0 +1,27 @@
+import pytest
+from benchmarks.bench_text_cleaner import previous_clean
+from src.processing.text_cleaner import TextCleaner
+
+CORPUS = [
+    "",
+    "   ",
+    "Product 42 | Example Shop Product 42 is a dependable laptop. It ships in 2-3 days.",
+    "Don't miss: 50% off!!  Price — €1.299,00 (was ₹ 1,49,999)... ★★★★☆ \"great\" & fast",
+    "Specs:\t16GB/512GB   naïve café Größe 東京 ™ ® © 🚀 ...wait.... <b>bold</b> #1 @shop\r\n",
+    "Combining marks: é ñ, Arabic ١٢٣ and Devanagari १२३ digits, ½ ² Ⅻ",
+    "Control\x00chars\x01\x07 and\x0b\x0cvertical\x1c\x1d\x1e\x1f separators \x7f\x80\x9f end",
+    "Zero width\u200b\u200c\u200d\ufeff, no-break\u00a0space, line\u2028and\u2029paragraph, ideographic\u3000space",
+    "Currencies: $10 £5 ¥300 ₩1000 ₿0.1 ¢99 and dots . .. ... .... ....",
+    "Snake_case_words, under__scores and Ω≈ç√∫ maths ∑∏ plus emoji 👍🏽👨‍👩‍👧",
+    "\n\n\t  leading and trailing whitespace \t\n\n",
+]
+
+
+@pytest.mark.parametrize("text", CORPUS)
+def test_clean_matches_previous_cleaner(text):
+    assert TextCleaner.clean(text) == previous_clean(text)
+
+
+def test_clean_matches_previous_cleaner_on_every_bmp_character():
+    text = "".join(chr(code) for code in range(0x10000) if not 0xD800 <= code <= 0xDFFF)
+    assert TextCleaner.clean(text) == previous_clean(text)
@@ -0,0 +1,44 @@
+import tiktoken
+from src.config.settings import settings
+from src.processing import tokens
+
+
+def test_encoding_is_loaded_once_per_encoding(monkeypatch):
+    loads = []
+
+    def failing_get_encoding(name):
+        loads.append(name)
+        raise ConnectionError("offline")
+
+    monkeypatch.setattr(tiktoken, "get_encoding", failing_get_encoding)
+    monkeypatch.setattr(settings, "embedding_model", "openai:text-embedding-3-small")
+    tokens._load_encoding.cache_clear()
+    try:
+        for model in (None, "text-embedding-3-small", "openai:text-embedding-3-small", "local:all-MiniLM-L6-v2"):
+            assert tokens.get_encoding(model) is None
+        assert tokens.count_tokens("twelve chars", "openai:text-embedding-3-small") == 3
+    finally:
+        tokens._load_encoding.cache_clear()
+
+    # Every one of these names uses cl100k_base, and the failed load is not retried
+    assert loads == ["cl100k_base"]
+
+
+def test_chat_and_fine_tuned_models_use_their_encoding(monkeypatch):
+    loads = []
+
+    def recording_get_encoding(name):
+        loads.append(name)
+        raise ConnectionError("offline")
+
+    monkeypatch.setattr(tiktoken, "get_encoding", recording_get_encoding)
+    tokens._load_encoding.cache_clear()
+    try:
+        assert tokens.count_tokens("twelve chars", "gpt-4o-mini") == 3
+        assert tokens.count_tokens("twelve chars", "ft:gpt-4o-mini-2024-07-18:acme::abc123") == 3
+        assert tokens.count_chat_tokens(["twelve chars"], "ft:gpt-4o-mini-2024-07-18:acme::abc123") == 9
+        assert tokens.count_tokens("twelve chars", "ft:some-unknown-model:acme::abc123") == 3
+    finally:
+        tokens._load_encoding.cache_clear()
+
+    assert loads == ["o200k_base", "cl100k_base"]
@@ -0,0 +1,22 @@
+from src.observability.tracing import Metrics, Span
+
+
+def finished(name: str, **attributes) -> Span:
+    recorded = Span(name, attributes)
+    recorded.duration = 0.01
+    return recorded
+
+
+def test_only_declared_counters_are_summed():
+    metrics = Metrics()
+    metrics.observe(finished("search.dense", k=10, shards=4, results=10))
+    metrics.observe(finished("search.dense", k=10, shards=4, results=7))
+    metrics.observe(finished("llm.generate", prompt_tokens=900, completion_tokens=120, cached=True))
+
+    rendered = metrics.render()
+    assert 'rag_stage_results_total{stage="search.dense"} 17' in rendered
+    assert 'rag_stage_prompt_tokens_total{stage="llm.generate"} 900' in rendered
+    assert 'rag_stage_completion_tokens_total{stage="llm.generate"} 120' in rendered
+    for attribute in ("k", "shards", "cached"):
+        assert f"rag_stage_{attribute}_total" not in rendered
+    assert 'rag_stage_duration_seconds_count{stage="search.dense"} 2' in rendered